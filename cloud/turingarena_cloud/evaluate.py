@@ -23,7 +23,9 @@ def cloud_evaluate(evaluate_request: EvaluateRequest):
                 evaluate_request.working_directory.current_directory,
             )
 
+            # events are stored on another host, which cannot read the local blob store
             yield from Evaluator(evaluator_dir).evaluate(
                 files,
                 seed=evaluate_request.seed,
+                inline_files=True,
             )
@@ -7,10 +7,11 @@ def run(algorithm, s):
     with ta.run_algorithm(algorithm, time_limit=0.05) as process:
         process.procedures.compute(len(s), s)
         subsequence_length = process.functions.max_length()
-        subsequence = [x for i, x in enumerate(s) if process.functions.takes(i)]
-        color = []
-        for i in range(len(s)):
-            color.append(process.functions.color_of(i))
+        with process.batch() as batch:
+            takes = [batch.functions.takes(i) for i in range(len(s))]
+            color_of = [batch.functions.color_of(i) for i in range(len(s))]
+        subsequence = [x for x, t in zip(s, takes) if t.result()]
+        color = [c.result() for c in color_of]
     if DEBUG:
         print(f"Time usage: {process.time_usage}", file=sys.stderr)
     return (subsequence_length, subsequence, color)
@@ -26,43 +27,52 @@ def create_random_instance(n, digits=6):
     return random.sample(value_range, k=n)
 
 
+def run_case(algorithm, n):
+    s = create_random_instance(n)
+    optimal_subsequence = get_an_optimal_subsequence_of(s)
+    subsequence_length, subsequence, color = run(algorithm, s)
+    if DEBUG:
+        print("Declared maximum subsequence length:", subsequence_length)
+        print("Subsequence:", subsequence)
+        print("Optimal subsequence:", optimal_subsequence)
+        print("Coloring:", color)
+    return (
+            is_subsequence(subsequence, s) and
+            is_increasing(subsequence) and
+            len(subsequence) == len(optimal_subsequence)
+    )
+
+
 def main():
     algorithm = ta.submission.source
 
-    for gs, ns in [
-        (["exponential", "quadratic", "n_log_n"], [10, 50, 100]),
-        (["quadratic", "n_log_n"], [500, 750, 1000]),
-        (["n_log_n"], [3000, 6000, 10000]),
-    ]:
-        for n in ns:
-            if not any(ta.goals.get(g, True) for g in gs):
-                break
-
-            print(f"Testing N = {n}...\t", end="")
-
-            s = create_random_instance(n)
-            optimal_subsequence = get_an_optimal_subsequence_of(s)
-            try:
-                subsequence_length, subsequence, color = run(algorithm, s)
-            except ta.AlgorithmError as e:
-                print(f"[WRONG: {e}]")
-                correct = False
-            else:
-                if DEBUG:
-                    print("Declared maximum subsequence length:", subsequence_length)
-                    print("Subsequence:", subsequence)
-                    print("Optimal subsequence:", optimal_subsequence)
-                    print("Coloring:", color)
-                correct = (
-                        is_subsequence(subsequence, s) and
-                        is_increasing(subsequence) and
-                        len(subsequence) == len(optimal_subsequence)
-                )
-            if correct:
-                print("[CORRECT]")
-            else:
-                for g in gs:
-                    ta.goals[g] = False
+    cases = [
+        (gs, n)
+        for gs, ns in [
+            (["exponential", "quadratic", "n_log_n"], [10, 50, 100]),
+            (["quadratic", "n_log_n"], [500, 750, 1000]),
+            (["n_log_n"], [3000, 6000, 10000]),
+        ]
+        for n in ns
+    ]
+
+    for result in ta.run_cases(
+            lambda case: run_case(algorithm, case[1]),
+            cases,
+            skip=lambda case: not any(ta.goals.get(g, True) for g in case[0]),
+    ):
+        gs, n = result.case
+        print(f"Testing N = {n}...\t", end="")
+        if result.error is not None:
+            print(f"[WRONG: {result.error}]")
+            correct = False
+        else:
+            correct = result.value
+        if correct:
+            print("[CORRECT]")
+        else:
+            for g in gs:
+                ta.goals[g] = False
     for goal in (
         "exponential",
         "quadratic",
@@ -1,4 +1,5 @@
-from turingarena.evallib.algorithm import run_algorithm
+from turingarena.evallib.algorithm import run_algorithm, run_algorithm_async
+from turingarena.evallib.cases import run_cases
 import turingarena.evallib.evaluation as evaluation
 import turingarena.evallib.goals
 import turingarena.evallib.metadata
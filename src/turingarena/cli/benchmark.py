@@ -0,0 +1,64 @@
+import sys
+from argparse import ArgumentParser
+
+from turingarena.cli.command import Command
+from turingarena.driver.benchmark import DEFAULT_CONFIG, BenchmarkConfig, benchmark_languages, compare, \
+    format_results, load_results, save_results
+
+
+class BenchmarkCommand(Command):
+    PARSER = ArgumentParser(
+        add_help=False,
+        description="Benchmark the driver on each language",
+    )
+    PARSER.add_argument(
+        "--language",
+        help="language to benchmark (can be repeated, default: all)",
+        action="append",
+        dest="languages",
+    )
+    PARSER.add_argument("--calls", help="number of calls per run", type=int, default=DEFAULT_CONFIG.calls)
+    PARSER.add_argument("--arrays", help="number of arrays sent per run", type=int, default=DEFAULT_CONFIG.arrays)
+    PARSER.add_argument("--array-size", help="size of the arrays", type=int, default=DEFAULT_CONFIG.array_size)
+    PARSER.add_argument(
+        "--callbacks",
+        help="number of calls with a callback per run",
+        type=int,
+        default=DEFAULT_CONFIG.callbacks,
+    )
+    PARSER.add_argument("--runs", help="number of runs per language", type=int, default=DEFAULT_CONFIG.runs)
+    PARSER.add_argument("--save", help="save the results as JSON to this file")
+    PARSER.add_argument("--baseline", help="compare with the results saved in this file")
+    PARSER.add_argument(
+        "--threshold",
+        help="relative slowdown of a median reported as a regression (default: 0.2)",
+        type=float,
+        default=0.2,
+    )
+
+    def run(self):
+        config = BenchmarkConfig(
+            calls=self.args.calls,
+            arrays=self.args.arrays,
+            array_size=self.args.array_size,
+            callbacks=self.args.callbacks,
+            runs=self.args.runs,
+        )
+        baseline = load_results(self.args.baseline) if self.args.baseline else None
+
+        results = benchmark_languages(self.args.languages, config)
+        for line in format_results(results, baseline):
+            print(line)
+
+        if self.args.save:
+            save_results(results, self.args.save)
+
+        if baseline is not None:
+            regressions = compare(results, baseline, self.args.threshold)
+            for r in regressions:
+                print(f"regression: {r.language} {r.metric} {r.baseline:.3e} -> {r.current:.3e} ({r.ratio:.2f}x)")
+            if regressions:
+                sys.exit(1)
+
+
+BenchmarkCommand.PARSER.set_defaults(Command=BenchmarkCommand)
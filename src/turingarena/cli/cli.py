@@ -3,6 +3,7 @@ from argparse import ArgumentParser
 
 from turingarena.cli.base import BASE_PARSER
 from turingarena.logging_helper import init_logger
+from turingarena.cli.benchmark import BenchmarkCommand
 from turingarena.cli.evaluate import EvaluateCommand
 from turingarena.cli.file import FileCommand
 from turingarena.version import VERSION
@@ -28,6 +29,11 @@ subparsers.add_parser(
     parents=[FileCommand.PARSER, BASE_PARSER],
     help=FileCommand.PARSER.description,
 )
+subparsers.add_parser(
+    "benchmark",
+    parents=[BenchmarkCommand.PARSER, BASE_PARSER],
+    help=BenchmarkCommand.PARSER.description,
+)
 
 
 def main():
@@ -0,0 +1,332 @@
+import json
+import logging
+import math
+import os
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+from tempfile import TemporaryDirectory
+
+from turingarena.driver.cache import build_cache
+from turingarena.driver.client.program import Program
+from turingarena.driver.compile.compile import load_interface
+from turingarena.driver.language import Language
+
+BENCHMARK_INTERFACE = """
+    procedure init(n, r, k);
+    function f(x);
+    function total(m, a[]);
+    function h(x) callbacks {
+        function c(y);
+    }
+    main {
+        read n, r, k;
+        call init(n, r, k);
+        for i to n {
+            read x;
+            call y = f(x);
+            write y;
+        }
+        for i to r {
+            read m;
+            for j to m {
+                read a[j];
+            }
+            call s = total(m, a);
+            write s;
+        }
+        for i to k {
+            read x;
+            call z = h(x);
+            write z;
+        }
+    }
+"""
+
+BENCHMARK_SOURCES = {
+    "C++": """
+        void init(int n, int r, int k) {}
+        int f(int x) { return x; }
+        int total(int m, int a[]) {
+            int s = 0;
+            for (int i = 0; i < m; i++) s += a[i];
+            return s;
+        }
+        int h(int x, int c(int y)) { return c(x) + 1; }
+    """,
+    "C": """
+        void init(int n, int r, int k) {}
+        int f(int x) { return x; }
+        int total(int m, int *a) {
+            int s = 0;
+            for (int i = 0; i < m; i++) s += a[i];
+            return s;
+        }
+        int h(int x, int c(int y)) { return c(x) + 1; }
+    """,
+    "Python": """if True:
+        def init(n, r, k):
+            pass
+
+        def f(x):
+            return x
+
+        def total(m, a):
+            s = 0
+            for v in a:
+                s += v
+            return s
+
+        def h(x, c):
+            return c(x) + 1
+    """,
+    "Rust": """
+        pub fn init(_n: i64, _r: i64, _k: i64) {}
+        pub fn f(x: i64) -> i64 { x }
+        pub fn total(_m: i64, a: Vec<i64>) -> i64 { a.iter().sum() }
+        pub fn h(x: i64, c: fn(i64) -> i64) -> i64 { c(x) + 1 }
+    """,
+    "Java": """
+        class Solution extends Skeleton {
+            void init(int n, int r, int k) {}
+            int f(int x) { return x; }
+            int total(int m, int a[]) {
+                int s = 0;
+                for (int i = 0; i < m; i++) s += a[i];
+                return s;
+            }
+            int h(int x, HCallbacks callbacks) { return callbacks.c(x) + 1; }
+        }
+    """,
+}
+
+BenchmarkConfig = namedtuple("BenchmarkConfig", [
+    "calls",
+    "arrays",
+    "array_size",
+    "callbacks",
+    "runs",
+])
+
+DEFAULT_CONFIG = BenchmarkConfig(
+    calls=1000,
+    arrays=10,
+    array_size=100000,
+    callbacks=1000,
+    runs=5,
+)
+
+# metrics, with the unit of their samples
+METRICS = {
+    "compile": "s",
+    "startup": "s",
+    "call": "s",
+    "array": "s/element",
+    "callback": "s",
+}
+
+Regression = namedtuple("Regression", ["language", "metric", "baseline", "current", "ratio"])
+
+
+def percentiles(samples):
+    """
+    Summarizes the given samples with some percentiles (nearest-rank) and the mean.
+    """
+    samples = sorted(samples)
+
+    def rank(p):
+        # the smallest sample greater than or equal to at least p% of the samples
+        return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+    return dict(
+        count=len(samples),
+        mean=sum(samples) / len(samples),
+        p50=rank(50),
+        p90=rank(90),
+        p99=rank(99),
+    )
+
+
+def _timed(f, *args, **kwargs):
+    start = time.perf_counter()
+    result = f(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _run_once(algo, config, samples, cache_dir):
+    with ExitStack() as stack:
+        startup_time, p = _timed(stack.enter_context, algo.run(cache_dir=cache_dir))
+        samples["startup"].append(startup_time)
+
+        p.procedures.init(config.calls, config.arrays, config.callbacks)
+
+        for i in range(config.calls):
+            elapsed, result = _timed(p.functions.f, i)
+            assert result == i
+            samples["call"].append(elapsed)
+
+        array = [i % 100 for i in range(config.array_size)]
+        for i in range(config.arrays):
+            elapsed, result = _timed(p.functions.total, len(array), array)
+            assert result == sum(array)
+            samples["array"].append(elapsed / len(array))
+
+        for i in range(config.callbacks):
+            elapsed, result = _timed(p.functions.h, i, callbacks=[lambda y: y])
+            assert result == i + 1
+            samples["callback"].append(elapsed)
+
+
+def _build_time(algo, language, interface, cache_dir):
+    with TemporaryDirectory() as temp_dir:
+        runner = language.ProgramRunner(
+            program=algo,
+            language=language,
+            interface=interface,
+            temp_dir=temp_dir,
+            cache=build_cache(cache_dir),
+        )
+        elapsed, _ = _timed(runner.build)
+    return elapsed
+
+
+def benchmark_language(language_name, config=DEFAULT_CONFIG):
+    """
+    Runs the benchmark program of the given language, and returns the summary of each metric.
+
+    Compile time is measured by building the program alone, each time in an empty build cache
+    (which also holds the caches of compilers, such as ccache), other metrics with the program already built.
+    Builds use caches in a temporary directory, so they neither use nor fill the cache of the user.
+    """
+    samples = {metric: [] for metric in METRICS}
+
+    language = Language.from_name(language_name)
+
+    with TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, f"source{language.extension}")
+        interface_path = os.path.join(tmp_dir, "interface.txt")
+        with open(interface_path, "w") as f:
+            print(BENCHMARK_INTERFACE, file=f)
+        with open(source_path, "w") as f:
+            print(BENCHMARK_SOURCES[language.name], file=f)
+        algo = Program(source_path=source_path, interface_path=interface_path)
+        interface = load_interface(interface_path, build_cache(os.path.join(tmp_dir, "cache")))
+
+        for i in range(config.runs):
+            cache_dir = os.path.join(tmp_dir, f"cache{i}")
+            samples["compile"].append(_build_time(algo, language, interface, cache_dir))
+
+        # already built in the last cache
+        for _ in range(config.runs):
+            _run_once(algo, config, samples, cache_dir)
+
+    return {
+        metric: percentiles(metric_samples)
+        for metric, metric_samples in samples.items()
+        if metric_samples
+    }
+
+
+def _not_benchmarked_reason(language_name):
+    if any(language.name.lower() == language_name.lower() for language in Language.disabled_languages()):
+        return "language not supported"
+    try:
+        language = Language.from_name(language_name)
+    except ValueError:
+        return None  # reported as an error
+    if language.name not in BENCHMARK_SOURCES:
+        return "no benchmark program"
+    return None
+
+
+def benchmark_languages(language_names=None, config=DEFAULT_CONFIG):
+    """
+    Runs the benchmark for the given languages (by default, all of them).
+    Returns a dict: language name -> results, or -> {"error": message} if the benchmark failed,
+    or -> {"not_benchmarked": reason} if the language has no benchmark program, or is not supported.
+    """
+    if language_names is None:
+        language_names = [
+            language.name
+            for language in Language.languages() + Language.disabled_languages()
+        ]
+
+    results = {}
+    for language_name in language_names:
+        reason = _not_benchmarked_reason(language_name)
+        if reason is not None:
+            logging.warning(f"{language_name} not benchmarked: {reason}")
+            results[language_name] = {"not_benchmarked": reason}
+            continue
+
+        logging.info(f"benchmarking {language_name}...")
+        try:
+            results[language_name] = benchmark_language(language_name, config)
+        except Exception as e:
+            logging.warning(f"benchmark of {language_name} failed", exc_info=True)
+            results[language_name] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Returns the metrics whose median is worse than in the baseline by more than `threshold` (relative).
+    All the metrics are times, so higher is worse.
+    """
+    regressions = []
+    for language_name, language_results in results.items():
+        for metric, stats in language_results.items():
+            if metric not in METRICS:
+                continue
+            try:
+                baseline_value = baseline[language_name][metric]["p50"]
+            except KeyError:
+                continue
+            if baseline_value <= 0:
+                continue
+            ratio = stats["p50"] / baseline_value
+            if ratio > 1 + threshold:
+                regressions.append(Regression(language_name, metric, baseline_value, stats["p50"], ratio))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    """
+    Returns a human-readable report of the results, as a list of lines.
+    """
+    lines = []
+    for language_name, language_results in results.items():
+        lines.append(f"{language_name}:")
+        if "error" in language_results:
+            lines.append(f"    failed: {language_results['error']}")
+            continue
+        if "not_benchmarked" in language_results:
+            lines.append(f"    not benchmarked: {language_results['not_benchmarked']}")
+            continue
+        for metric, unit in METRICS.items():
+            stats = language_results.get(metric)
+            if stats is None:
+                continue
+            line = (
+                f"    {metric:10} p50 {stats['p50']:.3e} p90 {stats['p90']:.3e} p99 {stats['p99']:.3e} {unit}"
+                f" ({1 / stats['mean'] if stats['mean'] else float('inf'):.4g}/s)"
+            )
+            try:
+                baseline_value = baseline[language_name][metric]["p50"]
+            except (TypeError, KeyError):
+                pass
+            else:
+                if baseline_value > 0:
+                    line += f", {stats['p50'] / baseline_value:.2f}x baseline"
+            lines.append(line)
+    return lines
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,379 @@
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024
+
+
+def cache_key(*parts):
+    """
+    Computes a key from the given parts (strings or bytes).
+    Parts are length-prefixed, so that different splits of the same bytes give different keys.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+@lru_cache(None)
+def tool_version(*cli):
+    """
+    Returns the output of a version command (e.g., `g++ --version`), to be used as part of a cache key.
+    """
+    try:
+        p = subprocess.run(cli, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    except OSError:
+        return ""
+    return p.stdout
+
+
+def _link_or_copy_file(src, dest):
+    try:
+        os.link(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copy2(src, dest)
+
+
+def _link_or_copy(src, dest):
+    if os.path.isdir(src):
+        shutil.copytree(src, dest, copy_function=_link_or_copy_file)
+    else:
+        _link_or_copy_file(src, dest)
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _tree_size(path):
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, filename)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+def _write_size(size_path, size):
+    fd, tmp_path = tempfile.mkstemp(prefix=".size-", dir=os.path.dirname(size_path))
+    with open(fd, "w") as f:
+        f.write(str(size))
+    os.replace(tmp_path, size_path)
+
+
+def _read_size(size_path):
+    try:
+        with open(size_path) as f:
+            return int(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class BuildCache:
+    """
+    Content-addressed on-disk store of build artifacts, shared by concurrent processes.
+
+    Each entry is a directory named after its key, and contains one or more named artifacts (files or directories).
+    Entries are published with an atomic rename, and artifacts are hard-linked out of the cache,
+    so a reader gets either a complete entry or a miss, even if the entry is evicted concurrently.
+    Entries are evicted in least recently used order when the total size exceeds `max_size`.
+
+    The cache also holds the own caches of tools (e.g., the Go build cache), see `tool_directory()`,
+    which are accounted and evicted (as a whole) together with the entries.
+
+    Sizes are measured once, and recorded: when an entry is stored (in the entry itself, see ENTRY_SIZE_NAME),
+    and when a tool directory is released (next to it), so that eviction does not walk the whole cache.
+    """
+
+    # name of the file recording the size of an entry, not an artifact
+    ENTRY_SIZE_NAME = ".size"
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @property
+    def _entries_dir(self):
+        return os.path.join(self.directory, "entries")
+
+    @property
+    def _tools_dir(self):
+        return os.path.join(self.directory, "tools")
+
+    def _entry_path(self, key):
+        return os.path.join(self._entries_dir, key)
+
+    def fetch(self, key, artifacts):
+        """
+        Copies the artifacts of the entry `key` to the given paths (a dict: artifact name -> destination path).
+        Returns whether the entry was found.
+        """
+        if not self.enabled:
+            return False
+
+        entry_path = self._entry_path(key)
+        try:
+            for name, dest in artifacts.items():
+                _link_or_copy(os.path.join(entry_path, name), dest)
+        except (FileNotFoundError, shutil.Error):
+            for dest in artifacts.values():
+                _remove(dest)
+            return False
+
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+        logger.debug(f"build cache hit: {key}")
+        return True
+
+    def store(self, key, artifacts):
+        """
+        Stores the given artifacts (a dict: artifact name -> source path) as entry `key`.
+        If the entry is already present (e.g., stored concurrently by another process), does nothing.
+        """
+        if not self.enabled:
+            return
+
+        with self.staging_entry(key) as staging_path:
+            for name, src in artifacts.items():
+                _link_or_copy(src, os.path.join(staging_path, name))
+
+    @contextmanager
+    def staging_entry(self, key):
+        """
+        Gives an empty directory, where the artifacts of entry `key` are created,
+        and publishes it as the entry on exit (unless an exception is raised).
+        Only for tools that need to create artifacts in place (artifacts are normally stored),
+        which must tolerate the directory being renamed afterwards.
+        If the cache is disabled, gives None.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        os.makedirs(self._entries_dir, exist_ok=True)
+        staging_path = tempfile.mkdtemp(prefix=".staging-", dir=self._entries_dir)
+        try:
+            yield staging_path
+            _write_size(os.path.join(staging_path, self.ENTRY_SIZE_NAME), _tree_size(staging_path))
+            try:
+                os.rename(staging_path, self._entry_path(key))
+            except OSError as e:
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+                logger.debug(f"build cache entry {key} already present")
+                return
+        finally:
+            _remove(staging_path)
+
+        logger.debug(f"build cache store: {key}")
+        self.evict()
+
+    def entry_path(self, key):
+        """
+        Returns the directory of entry `key`, or None if not present.
+        Only for tools that need artifacts at a fixed path (artifacts are normally fetched),
+        which must tolerate the entry being evicted while in use.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def load_data(self, key, name):
+        """
+        Returns the content of an artifact as bytes, or None if not present.
+        """
+        if not self.enabled:
+            return None
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(os.path.join(entry_path, name), "rb") as f:
+                data = f.read()
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def store_data(self, key, name, data):
+        """
+        Stores the given bytes as a single artifact of entry `key`.
+        """
+        if not self.enabled:
+            return
+
+        os.makedirs(self._entries_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=".data-", dir=self._entries_dir)
+        try:
+            with open(fd, "wb") as f:
+                f.write(data)
+            self.store(key, {name: path})
+        finally:
+            _remove(path)
+
+    @contextmanager
+    def tool_directory(self, name):
+        """
+        Gives the directory of the own cache of a tool (e.g., the Go build cache), or None if the cache is disabled.
+        Such caches must be safe for concurrent use.
+        The directory is not evicted while in use, and its size is accounted (and the cache evicted) on exit.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        os.makedirs(self._tools_dir, exist_ok=True)
+        with open(os.path.join(self._tools_dir, f".{name}.lock"), "w") as lock:
+            # shared, eviction takes it exclusively
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            directory = os.path.join(self._tools_dir, name)
+            os.makedirs(directory, exist_ok=True)
+            try:
+                yield directory
+            finally:
+                os.utime(directory)
+                _write_size(self._tool_size_path(name), _tree_size(directory))
+        self.evict()
+
+    def _tool_size_path(self, name):
+        return os.path.join(self._tools_dir, f".{name}.size")
+
+    def _recorded_size(self, path):
+        parent, name = os.path.split(path)
+        if parent != self._tools_dir:
+            size = _read_size(os.path.join(path, self.ENTRY_SIZE_NAME))
+            # not recorded by older versions (recording it now would make the entry recently used)
+            return size if size is not None else _tree_size(path)
+
+        size_path = self._tool_size_path(name)
+        size = _read_size(size_path)
+        if size is None:
+            # in use, and never released yet: measured once
+            size = _tree_size(path)
+            _write_size(size_path, size)
+        return size
+
+    @contextmanager
+    def _lock(self):
+        with open(os.path.join(self.directory, "lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def evict(self):
+        """
+        Removes the least recently used entries (and tool directories not in use)
+        until the total size (as recorded) fits in `max_size`.
+        """
+        with self._lock():
+            entries = []
+            for parent in (self._entries_dir, self._tools_dir):
+                try:
+                    names = os.listdir(parent)
+                except FileNotFoundError:
+                    continue
+                for name in names:
+                    if name.startswith("."):
+                        continue
+                    path = os.path.join(parent, name)
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except FileNotFoundError:
+                        continue
+                    entries.append((mtime, path, self._recorded_size(path)))
+
+            total_size = sum(size for _, _, size in entries)
+            for _, path, size in sorted(entries):
+                if total_size <= self.max_size:
+                    break
+                if self._remove_entry(path):
+                    total_size -= size
+
+    def _remove_entry(self, path):
+        parent, name = os.path.split(path)
+        if parent != self._tools_dir:
+            self._move_to_trash(path)
+            return True
+
+        with open(os.path.join(parent, f".{name}.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False  # in use
+            self._move_to_trash(path)
+            _remove(self._tool_size_path(name))
+            return True
+
+    def _move_to_trash(self, path):
+        logger.debug(f"build cache evict: {os.path.basename(path)}")
+        # rename first, so that readers never see a partially removed entry
+        trash_path = tempfile.mkdtemp(prefix=".trash-", dir=os.path.dirname(path))
+        try:
+            os.rename(path, os.path.join(trash_path, "entry"))
+        except FileNotFoundError:
+            pass
+        _remove(trash_path)
+
+
+def default_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "turingarena")
+
+
+def cache_dir():
+    return os.environ.get("TURINGARENA_CACHE_DIR") or default_cache_dir()
+
+
+def build_cache(base_dir=None):
+    """
+    Returns the build cache configured by the environment,
+    in the given cache directory, if any (e.g., to benchmark builds in isolation).
+
+    TURINGARENA_CACHE_DIR sets the directory (default: $XDG_CACHE_HOME/turingarena),
+    TURINGARENA_CACHE_SIZE sets the maximum size in bytes (0 disables the cache).
+    """
+    if base_dir is None:
+        base_dir = cache_dir()
+    max_size = int(os.environ.get("TURINGARENA_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+    return BuildCache(os.path.join(base_dir, "build"), max_size=max_size)
+
+
+def tool_cache(name):
+    """
+    Returns a context manager giving a directory for the own cache of a tool (e.g., the Go build cache),
+    or None if caching is disabled (see `BuildCache.tool_directory()`).
+    """
+    return build_cache().tool_directory(name)
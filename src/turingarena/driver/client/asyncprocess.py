@@ -0,0 +1,350 @@
+import asyncio
+import inspect
+import io
+
+from turingarena.driver.client.channel import TAG_BIG_INT, TAG_FLOAT, TAG_INT, TAG_STR, _float64, _int64, _length, \
+    create_channel, is_binary_protocol
+from turingarena.driver.client.commands import DriverState
+from turingarena.driver.client.exceptions import *
+from turingarena.driver.client.process import DEFAULT_MAX_PENDING_CALLS, CallFuture, CallRequest, Process, \
+    ProcessBatch
+
+
+class AsyncChannel:
+    """
+    Channel over asyncio streams, with the protocol of a synchronous channel (see `create_channel()`).
+
+    Values are sent to a buffer, which is written to the stream when a value is received.
+    """
+
+    def __init__(self, reader, writer, protocol):
+        self._reader = reader
+        self._writer = writer
+        self._buffer = io.BytesIO() if is_binary_protocol(protocol) else io.StringIO()
+        self._channel = create_channel(protocol, input=None, output=self._buffer)
+
+    def send(self, value):
+        self._channel.send(value)
+
+    def send_data(self, value):
+        self._channel.send_data(value)
+
+    async def flush(self):
+        data = self._buffer.getvalue()
+        if not data:
+            return
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.write(data.encode() if isinstance(data, str) else data)
+        await self._writer.drain()
+
+
+class AsyncTextChannel(AsyncChannel):
+    def __init__(self, reader, writer):
+        super().__init__(reader, writer, "text")
+
+    async def _receive_line(self):
+        await self.flush()
+        line = await self._reader.readline()
+        if not line:
+            raise EOFError("channel closed")
+        return line.decode().strip()
+
+    async def receive_str(self):
+        return await self._receive_line()
+
+    async def receive_int(self):
+        return int(await self._receive_line())
+
+    async def receive_float(self):
+        return float(await self._receive_line())
+
+
+class AsyncBinaryChannel(AsyncChannel):
+    """
+    Receives the frames of `BinaryChannel` (only the ones sent by the driver).
+    """
+
+    def __init__(self, reader, writer):
+        super().__init__(reader, writer, "binary")
+
+    async def _read(self, size):
+        await self.flush()
+        try:
+            return await self._reader.readexactly(size)
+        except asyncio.IncompleteReadError:
+            raise EOFError("channel closed") from None
+
+    async def _receive_frame(self, *expected_tags):
+        tag = await self._read(1)
+        if tag not in expected_tags:
+            raise ValueError(f"unexpected frame {tag!r}, expecting one of {expected_tags!r}")
+        return tag
+
+    async def _receive_length(self):
+        [length] = _length.unpack(await self._read(_length.size))
+        return length
+
+    async def _receive_int_payload(self, tag):
+        if tag == TAG_INT:
+            [value] = _int64.unpack(await self._read(_int64.size))
+            return value
+        else:
+            return int((await self._read(await self._receive_length())).decode())
+
+    async def receive_str(self):
+        await self._receive_frame(TAG_STR)
+        return (await self._read(await self._receive_length())).decode()
+
+    async def receive_int(self):
+        return await self._receive_int_payload(await self._receive_frame(TAG_INT, TAG_BIG_INT))
+
+    async def receive_float(self):
+        tag = await self._receive_frame(TAG_FLOAT, TAG_INT, TAG_BIG_INT)
+        if tag == TAG_FLOAT:
+            [value] = _float64.unpack(await self._read(_float64.size))
+            return value
+        return float(await self._receive_int_payload(tag))
+
+
+class AsyncProcess(Process):
+    """
+    Variant of `Process` whose methods are coroutines, to drive many processes from a single event loop.
+    Calls are awaited, e.g., `await p.functions.f(x)`, and sections are async context managers.
+
+    Requests are sent as in `Process`, only the methods that wait for the driver are redefined.
+    Callbacks may be plain functions or coroutine functions.
+    The connection is made of an asyncio StreamReader (upward) and StreamWriter (downward).
+    """
+
+    @staticmethod
+    def _create_channel(connection, protocol):
+        channel_class = AsyncBinaryChannel if is_binary_protocol(protocol) else AsyncTextChannel
+        return channel_class(reader=connection.upward, writer=connection.downward)
+
+    def section(self, time_limit=None, memory_limit=None):
+        return AsyncSectionContext(self, time_limit, memory_limit)
+
+    def batch(self, max_pending=DEFAULT_MAX_PENDING_CALLS):
+        """
+        Same as `Process.batch()`, as an async context manager (see `AsyncProcessBatch`).
+        """
+        return AsyncBatchContext(self, max_pending)
+
+    async def call(self, method_name, *args, has_return_value, callbacks=None):
+        if callbacks is None:
+            callbacks = {}
+
+        request = CallRequest(
+            method_name=method_name,
+            arguments=args,
+            has_return_value=has_return_value,
+            callbacks=callbacks,
+        )
+        self._send_call(request)
+        return await self._receive_call_response(request)
+
+    async def _receive_call_response(self, request):
+        await self._accept_callbacks(request.callbacks)
+
+        if request.has_return_value:
+            await self._wait_ready()
+            return await self._get_response_value()
+        else:
+            return None
+
+    async def checkpoint(self):
+        self._send_request_line("checkpoint")
+        await self._wait_ready()
+
+    @property
+    def current_memory_usage(self):
+        # a property cannot wait for the driver, see `update_resource_usage()`
+        return self._latest_resource_usage.current_memory_usage
+
+    async def update_resource_usage(self):
+        return await self._update_resource_usage()
+
+    async def limit_memory(self, memory_limit):
+        await self._update_resource_usage()
+        super().limit_memory(memory_limit)
+
+    async def _start(self, **kwargs):
+        await self.checkpoint()
+        self._main_section_context = self.section(**kwargs)
+        self._main_section = await self._main_section_context.__aenter__()
+
+    async def _finish(self, exc_type, exc_value, traceback):
+        """
+        Same as the exit of `Process._run()`. Returns whether the exception is suppressed.
+        """
+        try:
+            if exc_type is not None and issubclass(exc_type, InterfaceExit):
+                exc_type = exc_value = traceback = None
+            await self._main_section_context.__aexit__(exc_type, exc_value, traceback)
+            if exc_type is None:
+                self._send_exit()
+        except ProcessStop:
+            pass
+        else:
+            if exc_type is not None and not issubclass(exc_type, ProcessStop):
+                return False
+        finally:
+            await self._send_stop()
+        return True
+
+    async def _update_resource_usage(self, stop=False):
+        if self._resource_usage_up_to_date(stop):
+            return self._latest_resource_usage
+
+        self._send_request_line("resource_usage")
+        self._send_request_line(int(stop))
+        self._resource_usage_outdated = False
+        self._resource_usage_consistent = stop
+        while True:
+            state = DriverState(await self._get_response_value())
+            if state is DriverState.RESOURCE_USAGE:
+                await self._on_resource_usage()
+                return self._latest_resource_usage
+            await self._on_state(state)
+
+    async def _on_resource_usage(self):
+        self._set_resource_usage(
+            time_usage=await self._channel.receive_float(),
+            peak_memory_usage=await self._channel.receive_int(),
+            current_memory_usage=await self._channel.receive_int(),
+        )
+
+    async def _send_stop(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        self._send_request_line("stop")
+        await self._wait_ready()
+
+    async def _accept_callbacks(self, callback_list):
+        while True:
+            await self._wait_ready()
+            response = await self._get_response_value()
+            if response == 1:  # has callback
+                index = await self._get_response_value()
+                callback = callback_list[index]
+                args = [
+                    int(await self._get_response_value())
+                    for _ in range(callback.__code__.co_argcount)
+                ]
+                return_value = callback(*args)
+                if inspect.isawaitable(return_value):
+                    return_value = await return_value
+                self._on_callback_return(return_value)
+            elif response == 0:  # no callbacks
+                break
+            else:  # error
+                await self._raise_error()
+
+    async def _get_response_value(self):
+        return await self._channel.receive_int()
+
+    async def _raise_error(self, exc_type=AlgorithmRuntimeError):
+        message = await self._channel.receive_str()
+        # the driver terminates after reporting an error
+        self._stopped = True
+        self.fail(message, exc_type=exc_type)
+
+    async def _wait_ready(self):
+        while True:
+            state = DriverState(await self._get_response_value())
+            if state is DriverState.READY:
+                break
+            if state is DriverState.RESOURCE_USAGE:
+                await self._on_resource_usage()
+            await self._on_state(state)
+
+    async def _on_state(self, state):
+        if state is DriverState.ERROR:
+            await self._raise_error()
+        if state is DriverState.TIME_LIMIT_EXCEEDED:
+            await self._raise_error(TimeLimitExceeded)
+
+
+class AsyncSectionContext:
+    """
+    Same as `Process.section()`, as an async context manager.
+    """
+
+    def __init__(self, process, time_limit, memory_limit):
+        self._process = process
+        self._time_limit = time_limit
+        self._memory_limit = memory_limit
+        self._section = None
+
+    async def __aenter__(self):
+        await self._process._update_resource_usage(stop=True)
+        self._section = self._process._open_section(self._time_limit, self._memory_limit)
+        return self._section
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                await self._process._update_resource_usage(stop=True)
+        finally:
+            self._process._close_section(self._section)
+        if exc_type is None:
+            self._process._check_section(self._section)
+        return False
+
+
+class AsyncCallFuture(CallFuture):
+    async def result(self):
+        if not self._done:
+            await self._batch.flush()
+        if self._exception is not None:
+            raise self._exception
+        return self._value
+
+
+class AsyncProcessBatch(ProcessBatch):
+    """
+    Same as `ProcessBatch`, for `AsyncProcess`.
+
+    Calls are coroutines too, which return a future once the call is queued
+    (flushing the batch, if `max_pending` calls are queued),
+    and the result of a future is awaited, e.g., `await (await batch.functions.f(x)).result()`.
+    """
+
+    async def call(self, method_name, *args, has_return_value, callbacks=None):
+        future = self._queue(AsyncCallFuture, method_name, args, has_return_value, callbacks)
+        if len(self._pending) >= self._max_pending:
+            await self.flush()
+        return future
+
+    async def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        for future in pending:
+            self._process._send_call(future.request)
+
+        for i, future in enumerate(pending):
+            try:
+                future._set_result(await self._process._receive_call_response(future.request))
+            except BaseException as e:
+                for f in pending[i:]:
+                    f._set_exception(e)
+                raise
+
+
+class AsyncBatchContext:
+    def __init__(self, process, max_pending):
+        self._batch = AsyncProcessBatch(process, max_pending)
+
+    async def __aenter__(self):
+        return self._batch
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self._batch.flush()
+        else:
+            self._batch._fail_pending(exc_value)
+        return False
@@ -0,0 +1,254 @@
+import numbers
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from turingarena.driver.client.commands import MetaType, as_buffer, deserialize_data, get_meta_type, serialize_data
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+class TextChannel(namedtuple("TextChannel", ["input", "output"])):
+    """
+    Exchanges values between the client and the driver as lines of text, one value per line.
+    """
+
+    __slots__ = []
+
+    def send(self, value):
+        if isinstance(value, bool):
+            value = int(value)
+        print(value, file=self.output)
+
+    def send_data(self, value):
+        for line in serialize_data(value):
+            print(line, file=self.output)
+
+    def flush(self):
+        self.output.flush()
+
+    def _receive_line(self):
+        self.flush()
+        line = self.input.readline()
+        if not line:
+            raise EOFError("channel closed")
+        return line.strip()
+
+    def receive_str(self):
+        return self._receive_line()
+
+    def receive_int(self):
+        return int(self._receive_line())
+
+    def receive_float(self):
+        return float(self._receive_line())
+
+    def receive_data(self):
+        deserializer = deserialize_data()
+        next(deserializer)
+        try:
+            while True:
+                deserializer.send(self._receive_line())
+        except StopIteration as e:
+            return e.value
+
+
+# frame tags of the binary channel
+TAG_INT = b"i"
+TAG_BIG_INT = b"n"
+TAG_FLOAT = b"f"
+TAG_STR = b"s"
+TAG_INT_ARRAY = b"a"
+TAG_INT_TENSOR = b"t"
+TAG_LIST = b"l"
+
+_int64 = struct.Struct("<q")
+_float64 = struct.Struct("<d")
+_length = struct.Struct("<Q")
+
+_NATIVE_BYTE_ORDER_PREFIXES = "@=" + ("<" if sys.byteorder == "little" else ">")
+# integer formats whose items fit in int64, except for 8-byte unsigned ones
+_INTEGER_FORMATS = set("?bBhHiIlLqn")
+
+
+def _pack_int64(view):
+    """
+    Returns the items of a buffer of integers as a contiguous buffer of native int64, in C order,
+    or None if the buffer cannot be converted without going through Python objects.
+    """
+    if view.ndim == 0:
+        return None
+
+    item_format = view.format.lstrip(_NATIVE_BYTE_ORDER_PREFIXES)
+    if len(item_format) != 1:
+        return None
+
+    if item_format in "lq" and view.itemsize == 8 and view.c_contiguous:
+        return view.cast("B")
+
+    if item_format in _INTEGER_FORMATS and numpy is not None:
+        if item_format in "LQ" and view.itemsize == 8:
+            return None  # may not fit in int64
+        packed = numpy.ascontiguousarray(view, dtype=numpy.int64)
+        return memoryview(packed).cast("B")
+
+    return None
+
+
+def _unflatten(items, shape):
+    if len(shape) == 1:
+        return items
+    step = len(items) // shape[0] if shape[0] else 0
+    return [
+        _unflatten(items[i * step:(i + 1) * step], shape[1:])
+        for i in range(shape[0])
+    ]
+
+
+class BinaryChannel(namedtuple("BinaryChannel", ["input", "output"])):
+    """
+    Exchanges values between the client and the driver as binary frames (a one-byte tag, then the payload).
+
+    Arrays of integers are sent as packed int64 buffers (in native byte order, since both ends run on the same host),
+    nested arrays as a length followed by the frames of the items.
+    Buffers of integers of any dimension (e.g., NumPy arrays) are sent as a shape followed by the packed items,
+    and received as nested lists of `array.array` rows, so that items are never converted to Python objects.
+    Input and output must be binary files.
+    """
+
+    __slots__ = []
+
+    def send(self, value):
+        if isinstance(value, str):
+            data = value.encode()
+            self.output.write(TAG_STR + _length.pack(len(data)) + data)
+        elif isinstance(value, numbers.Integral):
+            self._send_int(int(value))
+        elif isinstance(value, numbers.Real):
+            self.output.write(TAG_FLOAT + _float64.pack(value))
+        else:
+            raise TypeError(f"unsupported type for value: {value!r}")
+
+    def _send_int(self, value):
+        if INT64_MIN <= value <= INT64_MAX:
+            self.output.write(TAG_INT + _int64.pack(value))
+        else:
+            data = str(value).encode()
+            self.output.write(TAG_BIG_INT + _length.pack(len(data)) + data)
+
+    def send_data(self, value):
+        meta_type = get_meta_type(value)
+        if meta_type is MetaType.SCALAR:
+            self._send_int(int(value))
+            return
+
+        view = as_buffer(value)
+        if view is not None:
+            packed = _pack_int64(view)
+            if packed is not None:
+                self.output.write(TAG_INT_TENSOR + _length.pack(view.ndim))
+                self.output.write(b"".join(_length.pack(d) for d in view.shape))
+                self.output.write(packed)
+                return
+            try:
+                value = view.tolist()
+            except NotImplementedError:  # format not supported by memoryview
+                pass
+
+        items = list(value)
+        try:
+            packed = array("q", items)
+        except (TypeError, OverflowError):
+            self.output.write(TAG_LIST + _length.pack(len(items)))
+            for item in items:
+                self.send_data(item)
+        else:
+            self.output.write(TAG_INT_ARRAY + _length.pack(len(items)))
+            self.output.write(packed.tobytes())
+
+    def flush(self):
+        self.output.flush()
+
+    def _read(self, size):
+        data = self.input.read(size)
+        if len(data) < size:
+            raise EOFError("channel closed")
+        return data
+
+    def _receive_frame(self, *expected_tags):
+        self.flush()
+        tag = self._read(1)
+        if tag not in expected_tags:
+            raise ValueError(f"unexpected frame {tag!r}, expecting one of {expected_tags!r}")
+        return tag
+
+    def _receive_length(self):
+        [length] = _length.unpack(self._read(_length.size))
+        return length
+
+    def _receive_int_payload(self, tag):
+        if tag == TAG_INT:
+            [value] = _int64.unpack(self._read(_int64.size))
+            return value
+        else:
+            return int(self._read(self._receive_length()).decode())
+
+    def _receive_int64_items(self, size):
+        items = array("q")
+        items.frombytes(self._read(size * items.itemsize))
+        return items
+
+    def receive_str(self):
+        self._receive_frame(TAG_STR)
+        return self._read(self._receive_length()).decode()
+
+    def receive_int(self):
+        return self._receive_int_payload(self._receive_frame(TAG_INT, TAG_BIG_INT))
+
+    def receive_float(self):
+        tag = self._receive_frame(TAG_FLOAT, TAG_INT, TAG_BIG_INT)
+        if tag == TAG_FLOAT:
+            [value] = _float64.unpack(self._read(_float64.size))
+            return value
+        return float(self._receive_int_payload(tag))
+
+    def receive_data(self):
+        tag = self._receive_frame(TAG_INT, TAG_BIG_INT, TAG_INT_ARRAY, TAG_INT_TENSOR, TAG_LIST)
+        if tag == TAG_INT_ARRAY:
+            return self._receive_int64_items(self._receive_length())
+        if tag == TAG_INT_TENSOR:
+            ndim = self._receive_length()
+            shape = [self._receive_length() for _ in range(ndim)]
+            size = 1
+            for d in shape:
+                size *= d
+            return _unflatten(self._receive_int64_items(size), shape)
+        if tag == TAG_LIST:
+            size = self._receive_length()
+            return [self.receive_data() for _ in range(size)]
+        return self._receive_int_payload(tag)
+
+
+PROTOCOLS = {
+    "text": TextChannel,
+    "binary": BinaryChannel,
+}
+
+
+def create_channel(protocol, input, output):
+    try:
+        channel_class = PROTOCOLS[protocol]
+    except KeyError:
+        raise ValueError(f"unknown driver protocol '{protocol}'") from None
+    return channel_class(input, output)
+
+
+def is_binary_protocol(protocol):
+    return PROTOCOLS[protocol] is BinaryChannel
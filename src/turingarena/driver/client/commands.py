@@ -1,4 +1,4 @@
-import collections
+import collections.abc
 import logging
 import numbers
 from enum import IntEnum
@@ -10,6 +10,7 @@ class DriverState(IntEnum):
     READY = 0
     RESOURCE_USAGE = 1
     ERROR = -1
+    TIME_LIMIT_EXCEEDED = -2
 
 
 class MetaType(IntEnum):
@@ -17,8 +18,21 @@ class MetaType(IntEnum):
     ARRAY = 1
 
 
+def as_buffer(value):
+    """
+    Returns a memoryview of the given value, if it supports the buffer protocol
+    (e.g., NumPy arrays, array.array, memoryview), otherwise None.
+    """
+    if isinstance(value, (str, numbers.Integral)):
+        return None
+    try:
+        return memoryview(value)
+    except TypeError:
+        return None
+
+
 def get_meta_type(value):
-    if isinstance(value, collections.Iterable):
+    if isinstance(value, collections.abc.Iterable):
         return MetaType.ARRAY
     if isinstance(value, numbers.Integral):
         return MetaType.SCALAR
@@ -29,6 +43,13 @@ def serialize_data(value):
     meta_type = get_meta_type(value)
     yield meta_type.value
     if meta_type is MetaType.ARRAY:
+        view = as_buffer(value)
+        if view is not None:
+            try:
+                # converts all the items at once, without going through each nesting level
+                value = view.tolist()
+            except NotImplementedError:  # format not supported by memoryview
+                pass
         items = list(value)
         yield len(items)
         for item in items:
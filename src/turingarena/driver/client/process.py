@@ -3,16 +3,25 @@ import math
 from collections import namedtuple
 from contextlib import contextmanager
 
-from turingarena.driver.client.commands import DriverState, serialize_data
+from turingarena.driver.client.channel import create_channel
+from turingarena.driver.client.commands import DriverState
 from turingarena.driver.client.exceptions import *
 from turingarena.driver.client.processinfo import SandboxProcessInfo
 from turingarena.driver.client.proxy import MethodProxy
 
+# the driver writes the responses of pending calls while the client is still sending requests,
+# so their number is bounded, to avoid filling the upward pipe while the client is blocked writing
+DEFAULT_MAX_PENDING_CALLS = 256
+
 
 class ProcessSection:
     def __init__(self):
         self._time_usage = None
         self._peak_memory_usage = 0
+        self._time_limit = math.inf
+        self._memory_limit = math.inf
+        self._time_usage_before = None
+        self._time_limit_deadline = math.inf
 
     @property
     def time_usage(self):
@@ -24,48 +33,68 @@ class ProcessSection:
 
 
 class Process:
-    def __init__(self, connection):
+    def __init__(self, connection, protocol="text"):
         self._connection = connection
+        self._channel = self._create_channel(connection, protocol)
 
         self.procedures = MethodProxy(self, has_return_value=False)
         self.functions = MethodProxy(self, has_return_value=True)
 
         self._latest_resource_usage = None
+        self._resource_usage_outdated = True
+        # whether the latest resource usage was taken with the process stopped
+        self._resource_usage_consistent = False
+        self._stopped = False
+        self._armed_time_limit = math.inf
 
         self._main_section = ProcessSection()
         self._running_sections = set()
 
+    @staticmethod
+    def _create_channel(connection, protocol):
+        return create_channel(protocol, input=connection.upward, output=connection.downward)
+
     @contextmanager
     def section(self, time_limit=None, memory_limit=None):
-        if time_limit is None:
-            time_limit = math.inf
-        if memory_limit is None:
-            memory_limit = math.inf
+        self._update_resource_usage(stop=True)
+        section = self._open_section(time_limit, memory_limit)
+        try:
+            yield section
+            self._update_resource_usage(stop=True)
+        finally:
+            self._close_section(section)
+        self._check_section(section)
 
+    def _open_section(self, time_limit, memory_limit):
         section = ProcessSection()
+        section._time_limit = math.inf if time_limit is None else time_limit
+        section._memory_limit = math.inf if memory_limit is None else memory_limit
+        section._time_usage_before = self._latest_resource_usage.time_usage
+        section._time_limit_deadline = section._time_usage_before + section._time_limit
 
         self._running_sections.add(section)
+        self._arm_time_limit()
+        return section
 
-        time_usage_before = self._latest_resource_usage.time_usage
-        try:
-            yield section
-        finally:
-            self._running_sections.remove(section)
-        time_usage_after = self._latest_resource_usage.time_usage
+    def _close_section(self, section):
+        self._running_sections.remove(section)
+        if not self._stopped:
+            self._arm_time_limit()
 
-        section._time_usage = time_usage_after - time_usage_before
+    def _check_section(self, section):
+        section._time_usage = self._latest_resource_usage.time_usage - section._time_usage_before
 
         logging.debug(f"Section usage - time: {section._time_usage:2.3}, memory: {section.peak_memory_usage:9}")
 
         self.check(
-            section.time_usage <= time_limit,
-            f"time usage: {section.time_usage:.6f}s > {time_limit:.6f}s",
+            section.time_usage <= section._time_limit,
+            f"time usage: {section.time_usage:.6f}s > {section._time_limit:.6f}s",
             exc_type=TimeLimitExceeded,
         )
 
         self.check(
-            section.peak_memory_usage <= memory_limit,
-            f"peak memory usage: {section.peak_memory_usage / 1024} kB > {memory_limit / 1024} kB",
+            section.peak_memory_usage <= section._memory_limit,
+            f"peak memory usage: {section.peak_memory_usage / 1024} kB > {section._memory_limit / 1024} kB",
             exc_type=MemoryLimitExceeded,
         )
 
@@ -91,14 +120,14 @@ class Process:
     @contextmanager
     def _do_run(self, **kwargs):
         self.checkpoint()
-        assert self._latest_resource_usage is not None
         with self.section(**kwargs) as main_section:
             self._main_section = main_section
             try:
                 yield self
-                self._send_exit()
             except InterfaceExit:
-                self._send_exit()
+                pass
+        # exit only after the usage of the main section is measured, so that it does not include process termination
+        self._send_exit()
 
     @contextmanager
     def _run(self, **kwargs):
@@ -115,6 +144,8 @@ class Process:
 
     @property
     def current_memory_usage(self):
+        if not self._stopped:
+            self._update_resource_usage()
         return self._latest_resource_usage.current_memory_usage
 
     @property
@@ -132,11 +163,65 @@ class Process:
             exc_type=MemoryLimitExceeded,
         )
 
+    def _arm_time_limit(self):
+        """
+        Tells the driver to kill the process as soon as its CPU time exceeds the limit of any running section.
+        """
+        time_limit = min(
+            (section._time_limit_deadline for section in self._running_sections),
+            default=math.inf,
+        )
+        if time_limit == self._armed_time_limit:
+            return
+        self._armed_time_limit = time_limit
+
+        # arming the timer does not affect the resource usage
+        outdated = self._resource_usage_outdated
+        self._send_request_line("time_limit")
+        # a negative limit disarms the timer
+        self._send_request_line(time_limit if time_limit < math.inf else -1.0)
+        self._resource_usage_outdated = outdated
+
+    def _resource_usage_up_to_date(self, stop):
+        if self._stopped:
+            # the driver already terminated
+            return True
+        # nothing was sent to the process since the last update (taken with the process stopped, if needed)
+        return not self._resource_usage_outdated and (self._resource_usage_consistent or not stop)
+
+    def _update_resource_usage(self, stop=False):
+        """
+        Asks the driver for the current resource usage of the process.
+        The driver does not report it after each call, only when requested.
+        If `stop` is true, the process is stopped to take a consistent snapshot (as needed on section boundaries),
+        otherwise the usage is read while the process runs, which is cheaper.
+        """
+        if self._resource_usage_up_to_date(stop):
+            return self._latest_resource_usage
+
+        self._send_request_line("resource_usage")
+        self._send_request_line(int(stop))
+        self._resource_usage_outdated = False
+        self._resource_usage_consistent = stop
+        while True:
+            state = DriverState(self._get_response_value())
+            if state is DriverState.RESOURCE_USAGE:
+                self._on_resource_usage()
+                return self._latest_resource_usage
+            if state is DriverState.ERROR:
+                self._raise_error()
+            if state is DriverState.TIME_LIMIT_EXCEEDED:
+                self._raise_error(TimeLimitExceeded)
+            # READY states sent before the request was processed (e.g., after exit) carry no information
+
     def _on_resource_usage(self):
-        time_usage = float(self._get_response_line())
-        peak_memory_usage = int(self._get_response_line())
-        current_memory_usage = int(self._get_response_line())
+        self._set_resource_usage(
+            time_usage=self._channel.receive_float(),
+            peak_memory_usage=self._channel.receive_int(),
+            current_memory_usage=self._channel.receive_int(),
+        )
 
+    def _set_resource_usage(self, time_usage, peak_memory_usage, current_memory_usage):
         resource_usage = SandboxProcessInfo(
             time_usage=time_usage,
             peak_memory_usage=peak_memory_usage,
@@ -152,10 +237,31 @@ class Process:
                 resource_usage.peak_memory_usage
             )
 
+    @contextmanager
+    def batch(self, max_pending=DEFAULT_MAX_PENDING_CALLS):
+        """
+        Queues calls and sends them to the driver together, without waiting for each response.
+
+        Calls made through the `procedures` and `functions` of the batch return futures,
+        which are resolved when the batch is flushed (on exit, when `max_pending` calls are queued,
+        or when the result of a pending call is requested).
+        Calls in a batch cannot have callbacks.
+        If the body raises, the queued calls are not sent, and their futures fail with the exception.
+        """
+        batch = ProcessBatch(self, max_pending)
+        try:
+            yield batch
+        except BaseException as e:
+            batch._fail_pending(e)
+            raise
+        finally:
+            batch.flush()
+
     def _do_call(self, request):
-        for line in self._call_lines(request):
-            self._send_request_line(line)
+        self._send_call(request)
+        return self._receive_call_response(request)
 
+    def _receive_call_response(self, request):
         self._accept_callbacks(request.callbacks)
 
         if request.has_return_value:
@@ -175,10 +281,15 @@ class Process:
         self._wait_ready()
 
     def _send_stop(self):
+        if self._stopped:
+            return
+        self._stopped = True
         self._send_request_line("stop")
         self._wait_ready()
 
     def _send_exit(self):
+        if self._stopped:
+            return
         self._send_request_line("exit")
 
     def _accept_callbacks(self, callback_list):
@@ -207,18 +318,14 @@ class Process:
         else:
             self._send_request_line(0)
 
-    def _get_response_line(self):
-        self._connection.downward.flush()
-        line = self._connection.upward.readline().strip()
-        assert line, "no line received from driver"
-        return line
-
     def _get_response_value(self):
-        return int(self._get_response_line())
+        return self._channel.receive_int()
 
-    def _raise_error(self):
-        message = self._get_response_line()
-        self.fail(message, exc_type=AlgorithmRuntimeError)
+    def _raise_error(self, exc_type=AlgorithmRuntimeError):
+        message = self._channel.receive_str()
+        # the driver terminates after reporting an error
+        self._stopped = True
+        self.fail(message, exc_type=exc_type)
 
     def _wait_ready(self):
         while True:
@@ -229,20 +336,107 @@ class Process:
                 self._on_resource_usage()
             if state is DriverState.ERROR:
                 self._raise_error()
+            if state is DriverState.TIME_LIMIT_EXCEEDED:
+                self._raise_error(TimeLimitExceeded)
 
-    def _call_lines(self, request):
-        yield "call"
-        yield request.method_name
-        yield len(request.arguments)
+    def _send_call(self, request):
+        self._send_request_line("call")
+        self._send_request_line(request.method_name)
+        self._send_request_line(len(request.arguments))
         for a in request.arguments:
-            yield from serialize_data(a)
-        yield int(request.has_return_value)
-        yield len(request.callbacks)
+            self._channel.send_data(a)
+        self._send_request_line(int(request.has_return_value))
+        self._send_request_line(len(request.callbacks))
         for c in request.callbacks:
-            yield c.__code__.co_argcount
+            self._send_request_line(c.__code__.co_argcount)
 
     def _send_request_line(self, line):
-        print(line, file=self._connection.downward)
+        self._resource_usage_outdated = True
+        self._channel.send(line)
 
 
 CallRequest = namedtuple("CallRequest", ["method_name", "arguments", "has_return_value", "callbacks"])
+
+
+class CallFuture:
+    def __init__(self, batch, request):
+        self._batch = batch
+        self.request = request
+        self._done = False
+        self._value = None
+        self._exception = None
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        if not self._done:
+            self._batch.flush()
+        if self._exception is not None:
+            raise self._exception
+        return self._value
+
+    def _set_result(self, value):
+        self._done = True
+        self._value = value
+
+    def _set_exception(self, exception):
+        self._done = True
+        self._exception = exception
+
+
+class ProcessBatch:
+    def __init__(self, process, max_pending):
+        self._process = process
+        self._max_pending = max_pending
+        self._pending = []
+
+        self.procedures = MethodProxy(self, has_return_value=False)
+        self.functions = MethodProxy(self, has_return_value=True)
+
+    def call(self, method_name, *args, has_return_value, callbacks=None):
+        future = self._queue(CallFuture, method_name, args, has_return_value, callbacks)
+        if len(self._pending) >= self._max_pending:
+            self.flush()
+        return future
+
+    def _queue(self, future_class, method_name, args, has_return_value, callbacks):
+        if callbacks:
+            raise ValueError(f"call to '{method_name}' in a batch cannot have callbacks")
+
+        future = future_class(self, CallRequest(
+            method_name=method_name,
+            arguments=args,
+            has_return_value=has_return_value,
+            callbacks={},
+        ))
+        self._pending.append(future)
+        return future
+
+    def _fail_pending(self, exception):
+        """
+        Fails the calls not sent yet, with the given exception.
+        """
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future._set_exception(exception)
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        try:
+            for future in pending:
+                self._process._send_call(future.request)
+        except BrokenPipeError:
+            # the driver stopped, the reason is reported in the responses
+            pass
+
+        for i, future in enumerate(pending):
+            try:
+                future._set_result(self._process._receive_call_response(future.request))
+            except BaseException as e:
+                for f in pending[i:]:
+                    f._set_exception(e)
+                raise
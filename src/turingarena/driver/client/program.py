@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import subprocess
@@ -5,6 +6,8 @@ import threading
 from collections import namedtuple
 from contextlib import ExitStack, contextmanager
 
+from turingarena.driver.client.asyncprocess import AsyncProcess
+from turingarena.driver.client.channel import is_binary_protocol
 from turingarena.driver.client.connection import DriverProcessConnection
 from turingarena.driver.client.exceptions import InterfaceExit
 from turingarena.driver.client.process import Process
@@ -13,35 +16,47 @@ from turingarena.driver.client.process import Process
 class Program(namedtuple("Program", [
     "source_path", "interface_path",
 ])):
-    def _open_pipes(self, stack: ExitStack):
+    def _open_pipes(self, stack: ExitStack, protocol):
+        modes = ("rb", "wb") if is_binary_protocol(protocol) else ("r", "w")
         return [
             stack.enter_context(open(fd, mode))
-            for fd, mode in zip(os.pipe(), ("r", "w"))
+            for fd, mode in zip(os.pipe(), modes)
         ]
 
+    def _start_server_thread(self, server_upward, server_downward, downward_tee, upward_tee, protocol, cache_dir=None):
+        """
+        Runs the driver server in a thread, on the given (server side) pipes, which are closed on termination.
+        """
+
+        def server_thread():
+            try:
+                from turingarena.driver.server import run_server
+                run_server(DriverProcessConnection(
+                    upward=server_upward,
+                    downward=server_downward,
+                ), self.source_path, self.interface_path, downward_tee=downward_tee, upward_tee=upward_tee,
+                    protocol=protocol, cache_dir=cache_dir)
+
+                logging.debug("driver server terminated")
+            except Exception as e:
+                logging.exception(f"server terminated with exception")
+            finally:
+                server_upward.close()
+                server_downward.close()
+
+        thread = threading.Thread(target=server_thread)
+        thread.start()
+        return thread
+
     @contextmanager
-    def _run_server_in_thread(self, downward_tee, upward_tee):
+    def _run_server_in_thread(self, downward_tee, upward_tee, protocol, cache_dir):
         with ExitStack() as stack:
-            client_upward, server_upward = self._open_pipes(stack)
-            server_downward, client_downward = self._open_pipes(stack)
-
-            def server_thread():
-                try:
-                    from turingarena.driver.server import run_server
-                    run_server(DriverProcessConnection(
-                        upward=server_upward,
-                        downward=server_downward,
-                    ), self.source_path, self.interface_path, downward_tee=downward_tee, upward_tee=upward_tee)
-
-                    logging.debug("driver server terminated")
-                except Exception as e:
-                    logging.exception(f"server terminated with exception")
-                finally:
-                    server_upward.close()
-                    server_downward.close()
-
-            thread = threading.Thread(target=server_thread)
-            thread.start()
+            client_upward, server_upward = self._open_pipes(stack, protocol)
+            server_downward, client_downward = self._open_pipes(stack, protocol)
+
+            thread = self._start_server_thread(
+                server_upward, server_downward, downward_tee, upward_tee, protocol, cache_dir,
+            )
 
             yield DriverProcessConnection(
                 upward=client_upward,
@@ -50,21 +65,25 @@ class Program(namedtuple("Program", [
 
             stack.callback(thread.join)
 
+    def _server_command(self, downward_tee, upward_tee, protocol):
+        return [
+            "python3",
+            "-m",
+            "turingarena.driver.server",
+            self.source_path,
+            self.interface_path,
+            downward_tee,
+            upward_tee,
+            protocol,
+        ]
+
     @contextmanager
-    def _run_server_in_process(self, downward_tee, upward_tee):
+    def _run_server_in_process(self, downward_tee, upward_tee, protocol):
         with subprocess.Popen(
-                [
-                    "python3",
-                    "-m",
-                    "turingarena.driver.server",
-                    self.source_path,
-                    self.interface_path,
-                    downward_tee,
-                    upward_tee,
-                ],
+                self._server_command(downward_tee, upward_tee, protocol),
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                universal_newlines=True,
+                universal_newlines=not is_binary_protocol(protocol),
         ) as p:
             yield DriverProcessConnection(
                 downward=p.stdin,
@@ -72,10 +91,155 @@ class Program(namedtuple("Program", [
             )
 
     @contextmanager
-    def run(self, downward_tee="/dev/null", upward_tee="/dev/null", **kwargs):
+    def run(self, downward_tee="/dev/null", upward_tee="/dev/null", protocol="text", cache_dir=None, **kwargs):
+        """
+        Runs the program, and yields a Process to interact with it.
+
+        `protocol` selects how the client and the driver exchange data:
+        "text" (one value per line) or "binary" (framed values, with arrays as packed int64 buffers).
+        `cache_dir` overrides the cache directory of the build (see `build_cache()`).
+        """
         with ExitStack() as stack:
-            driver_connection = stack.enter_context(self._run_server_in_thread(downward_tee, upward_tee))
+            driver_connection = stack.enter_context(
+                self._run_server_in_thread(downward_tee, upward_tee, protocol, cache_dir)
+            )
 
-            process = Process(driver_connection)
+            process = Process(driver_connection, protocol=protocol)
             with process._run(**kwargs):
                 yield process
+
+    def run_async(self, downward_tee="/dev/null", upward_tee="/dev/null", protocol="text", driver="process",
+                  **kwargs):
+        """
+        Runs the program, and returns an async context manager yielding an AsyncProcess to interact with it, e.g.:
+
+            async with program.run_async() as p:
+                y = await p.functions.f(x)
+
+        The client side is asynchronous: the event loop multiplexes the pipes to the drivers,
+        so that many programs can be interacted with concurrently from a single thread.
+        The driver itself (the `Executor`) is synchronous, so each program still needs its own driver,
+        which `driver` selects:
+
+        - "process" (default): a `python3 -m turingarena.driver.server` subprocess,
+          so drivers run in parallel, without competing for the GIL with each other or with the evaluator,
+          at the cost of starting an interpreter for each run;
+        - "thread": a thread of the calling process, as for `run()`, which starts faster,
+          but all the drivers (and the evaluator) share the GIL.
+        """
+        if driver not in ("process", "thread"):
+            raise ValueError(f"unknown driver mode: {driver!r}")
+        return AsyncProgramRun(self, downward_tee, upward_tee, protocol, driver, kwargs)
+
+
+class AsyncProgramRun:
+    def __init__(self, program, downward_tee, upward_tee, protocol, driver, kwargs):
+        self._program = program
+        self._downward_tee = downward_tee
+        self._upward_tee = upward_tee
+        self._protocol = protocol
+        self._driver = driver
+        self._kwargs = kwargs
+        self._server_thread = None
+        self._server_process = None
+        self._transports = []
+        self._process = None
+
+    async def _start_server(self):
+        if self._driver == "process":
+            return await self._start_server_process()
+        else:
+            return await self._start_server_thread()
+
+    async def _start_server_process(self):
+        self._server_process = await asyncio.create_subprocess_exec(
+            *self._program._server_command(self._downward_tee, self._upward_tee, self._protocol),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        return DriverProcessConnection(
+            downward=self._server_process.stdin,
+            upward=self._server_process.stdout,
+        )
+
+    async def _start_server_thread(self):
+        loop = asyncio.get_event_loop()
+        read_mode, write_mode = ("rb", "wb") if is_binary_protocol(self._protocol) else ("r", "w")
+
+        with ExitStack() as stack:
+            upward_read_fd, upward_write_fd = os.pipe()
+            downward_read_fd, downward_write_fd = os.pipe()
+            # the client side is read and written as bytes by the event loop
+            client_upward = stack.enter_context(open(upward_read_fd, "rb", buffering=0))
+            server_upward = stack.enter_context(open(upward_write_fd, write_mode))
+            server_downward = stack.enter_context(open(downward_read_fd, read_mode))
+            client_downward = stack.enter_context(open(downward_write_fd, "wb", buffering=0))
+
+            reader = asyncio.StreamReader(loop=loop)
+            read_transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader, loop=loop),
+                client_upward,
+            )
+            self._transports.append(read_transport)
+            write_transport, write_protocol = await loop.connect_write_pipe(
+                asyncio.streams.FlowControlMixin,
+                client_downward,
+            )
+            self._transports.append(write_transport)
+            writer = asyncio.StreamWriter(write_transport, write_protocol, None, loop)
+
+            # from now on, the pipes are closed by the transports and by the server thread
+            stack.pop_all()
+
+        self._server_thread = self._program._start_server_thread(
+            server_upward,
+            server_downward,
+            self._downward_tee,
+            self._upward_tee,
+            self._protocol,
+        )
+        return DriverProcessConnection(upward=reader, downward=writer)
+
+    async def __aenter__(self):
+        try:
+            connection = await self._start_server()
+        except BaseException:
+            self._close_transports()
+            raise
+
+        self._process = AsyncProcess(connection, protocol=self._protocol)
+        try:
+            await self._process._start(**self._kwargs)
+        except BaseException:
+            try:
+                await self._process._send_stop()
+            finally:
+                await self._wait_server()
+            raise
+        return self._process
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            return await self._process._finish(exc_type, exc_value, traceback)
+        finally:
+            await self._wait_server()
+
+    def _close_transports(self):
+        for transport in self._transports:
+            transport.close()
+
+    async def _wait_server(self):
+        if self._server_process is not None:
+            self._server_process.stdin.close()
+            await self._server_process.wait()
+            logging.debug("driver server terminated")
+            return
+
+        # the server terminates when its downward pipe is closed,
+        # while its upward pipe is still read by the event loop until then
+        read_transport, write_transport = self._transports
+        write_transport.close()
+        try:
+            await asyncio.get_event_loop().run_in_executor(None, self._server_thread.join)
+        finally:
+            read_transport.close()
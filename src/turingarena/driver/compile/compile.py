@@ -1,11 +1,19 @@
+import ast
+import importlib.util
 import logging
+import pickle
+import threading
+from collections import OrderedDict
 from enum import Enum
-from functools import partial
+from functools import lru_cache, partial
 
+import tatsu
+from turingarena.driver.cache import build_cache, cache_key
 from turingarena.driver.common.analysis import InterfaceAnalyzer
 from turingarena.driver.common.nodes import *
 from turingarena.driver.compile.analysis import CompileAnalyzer, ReferenceDefinition, ReferenceResolution
 from turingarena.driver.compile.diagnostics import *
+from turingarena.driver.compile.grammar import grammar_ebnf
 from turingarena.driver.compile.parser import parse_interface
 from turingarena.driver.compile.postprocess import CompilationPostprocessor
 from turingarena.util.visitor import classvisitormethod
@@ -399,16 +407,122 @@ class Compiler(CompileAnalyzer, InterfaceAnalyzer, CompilationPostprocessor):
         return cls(array, index)
 
 
-def compile_interface(source_text):
+# compiled interfaces kept in memory, the least recently used are evicted first
+INTERFACE_MEMO_SIZE = 64
+
+_compiled_interfaces = OrderedDict()
+_compiled_interfaces_lock = threading.Lock()
+
+
+def _imported_modules(path):
+    """
+    Names of the modules of TuringArena imported by the given source file,
+    including the submodules imported with `from package import module`.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+            names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        for name in names:
+            if name.split(".")[0] == "turingarena":
+                yield name
+
+
+def compiler_sources():
+    """
+    Paths of the source files of the compiler, and of all the modules of TuringArena it imports (transitively).
+    The packages containing them are not included, as they only gather modules.
+    """
+    sources = set()
+    pending = [__name__]
+    seen = set(pending)
+    while pending:
+        name = pending.pop()
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, AttributeError):  # AttributeError: the parent is a module, not a package
+            spec = None
+        if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+            continue  # not a module (e.g., a class imported from a module)
+        sources.add(spec.origin)
+        for imported in _imported_modules(spec.origin):
+            if imported not in seen:
+                seen.add(imported)
+                pending.append(imported)
+    return sorted(sources)
+
+
+@lru_cache(None)
+def compiler_fingerprint():
+    """
+    Identifies the grammar, the compiler code and the code it uses (e.g., the nodes, the analyses, the visitors),
+    so that cached interfaces are invalidated whenever any of them changes.
+    """
+    contents = []
+    for path in compiler_sources():
+        with open(path, "rb") as f:
+            contents.append(f.read())
+    return cache_key(grammar_ebnf, tatsu.__version__, *contents)
+
+
+def _do_compile_interface(source_text, cache):
+    key = cache_key("interface", compiler_fingerprint(), source_text)
+
+    data = cache.load_data(key, "interface.pickle")
+    if data is not None:
+        return pickle.loads(data)
+
     compiler = Compiler.create()
     interface = compiler.compile_interface_source(source_text)
+    result = interface, tuple(str(d) for d in compiler.diagnostics)
+
+    cache.store_data(key, "interface.pickle", pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+    return result
+
+
+def _memoized_compile_interface(source_text, cache):
+    key = cache_key(source_text)
+    with _compiled_interfaces_lock:
+        result = _compiled_interfaces.get(key)
+        if result is not None:
+            _compiled_interfaces.move_to_end(key)
+            return result
+
+    result = _do_compile_interface(source_text, cache)
+    with _compiled_interfaces_lock:
+        _compiled_interfaces[key] = result
+        _compiled_interfaces.move_to_end(key)
+        while len(_compiled_interfaces) > INTERFACE_MEMO_SIZE:
+            _compiled_interfaces.popitem(last=False)
+    return result
+
+
+def compile_interface(source_text, cache=None):
+    """
+    Compiles the given interface, using the given build cache (by default, the one configured by the environment).
+    Interfaces are also memoized in memory (the INTERFACE_MEMO_SIZE most recently used), unless the cache is disabled.
+    """
+    if cache is None:
+        cache = build_cache()
+
+    if cache.enabled:
+        result = _memoized_compile_interface(source_text, cache)
+    else:
+        result = _do_compile_interface(source_text, cache)
+
+    interface, diagnostics = result
 
-    for msg in compiler.diagnostics:
+    for msg in diagnostics:
         logging.warning(f"interface contains an error: {msg}")
 
     return interface
 
 
-def load_interface(path):
+def load_interface(path, cache=None):
     with open(path) as f:
-        return compile_interface(f.read())
+        return compile_interface(f.read(), cache)
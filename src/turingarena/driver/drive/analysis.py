@@ -4,6 +4,7 @@ from turingarena.driver.common.analysis import InterfaceAnalyzer
 from turingarena.driver.common.nodes import *
 from turingarena.driver.drive.nodes import *
 from turingarena.driver.drive.requests import *
+from turingarena.util.memo import node_memoized
 from turingarena.util.visitor import visitormethod
 
 ReferenceDirection = Enum("ReferenceDirection", names=["DOWNWARD", "UPWARD"])
@@ -20,6 +21,11 @@ DIRECTION_MAP = {
 
 
 class ExecutionAnalyzer(InterfaceAnalyzer):
+    @node_memoized
+    def reference_actions(self, n):
+        return tuple(super().reference_actions(n))
+
+    @node_memoized
     def first_requests(self, n):
         return frozenset(self._get_first_requests(n))
 
@@ -68,6 +74,7 @@ class ExecutionAnalyzer(InterfaceAnalyzer):
     def _get_first_requests_object(self, n):
         yield None
 
+    @node_memoized
     def can_be_grouped(self, n):
         return self._can_be_grouped(n)
 
@@ -101,6 +108,7 @@ class ExecutionAnalyzer(InterfaceAnalyzer):
                 return False
         return True
 
+    @node_memoized
     def declaration_directions(self, n):
         return frozenset(self._get_directions(n))
 
@@ -143,3 +151,51 @@ class ExecutionAnalyzer(InterfaceAnalyzer):
             for t in ts:
                 if isinstance(n, t):
                     yield d
+
+    @node_memoized
+    def is_bulk_read(self, n):
+        """
+        Whether the node only sends data downward, that is,
+        it contains only reads, possibly inside (nested) for loops.
+        """
+        return self._is_bulk_read(n)
+
+    @visitormethod
+    def _is_bulk_read(self, n):
+        pass
+
+    def _is_bulk_read_Read(self, n):
+        return True
+
+    def _is_bulk_read_Block(self, n):
+        return all(self.is_bulk_read(child) for child in n.children)
+
+    def _is_bulk_read_Step(self, n):
+        return self.is_bulk_read(n.body)
+
+    def _is_bulk_read_For(self, n):
+        return self.is_bulk_read(n.body)
+
+    def _is_bulk_read_object(self, n):
+        return False
+
+    @node_memoized
+    def bulk_read_statements(self, n):
+        """
+        The reads and for loops in a bulk read node, in order, without the enclosing blocks and steps.
+        """
+        return tuple(self._get_bulk_read_statements(n))
+
+    @visitormethod
+    def _get_bulk_read_statements(self, n):
+        pass
+
+    def _get_bulk_read_statements_Block(self, n):
+        for child in n.children:
+            yield from self.bulk_read_statements(child)
+
+    def _get_bulk_read_statements_Step(self, n):
+        return self.bulk_read_statements(n.body)
+
+    def _get_bulk_read_statements_object(self, n):
+        yield n
@@ -1,11 +1,11 @@
 import logging
-import threading
 from collections import namedtuple
 from contextlib import contextmanager
 
-from turingarena.driver.client.commands import DriverState, deserialize_data, serialize_data
+from turingarena.driver.client.commands import DriverState
 from turingarena.driver.drive.context import ExecutionContext
 from turingarena.driver.drive.requests import CallRequestSignature, RequestSignature
+from turingarena.driver.sandbox.watchdog import watchdog
 
 UPWARD_TIMEOUT = 3.0
 
@@ -30,7 +30,7 @@ class SandboxCommunicator(ExecutionContext):
     def _on_timeout(self):
         try:
             logging.info(f"process communication timeout expired")
-            self.process.get_status(kill_reason="timeout expired")
+            self.process.kill("timeout expired")
         except:
             logging.exception(f"exception while killing for timeout")
 
@@ -46,12 +46,20 @@ class SandboxCommunicator(ExecutionContext):
             print(*values, file=self.sandbox_connection.downward)
         print(*values, file=self.sandbox_tee.downward_tee)
 
+    def send_downward_lines(self, lines):
+        """
+        Sends many lines at once, with a single write.
+        """
+        data = "".join(line + "\n" for line in lines)
+        with self._check_downward_pipe():
+            self.sandbox_connection.downward.write(data)
+        self.sandbox_tee.downward_tee.write(data)
+
     def receive_upward(self):
         with self._check_downward_pipe():
             self.sandbox_connection.downward.flush()
 
-        timer = threading.Timer(UPWARD_TIMEOUT, self._on_timeout)
-        timer.start()
+        deadline = watchdog().arm(UPWARD_TIMEOUT, self._on_timeout)
 
         max_line_size = 256
 
@@ -61,8 +69,7 @@ class SandboxCommunicator(ExecutionContext):
 
         line = line.strip()
 
-        timer.cancel()
-        timer.join()
+        deadline.cancel()
 
         if not line:
             raise CommunicationError(f"process stopped sending data")
@@ -82,20 +89,31 @@ class DriverCommunicator(ExecutionContext):
         self.send_driver_upward(state.value)
 
     def send_driver_upward(self, item):
-        if isinstance(item, bool):
-            item = int(item)
-        print(item, file=self.driver_connection.upward)
+        self.driver_channel.send(item)
 
     def receive_driver_downward(self):
-        self.driver_connection.upward.flush()
-        return self.driver_connection.downward.readline().strip()
+        return self.driver_channel.receive_str()
+
+    def receive_driver_int(self):
+        return self.driver_channel.receive_int()
 
     def report_ready(self):
-        self.send_resource_usage_upward()
         self.send_driver_state(DriverState.READY)
 
     def next_request(self):
         command = self.receive_driver_downward()
+        while command in ("resource_usage", "time_limit"):
+            # these requests are answered right away, without affecting the execution
+            if command == "resource_usage":
+                # requested by the client only when needed,
+                # with the process stopped only for a consistent snapshot (e.g., on section boundaries)
+                stop = bool(self.driver_channel.receive_int())
+                self.send_resource_usage_upward(stop=stop)
+            else:
+                time_limit = self.driver_channel.receive_float()
+                self.process.set_time_limit(time_limit if time_limit >= 0 else None)
+            command = self.receive_driver_downward()
+
         if command == "stop":
             raise DriverStop
         if command == "call":
@@ -104,8 +122,8 @@ class DriverCommunicator(ExecutionContext):
         else:
             return RequestSignature(command)
 
-    def send_resource_usage_upward(self):
-        info = self.process.get_status()
+    def send_resource_usage_upward(self, stop=False):
+        info = self.process.get_status(stop=stop)
         self.send_driver_state(DriverState.RESOURCE_USAGE)
         self.send_driver_upward(info.time_usage)
         self.send_driver_upward(info.peak_memory_usage)
@@ -113,19 +131,4 @@ class DriverCommunicator(ExecutionContext):
         return info
 
     def deserialize_request_data(self):
-        deserializer = deserialize_data()
-        next(deserializer)
-        lines_it = iter(self.receive_driver_downward, None)
-        try:
-            for line in lines_it:
-                deserializer.send(line)
-        except StopIteration as e:
-            result = e.value
-        else:
-            raise ValueError(f"too few lines")
-        return result
-
-    def serialize_response_data(self, value):
-        lines = serialize_data(value)
-        for line in lines:
-            self.send_driver_upward(int(line))
+        return self.driver_channel.receive_data()
@@ -6,11 +6,13 @@ class ExecutionContext(namedtuple("Executor", [
     "phase",
     "process",
     "request_lookahead",
-    "driver_connection",
+    "driver_channel",
     "sandbox_connection",
     "sandbox_tee",
 ])):
     def with_assigments(self, assignments):
+        # copied on each extension: bindings stay small (array elements are bound to the array when their loop ends),
+        # and at these sizes a dict is cheaper than a scoped structure (see `test_bindings_extend`)
         return self._replace(bindings={
             **self.bindings,
             **dict(assignments),
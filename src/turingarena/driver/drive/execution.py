@@ -1,7 +1,7 @@
 import logging
 from enum import Enum
 
-from turingarena.driver.common.nodes import Subscript
+from turingarena.driver.common.nodes import For, Subscript
 
 from turingarena import InterfaceError
 from turingarena.driver.common.description import TreeDumper
@@ -10,6 +10,7 @@ from turingarena.driver.drive.analysis import ReferenceDirection
 from turingarena.driver.drive.comm import CommunicationError, InterfaceExitReached, SandboxCommunicator, \
     DriverCommunicator
 from turingarena.driver.drive.preprocess import ExecutionPreprocessor
+from turingarena.util.memo import node_memoized
 from turingarena.util.visitor import visitormethod
 
 
@@ -23,6 +24,12 @@ class NotResolved(Exception):
     """Expression evaluation failed because some values are not resolved"""
 
 
+def _depends_on(e, variable):
+    if isinstance(e, Subscript):
+        return _depends_on(e.array, variable) or _depends_on(e.index, variable)
+    return e == variable
+
+
 class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
     __slots__ = []
 
@@ -71,11 +78,21 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
     def _on_execute(self, n):
         pass
 
-    def _on_execute_Interface(self, n):
+    @node_memoized
+    def transformed_main(self, n):
+        """
+        Main block of the given interface, grouped in steps.
+        Computed once per interface, and reused across executions.
+        """
         main = self.transform(n.main)
 
         logging.debug(f"transformed main block: {TreeDumper().dump(main)}")
 
+        return main
+
+    def _on_execute_Interface(self, n):
+        main = self.transformed_main(n)
+
         self.with_assigments({
             c.variable: self.evaluate(c.value)
             for c in n.constants
@@ -83,8 +100,14 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
 
     def _on_execute_Block(self, n):
         result = self.result()
+        context = self
         for n in n.children:
-            result = result.merge(self.extend(result).execute(n))
+            child_result = context.execute(n)
+            result = result.merge(child_result)
+            # extend the context only with the new assignments, not with all those of the block
+            if child_result is not None:
+                context = context.with_assigments(child_result.assignments)
+            context = context._replace(request_lookahead=result.request_lookahead)
         return result
 
     def _on_execute_Step(self, n):
@@ -133,6 +156,12 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
 
         for_range = self.evaluate(n.index.range)
 
+        if self.is_bulk_read(n.body):
+            # reads do nothing outside of the downward phase, and resolve no reference
+            if self.phase in (None, ExecutionPhase.DOWNWARD):
+                self.send_downward_lines(self._bulk_read_lines(n, for_range))
+            return self.result()
+
         results_by_iteration = [
             self.with_assigments(
                 [(n.index.variable, i)]
@@ -152,6 +181,41 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
 
         return self.result()._replace(assignments=assignments)
 
+    def _bulk_read_lines(self, n, for_range):
+        """
+        Lines sent downward by the iterations of a bulk read for loop.
+        Reads of the form `read a[i], b[i]` are formatted directly from the arrays,
+        without executing each iteration.
+        """
+        statements = self.bulk_read_statements(n.body)
+        index = n.index.variable
+
+        if len(statements) == 1 and not isinstance(statements[0], For):
+            [read] = statements
+            if all(
+                    isinstance(a, Subscript) and a.index == index and not _depends_on(a.array, index)
+                    for a in read.arguments
+            ):
+                columns = [self.evaluate(a.array) for a in read.arguments]
+                if any(len(c) < for_range for c in columns):
+                    raise IndexError("list index out of range")
+                if len(columns) == 1:
+                    [column] = columns
+                    yield from map(str, column[:for_range])
+                else:
+                    for values in zip(*(c[:for_range] for c in columns)):
+                        yield " ".join(map(str, values))
+                return
+
+        for i in range(for_range):
+            context = self.with_assigments([(index, i)])
+            for statement in statements:
+                if isinstance(statement, For):
+                    if context.is_resolved(statement.index.range):
+                        yield from context._bulk_read_lines(statement, context.evaluate(statement.index.range))
+                else:
+                    yield " ".join(str(context.evaluate(a)) for a in statement.arguments)
+
     def _on_execute_Loop(self, n):
         context = self
         while True:
@@ -232,7 +296,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
                 f"but the provided implementation did not return anything"
             )
 
-        value = int(self.receive_driver_downward())
+        value = self.receive_driver_int()
         return self.result()._replace(assignments=[(n.value, value)])
 
     def _on_request_CallbackEnd(self, n):
@@ -248,7 +312,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
         command = request.command
         if not command == "callback_return":
             raise InterfaceError(f"expecting 'callback_return', got '{command}'")
-        has_return_value = bool(int(self.receive_driver_downward()))
+        has_return_value = bool(self.receive_driver_int())
         return has_return_value
 
     def _on_request_Exit(self, n):
@@ -280,7 +344,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
         if not method_name == n.method.name:
             raise InterfaceError(f"expected call to '{n.method.name}', got call to '{method_name}'")
 
-        parameter_count = int(self.receive_driver_downward())
+        parameter_count = self.receive_driver_int()
         if parameter_count != len(n.method.parameters):
             raise InterfaceError(
                 f"'{n.method.name}' expects {len(n.method.parameters)} arguments, "
@@ -301,7 +365,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
             else:
                 assignments.append((a, actual_value))
 
-        actual_has_return_value = bool(int(self.receive_driver_downward()))
+        actual_has_return_value = bool(self.receive_driver_int())
         expected_has_return_value = n.method.has_return_value
         if not actual_has_return_value == expected_has_return_value:
             names = ["procedure", "function"]
@@ -310,7 +374,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
                 f"got call to {names[actual_has_return_value]}"
             )
 
-        callback_count = int(self.receive_driver_downward())
+        callback_count = self.receive_driver_int()
         expected_callback_count = len(n.method.callbacks)
         if not callback_count == expected_callback_count:
             raise InterfaceError(
@@ -319,7 +383,7 @@ class Executor(SandboxCommunicator, DriverCommunicator, ExecutionPreprocessor):
             )
 
         for c in n.method.callbacks:
-            parameter_count = int(self.receive_driver_downward())
+            parameter_count = self.receive_driver_int()
             expected_parameter_count = len(c.parameters)
             if not parameter_count == expected_parameter_count:
                 raise InterfaceError(
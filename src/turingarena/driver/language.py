@@ -18,18 +18,29 @@ class Language(namedtuple("Language", [
     __slots__ = []
 
     @staticmethod
-    def languages():
+    def _languages(attribute):
         from . import languages as language_package
 
         languages = []
         for mod in pkgutil.iter_modules(language_package.__path__):
             mod = importlib.import_module(f"{language_package.__name__}.{mod.name}")
             try:
-                languages.append(getattr(mod, "language"))
+                languages.append(getattr(mod, attribute))
             except AttributeError:
                 pass
         return languages
 
+    @staticmethod
+    def languages():
+        return Language._languages("language")
+
+    @staticmethod
+    def disabled_languages():
+        """
+        Languages whose support is not complete, so they cannot be used.
+        """
+        return Language._languages("disabled_language")
+
     @classmethod
     def from_name(cls, name):
         for language in cls.languages():
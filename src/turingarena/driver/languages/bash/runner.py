@@ -16,8 +16,7 @@ class BashProgramRunner(ProgramRunner):
     def run_in_process(self):
         shutil.copy(self.program.source_path, os.path.join(self.temp_dir, "solution.sh"))
 
-        with open(self.skeleton_path, "w") as f:
-            self.language.Generator().generate_to_file(self.interface, f)
+        self._write_skeleton(self.skeleton_path)
 
         yield create_popen_process_connection(
             ["bash", self.skeleton_path],
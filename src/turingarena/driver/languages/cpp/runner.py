@@ -7,6 +7,7 @@ from functools import lru_cache
 from subprocess import CalledProcessError
 
 import pkg_resources
+from turingarena.driver.cache import cache_key, tool_version
 from turingarena.driver.sandbox.connection import create_failed_connection
 from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.sandbox.rlimits import set_rlimits
@@ -14,15 +15,15 @@ from turingarena.driver.sandbox.runner import ProgramRunner
 
 
 class CppProgramRunner(ProgramRunner):
+    compiler = "g++"
+    source_flags = ("-O2", "-std=c++17", "-Wall")
+    skeleton_flags = ("-O2", "-std=c++17", "-Wno-unused-result")
+    link_flags = ("-static",)
+
     @contextmanager
     def run_in_process(self):
-        with open(self._skeleton_path, "w") as f:
-            self.language.Generator().generate_to_file(self.interface, f)
-
         try:
-            self._compile_source()
-            self._compile_skeleton()
-            self._link_executable()
+            self.build()
         except CalledProcessError:
             yield create_failed_connection("Compilation failed.")
         else:
@@ -33,6 +34,27 @@ class CppProgramRunner(ProgramRunner):
                 preexec_fn=set_rlimits,
             )
 
+    def build(self):
+        cache = self.cache
+        key = self._executable_cache_key(
+            tool_version(self.compiler, "--version"),
+            *self.source_flags,
+            *self.skeleton_flags,
+            *self.link_flags,
+        )
+        if cache.fetch(key, {"algorithm": self.executable_path}):
+            logging.debug("Using cached executable")
+            return
+
+        skeleton_source = self._write_skeleton(self._skeleton_path)
+
+        with self._compiler_env() as env:
+            self._compile_source(env)
+            self._compile_skeleton(skeleton_source, env)
+            self._link_executable(env)
+
+        cache.store(key, {"algorithm": self.executable_path})
+
     @staticmethod
     @lru_cache()
     def _ccache():
@@ -41,36 +63,69 @@ class CppProgramRunner(ProgramRunner):
             return []
         return [ccache]
 
-    def _compile_source(self):
+    @contextmanager
+    def _compiler_env(self):
+        """
+        Gives the environment of the compiler.
+        The cache of ccache (if used) is kept in the build cache, so that it is bounded, evicted
+        and disabled together with it.
+        """
+        env = dict(os.environ)
+        if not self._ccache():
+            yield env
+            return
+
+        with self.cache.tool_directory("ccache") as directory:
+            if directory is None:
+                env["CCACHE_DISABLE"] = "1"
+            else:
+                env["CCACHE_DIR"] = directory
+            yield env
+
+    def _compile_source(self, env):
         cli = [
-            *self._ccache(), "g++", "-c", "-O2", "-std=c++17", "-Wall",
+            *self._ccache(), self.compiler, "-c", *self.source_flags,
             "-o", self._source_object_path,
             self.program.source_path
         ]
 
         logging.debug("Compiling source: " + " ".join(cli))
-        subprocess.run(cli, universal_newlines=True, check=True)
+        subprocess.run(cli, universal_newlines=True, check=True, env=env)
+
+    def _compile_skeleton(self, skeleton_source, env):
+        # the skeleton depends only on the interface, so its object is shared among all the submissions
+        cache = self.cache
+        key = cache_key(
+            "skeleton",
+            tool_version(self.compiler, "--version"),
+            *self.skeleton_flags,
+            skeleton_source,
+        )
+        if cache.fetch(key, {"skeleton.o": self._skeleton_object_path}):
+            logging.debug("Using cached skeleton object")
+            return
 
-    def _compile_skeleton(self):
         cli = [
-            *self._ccache(), "g++", "-c", "-O2", "-std=c++17", "-Wno-unused-result",
+            *self._ccache(), self.compiler, "-c", *self.skeleton_flags,
             "-o", self._skeleton_object_path,
             self._skeleton_path,
         ]
 
         logging.debug("Compiling skeleton: " + " ".join(cli))
-        subprocess.run(cli, universal_newlines=True, check=True)
+        subprocess.run(cli, universal_newlines=True, check=True, env=env)
+
+        cache.store(key, {"skeleton.o": self._skeleton_object_path})
 
-    def _link_executable(self):
+    def _link_executable(self, env):
         cli = [
-            *self._ccache(), "g++", "-static",
+            *self._ccache(), self.compiler, *self.link_flags,
             "-o", self.executable_path,
             self._skeleton_object_path,
             self._source_object_path
         ]
 
         logging.debug("Linking executable: " + " ".join(cli))
-        subprocess.run(cli, universal_newlines=True, check=True)
+        subprocess.run(cli, universal_newlines=True, check=True, env=env)
 
     @property
     def executable_path(self):
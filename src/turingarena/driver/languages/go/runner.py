@@ -4,6 +4,7 @@ import shutil
 import subprocess
 from contextlib import contextmanager
 
+from turingarena.driver.cache import tool_version
 from turingarena.driver.sandbox.connection import create_failed_connection
 from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.sandbox.rlimits import set_rlimits
@@ -19,30 +20,53 @@ class GoProgramRunner(ProgramRunner):
 
     @contextmanager
     def run_in_process(self):
-        with open(os.path.join(self.temp_dir, "skeleton.go"), "w") as f:
-            self.language.Generator().generate_to_file(self.interface, f)
+        try:
+            self.build()
+        except subprocess.CalledProcessError:
+            yield create_failed_connection("Compilation failed.")
+        else:
+            # sandbox_path = pkg_resources.resource_filename(__name__, "sandbox.py")
+            yield create_popen_process_connection(
+                [self.executable_path],
+                preexec_fn=set_rlimits,
+            )
+
+    @staticmethod
+    def _go_env(gocache):
+        env = dict(os.environ)
+        # compiled packages (mostly, the standard library) are shared among runs,
+        # the Go build cache is safe for concurrent use
+        if gocache is not None:
+            env["GOCACHE"] = gocache
+        return env
+
+    def build(self):
+        cache = self.cache
+        key = self._executable_cache_key(tool_version("go", "version"))
+        if cache.fetch(key, {"algorithm": self.executable_path}):
+            logger.debug("Using cached executable")
+            return
+
+        self._write_skeleton(os.path.join(self.temp_dir, "skeleton.go"))
 
         shutil.copyfile(self.program.source_path, os.path.join(self.temp_dir, "solution.go"))
 
         cli = [
             "go",
             "build",
+            # paths of the temporary directory would make build actions differ among runs
+            "-trimpath",
             "-o", self.executable_path,
             os.path.join(self.temp_dir, "skeleton.go"),
             os.path.join(self.temp_dir, "solution.go"),
         ]
         logger.debug(f"Running {' '.join(cli)}")
-        try:
+        with self.cache.tool_directory("go") as gocache:
             subprocess.run(
                 cli,
                 universal_newlines=True,
                 check=True,
+                env=self._go_env(gocache),
             )
-        except subprocess.CalledProcessError:
-            yield create_failed_connection("Compilation failed.")
-        else:
-            # sandbox_path = pkg_resources.resource_filename(__name__, "sandbox.py")
-            yield create_popen_process_connection(
-                [self.executable_path],
-                preexec_fn=set_rlimits,
-            )
+
+        cache.store(key, {"algorithm": self.executable_path})
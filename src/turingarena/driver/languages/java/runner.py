@@ -2,71 +2,216 @@ import logging
 import os
 import shutil
 import subprocess
+import zipfile
 from contextlib import contextmanager
+from functools import lru_cache
 from subprocess import CalledProcessError
 
 import pkg_resources
+from turingarena.driver.cache import tool_version
 from turingarena.driver.sandbox.connection import create_failed_connection
 from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.sandbox.runner import ProgramRunner
 
 logger = logging.getLogger(__name__)
 
+CLASS_DATA_ARCHIVE_TIMEOUT = 30.0
+
 
 class JavaProgramRunner(ProgramRunner):
     __slots__ = []
 
+    # options to reduce the startup time of short runs:
+    # only the C1 compiler, a simple garbage collector, and no performance data file
+    jvm_flags = (
+        "-XX:TieredStopAtLevel=1",
+        "-XX:+UseSerialGC",
+        "-XX:-UsePerfData",
+        "-Xshare:auto",
+    )
+
     @property
     def skeleton_path(self):
         return os.path.join(self.temp_dir, "Skeleton.java")
 
+    @property
+    def classes_path(self):
+        return os.path.join(self.temp_dir, "classes")
+
     @contextmanager
     def run_in_process(self):
-        # rename files because javac will complain if the file doesn't have
-        # the same name of the class defined in it.
-        solution_path = os.path.join(self.temp_dir, "Solution.java")
-        shutil.copy(self.program.source_path, solution_path)
-
-        with open(self.skeleton_path, "w") as f:
-            self.language.Generator().generate_to_file(self.interface, f)
-
         try:
-            subprocess.run(
-                [
-                    "javac",
-                    self.skeleton_path,
-                    solution_path,
-                ],
-                universal_newlines=True,
-                bufsize=1,
-                check=True,
-            )
+            classes_key = self._build_classes()
         except CalledProcessError:
             yield create_failed_connection("Compilation failed.")
         else:
-            security_policy_path = pkg_resources.resource_filename(__name__, "security.policy")
+            class_path = [self.classes_path]
+            archive_flags = []
+
+            archive = self._class_data_archive(classes_key)
+            if archive is not None:
+                jar_path, archive_path = archive
+                # the class path must start with the one used to create the archive,
+                # classes are still found in the directory, if the archive was evicted from the cache
+                class_path.insert(0, jar_path)
+                archive_flags.append(f"-XX:SharedArchiveFile={archive_path}")
+
             cli = [
                 "java",
-                "-cp", self.temp_dir,
-                "-Djava.security.manager",
-                f"-Djava.security.policy=={security_policy_path}",
+                *self.jvm_flags,
+                *archive_flags,
+                "-cp", os.pathsep.join(class_path),
+                *self._security_flags(),
                 "Skeleton",
             ]
 
-            yield create_popen_process_connection(
-                cli,
-                # preexec_fn=set_rlimits(),
-            )
+            # memory is accounted by the process manager (RLIMIT_AS is not usable with the JVM)
+            yield create_popen_process_connection(cli)
 
-    def get_memory_usage(self, process):
-        # FIXME: unused
-        cmd = [
-            'bash', '-c',
-            "jcmd Skeleton GC.class_histogram | tail -n 1 | awk '{print $3}'"
+    def _security_flags(self):
+        security_policy_path = pkg_resources.resource_filename(__name__, "security.policy")
+        return [
+            "-Djava.security.manager",
+            f"-Djava.security.policy=={security_policy_path}",
         ]
+
+    def build(self):
+        self._build_classes()
+
+    def _build_classes(self):
+        cache = self.cache
+        key = self._executable_cache_key(
+            tool_version("javac", "-version"),
+            tool_version("java", "-version"),
+            *self.jvm_flags,
+        )
+        if cache.fetch(key, {"classes": self.classes_path}):
+            logger.debug("Using cached classes")
+            return key
+
+        # rename files because javac will complain if the file doesn't have
+        # the same name of the class defined in it.
+        solution_path = os.path.join(self.temp_dir, "Solution.java")
+        shutil.copy(self.program.source_path, solution_path)
+
+        self._write_skeleton(self.skeleton_path)
+
+        os.mkdir(self.classes_path)
+        subprocess.run(
+            [
+                "javac",
+                "-d", self.classes_path,
+                self.skeleton_path,
+                solution_path,
+            ],
+            universal_newlines=True,
+            bufsize=1,
+            check=True,
+        )
+
+        with cache.staging_entry(key) as entry_path:
+            if entry_path is not None:
+                shutil.copytree(self.classes_path, os.path.join(entry_path, "classes"))
+                jar_path = os.path.join(entry_path, "classes.jar")
+                _write_jar(self.classes_path, jar_path)
+                # if the dump fails, the entry is stored without the archive, so it is not attempted again
+                self._dump_class_data_archive(jar_path, os.path.join(entry_path, "classes.jsa"))
+        return key
+
+    def _class_data_archive(self, classes_key):
+        """
+        Returns the paths of a JAR of the classes and of a class data sharing (AppCDS) archive
+        of the classes, or None if not available.
+
+        The archive records the class path used to create it (and only classes in JARs are archived),
+        so both are kept in the build cache entry of the classes, and created when the entry is stored.
+        """
+        entry_path = self.cache.entry_path(classes_key)
+        if entry_path is None:
+            return None
+
+        jar_path = os.path.join(entry_path, "classes.jar")
+        archive_path = os.path.join(entry_path, "classes.jsa")
+        if not os.path.exists(archive_path):
+            return None
+        return jar_path, archive_path
+
+    def _dump_class_data_archive(self, jar_path, archive_path):
+        """
+        Creates a static archive of the classes in the JAR and of the JDK classes in the default archive.
+
+        Classes are only loaded and linked (not initialized), so no code of the solution runs.
+        The JAR is moved with the archive when the entry is published,
+        which the JVM accepts as long as their relative location is kept (JDK 16 or later).
+        Otherwise the archive is ignored, and classes are loaded as usual.
+        """
+        jdk_class_list_path = _jdk_class_list_path()
+        if jdk_class_list_path is None:
+            # an archive of the solution classes only would replace the default archive, and be slower
+            return
+
+        class_list_path = os.path.join(self.temp_dir, "classlist")
+        with open(jdk_class_list_path) as jdk_class_list, open(class_list_path, "w") as class_list:
+            shutil.copyfileobj(jdk_class_list, class_list)
+            for dirpath, dirnames, filenames in os.walk(self.classes_path):
+                for filename in filenames:
+                    name, ext = os.path.splitext(os.path.relpath(os.path.join(dirpath, filename), self.classes_path))
+                    if ext == ".class":
+                        print(name.replace(os.sep, "/"), file=class_list)
+
+        cli = [
+            "java",
+            *(flag for flag in self.jvm_flags if not flag.startswith("-Xshare:")),
+            "-Xshare:dump",
+            f"-XX:SharedClassListFile={class_list_path}",
+            f"-XX:SharedArchiveFile={archive_path}",
+            "-cp", jar_path,
+        ]
+        logger.debug("Creating class data archive: " + " ".join(cli))
         try:
-            memory_utilization = int(subprocess.check_output(cmd))
-        except ValueError:
-            memory_utilization = 0
-        logger.debug(f"memory usage : {memory_utilization / 1000000}Mb")
-        return memory_utilization
+            subprocess.run(
+                cli,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=CLASS_DATA_ARCHIVE_TIMEOUT,
+                check=True,
+            )
+        except (OSError, subprocess.SubprocessError):
+            logger.debug("class data archive not created", exc_info=True)
+            try:
+                os.unlink(archive_path)
+            except FileNotFoundError:
+                pass
+
+
+@lru_cache(None)
+def _jdk_class_list_path():
+    """
+    Returns the path of the list of classes in the default archive of the JDK, or None if not found.
+    """
+    try:
+        p = subprocess.run(
+            ["java", "-XshowSettings:properties", "-version"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+    except OSError:
+        return None
+    for line in p.stderr.splitlines():
+        name, sep, value = line.strip().partition(" = ")
+        if name == "java.home":
+            path = os.path.join(value, "lib", "classlist")
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def _write_jar(classes_path, jar_path):
+    # a JAR is a ZIP file, no manifest is needed to use it in the class path
+    with zipfile.ZipFile(jar_path, "w") as jar:
+        for dirpath, dirnames, filenames in os.walk(classes_path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                jar.write(path, os.path.relpath(path, classes_path))
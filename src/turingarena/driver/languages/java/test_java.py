@@ -1,6 +1,13 @@
+import glob
+import os
+import shutil
+import zipfile
+from tempfile import TemporaryDirectory
+
 import pytest
 
 from turingarena.driver.client.exceptions import AlgorithmRuntimeError
+from turingarena.driver.languages.java.runner import _jdk_class_list_path, _write_jar
 from turingarena.driver.tests.test_utils import define_algorithm
 
 interface_text = """
@@ -100,3 +107,48 @@ def test_security():
 #             assert i.memory_usage < 60000000
 #             assert p.functions.test2(2) == 2
 
+
+
+def test_write_jar():
+    with TemporaryDirectory() as temp_dir:
+        classes_path = os.path.join(temp_dir, "classes")
+        os.makedirs(os.path.join(classes_path, "pkg"))
+        for name in ["Skeleton.class", os.path.join("pkg", "Solution.class")]:
+            with open(os.path.join(classes_path, name), "w") as f:
+                f.write(name)
+
+        jar_path = os.path.join(temp_dir, "classes.jar")
+        _write_jar(classes_path, jar_path)
+
+        with zipfile.ZipFile(jar_path) as jar:
+            assert sorted(jar.namelist()) == ["Skeleton.class", "pkg/Solution.class"]
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="Java not available")
+def test_class_data_archive(monkeypatch, tmp_path):
+    monkeypatch.setenv("TURINGARENA_CACHE_DIR", str(tmp_path))
+    marker_path = tmp_path / "initialized"
+    source = """
+        public class Solution extends Skeleton {
+            static {
+                try {
+                    new java.io.FileOutputStream("%s").close();
+                } catch (Exception e) {
+                }
+            }
+            public int test() {
+                return 3;
+            }
+        }
+    """ % marker_path
+
+    for _ in range(2):
+        with java_algorithm(interface_text, source) as algo:
+            with algo.run() as p:
+                assert p.functions.test() == 3
+
+    archives = glob.glob(str(tmp_path / "build" / "entries" / "*" / "classes.jsa"))
+    if _jdk_class_list_path() is not None:
+        assert len(archives) == 1
+    # the archive is created without initializing the solution (which would not be sandboxed)
+    assert not marker_path.exists()
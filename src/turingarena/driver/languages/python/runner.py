@@ -3,6 +3,7 @@ import shutil
 from contextlib import contextmanager
 
 import pkg_resources
+from turingarena.driver.sandbox.pool import warm_pool_size, warm_process_pool
 from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.sandbox.rlimits import set_rlimits
 from turingarena.driver.sandbox.runner import ProgramRunner
@@ -19,12 +20,19 @@ class PythonProgramRunner(ProgramRunner):
     def run_in_process(self):
         shutil.copy(self.program.source_path, self.temp_dir)
 
-        with open(self.skeleton_path, "w") as f:
-            self.language.Generator().generate_to_file(self.interface, f)
+        self._write_skeleton(self.skeleton_path)
 
         sandbox_path = pkg_resources.resource_filename(__name__, "sandbox.py")
 
-        yield create_popen_process_connection(
-            ["python3", sandbox_path, self.program.source_path, self.skeleton_path],
-            preexec_fn=set_rlimits,
-        )
+        if not warm_pool_size():
+            yield create_popen_process_connection(
+                ["python3", sandbox_path, self.program.source_path, self.skeleton_path],
+                preexec_fn=set_rlimits,
+            )
+            return
+
+        # the interpreter is already started, and it waits for the paths of the program, before sandboxing itself
+        connection = warm_process_pool(["python3", sandbox_path], preexec_fn=set_rlimits).acquire()
+        print(self.program.source_path, file=connection.downward)
+        print(self.skeleton_path, file=connection.downward)
+        yield connection
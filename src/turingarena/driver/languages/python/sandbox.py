@@ -23,7 +23,14 @@ def init_sandbox():
 
 
 def main():
-    source_path, skeleton_path = sys.argv[1:]
+    if len(sys.argv) > 1:
+        source_path, skeleton_path = sys.argv[1:]
+    else:
+        # started in advance: the program to run is sent on stdin, once needed
+        source_path = sys.stdin.readline().rstrip("\n")
+        skeleton_path = sys.stdin.readline().rstrip("\n")
+        if not source_path:
+            return  # not used
 
     with open(source_path) as source_file:
         source_string = source_file.read()
@@ -5,22 +5,26 @@ import subprocess
 
 from contextlib import contextmanager
 
+from turingarena.driver.cache import cache_key, tool_version
 from turingarena.driver.sandbox.connection import create_failed_connection
 from turingarena.driver.sandbox.popen import create_popen_process_connection
 from turingarena.driver.sandbox.rlimits import set_rlimits
 from turingarena.driver.sandbox.runner import ProgramRunner
 
 
+def rustc_opt_level():
+    """
+    Optimization level of submissions (default: 2, as with `rustc -O`),
+    so that time limits measure the algorithm rather than unoptimized code.
+    """
+    return os.environ.get("TURINGARENA_RUSTC_OPT_LEVEL", "2")
+
+
 class RustProgramRunner(ProgramRunner):
     @contextmanager
     def run_in_process(self):
-        with open(self._skeleton_path, "w") as f:
-            self.language.Generator().generate_to_file(self.interface, f)
-
-        shutil.copy(self.program.source_path, self._source_path)
-
         try:
-            self._compile()
+            self.build()
         except subprocess.CalledProcessError:
             yield create_failed_connection("Compilation failed.")
         else:
@@ -29,15 +33,55 @@ class RustProgramRunner(ProgramRunner):
                 preexec_fn=set_rlimits,
             )
 
+    def build(self):
+        cache = self.cache
+        key = self._executable_cache_key(tool_version("rustc", "--version"), *self._codegen_flags())
+        if cache.fetch(key, {"algorithm": self.executable_path}):
+            logging.debug("Using cached executable")
+            return
+
+        self._write_skeleton(self._skeleton_path)
+
+        shutil.copy(self.program.source_path, self._source_path)
+
+        self._compile()
+
+        cache.store(key, {"algorithm": self.executable_path})
+
+    def _codegen_flags(self):
+        return ["-C", f"opt-level={rustc_opt_level()}"]
+
+    @contextmanager
+    def _incremental_flags(self):
+        """
+        Gives the flags to reuse the incremental compilation of the skeleton (and of the macros it defines),
+        which depends only on the interface, among all the submissions of the same interface.
+        Only for unoptimized builds: code generated incrementally is split in more units, and optimized less.
+        """
+        if rustc_opt_level() != "0":
+            yield []
+            return
+
+        # rustc locks its sessions, and removes the outdated ones, in the incremental directory
+        name = "rust-incremental-" + cache_key(repr(self.interface), *self._codegen_flags())
+        with self.cache.tool_directory(name) as directory:
+            if directory is None:
+                yield []
+            else:
+                yield ["-C", f"incremental={directory}"]
+
     def _compile(self):
-        cli = [
-            "rustc",
-            "-o", self.executable_path,
-            self._skeleton_path
-        ]
-
-        logging.debug("Compiling source: " + " ".join(cli))
-        subprocess.run(cli, universal_newlines=True, check=True)
+        with self._incremental_flags() as incremental_flags:
+            cli = [
+                "rustc",
+                *self._codegen_flags(),
+                *incremental_flags,
+                "-o", self.executable_path,
+                self._skeleton_path
+            ]
+
+            logging.debug("Compiling source: " + " ".join(cli))
+            subprocess.run(cli, universal_newlines=True, check=True)
 
     @property
     def executable_path(self):
@@ -12,11 +12,33 @@ SandboxProcessConnection = namedtuple("SandboxProcessConnection", [
 
 
 class ProcessManager:
-    def get_status(self, kill_reason=None) -> SandboxProcessInfo:
-        return self._do_get_status(kill_reason)
+    # whether the process was killed because it exceeded the time limit
+    time_limit_exceeded = False
+
+    def set_time_limit(self, time_limit):
+        """
+        Kills the process as soon as its CPU time exceeds `time_limit` (in seconds).
+        If `time_limit` is None, disarms the limit.
+        """
+        pass
+
+    def kill(self, reason):
+        """
+        Kills the process without waiting for it to terminate (e.g., from a watchdog callback).
+        It is reaped by the next `get_status()`, which reports `reason`.
+        """
+        pass
+
+    def get_status(self, kill_reason=None, stop=False) -> SandboxProcessInfo:
+        """
+        Returns the resource usage of the process, and kills it if `kill_reason` is given.
+        If `stop` is true, the process is stopped while taking a consistent snapshot,
+        otherwise the status may be read while the process is running.
+        """
+        return self._do_get_status(kill_reason, stop)
 
     @abstractmethod
-    def _do_get_status(self, kill_reason):
+    def _do_get_status(self, kill_reason, stop):
         pass
 
 
@@ -24,7 +46,7 @@ class FailedProcessManager(ProcessManager):
     def __init__(self, reason):
         self.reason = reason
 
-    def _do_get_status(self, kill_reason):
+    def _do_get_status(self, kill_reason, stop):
         return SandboxProcessInfo(
             time_usage=0.0,
             current_memory_usage=0,
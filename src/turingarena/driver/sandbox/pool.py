@@ -0,0 +1,83 @@
+import logging
+import os
+import threading
+
+from turingarena.driver.sandbox.popen import create_popen_process_connection
+
+
+def warm_pool_size():
+    """
+    Number of interpreters started in advance for each sandbox command (0, the default, to disable).
+
+    Spare interpreters only pay off when programs are run one after another (e.g., by an evaluation server),
+    otherwise each run would leave an idle interpreter behind, so they are enabled explicitly.
+    """
+    return int(os.environ.get("TURINGARENA_WARM_SANDBOXES", "0"))
+
+
+class WarmProcessPool:
+    """
+    Keeps processes started in advance, so that the startup time of interpreters is not paid when running programs.
+
+    The processes are children of the driver (a fork server would make them children of the server,
+    so the driver could not wait for them to collect their resource usage),
+    and they should wait for the program to run on their standard input, before sandboxing themselves.
+    """
+
+    def __init__(self, args, size, **kwargs):
+        self._args = args
+        self._kwargs = kwargs
+        self._size = size
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def acquire(self):
+        """
+        Returns the connection to a started process, and starts another one to replace it.
+        """
+        with self._lock:
+            while self._connections:
+                connection = self._connections.pop(0)
+                if connection.manager.os_process.poll() is None:
+                    break
+                logging.debug(f"discarding terminated warm process")
+            else:
+                connection = create_popen_process_connection(self._args, **self._kwargs)
+            self._fill()
+        return connection
+
+    def _close(self):
+        for connection in self._connections:
+            # the processes terminate when their standard input is closed
+            connection.downward.close()
+            connection.upward.close()
+        self._connections.clear()
+
+    def _fill(self):
+        while len(self._connections) < self._size:
+            self._connections.append(create_popen_process_connection(self._args, **self._kwargs))
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def warm_process_pool(args, **kwargs):
+    """
+    Returns the pool of processes started with the given arguments, shared by the drivers in this process.
+    The arguments must be hashable.
+    """
+    global _pools_pid
+    key = (tuple(args), tuple(sorted(kwargs.items())))
+    with _pools_lock:
+        # processes started by the parent cannot be waited for after fork
+        if _pools_pid != os.getpid():
+            for inherited_pool in _pools.values():
+                inherited_pool._close()
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = WarmProcessPool(args, warm_pool_size(), **kwargs)
+        return pool
@@ -2,10 +2,12 @@ import logging
 import os
 import signal
 import subprocess
+import threading
 import time
 
 from turingarena.driver.client.processinfo import SandboxProcessInfo
 from turingarena.driver.sandbox.connection import SandboxProcessConnection, ProcessManager
+from turingarena.driver.sandbox.watchdog import watchdog
 
 
 def create_popen_process_connection(*args, **kwargs):
@@ -24,11 +26,88 @@ def create_popen_process_connection(*args, **kwargs):
     )
 
 
+# minimum interval between two checks of the CPU time, while the process is waiting
+TIME_LIMIT_CHECK_INTERVAL = 0.01
+
+
 class PopenProcessManager(ProcessManager):
+    """
+    Reports resource usage of a process started with Popen.
+
+    Normally, the status is read without interrupting the process:
+    user CPU time from /proc/<pid>/stat, and memory usage from /proc/<pid>/status.
+    A stop-the-world snapshot (SIGSTOP, then wait4) is taken only when requested, or to kill the process.
+
+    Watchdog callbacks (the time limit, see `set_time_limit()`, and `kill()`) never wait:
+    they only read the CPU time and send signals, while the process is reaped by `get_status()`.
+    """
+
     def __init__(self, os_process):
         self.os_process = os_process
         self.termination_info = None
 
+        self._lock = threading.RLock()
+
+        # locks held by watchdog callbacks, never while waiting
+        self._deadline_lock = threading.Lock()
+        self._time_limit = None
+        self._time_limit_deadline = None
+        # held while the process is signalled or reaped, so that a reaped pid (maybe reused) is never signalled
+        self._signal_lock = threading.Lock()
+        self._reaped = False
+        self._kill_reason = None
+
+    def set_time_limit(self, time_limit):
+        with self._deadline_lock:
+            self._time_limit = time_limit
+            self._cancel_time_limit_deadline()
+            if time_limit is not None and self.termination_info is None:
+                self._check_time_limit()
+
+    def kill(self, reason):
+        with self._signal_lock:
+            if self._reaped:
+                return
+            if self._kill_reason is None:
+                self._kill_reason = reason
+            logging.debug(f"killing process because {reason}")
+            self.os_process.send_signal(signal.SIGKILL)
+
+    def _cancel_time_limit_deadline(self):
+        if self._time_limit_deadline is not None:
+            self._time_limit_deadline.cancel()
+            self._time_limit_deadline = None
+
+    def _check_time_limit(self):
+        """
+        Kills the process if it exceeded the time limit, otherwise checks again when it could exceed it.
+        CPU time cannot advance faster than wall time (for a single thread), so the remaining CPU time
+        is a lower bound of the wall time before the limit is exceeded.
+        """
+        try:
+            remaining = self._time_limit - self._read_user_time()
+        except OSError:
+            return  # terminated
+
+        if remaining <= 0:
+            logging.debug(f"time limit of {self._time_limit} s exceeded")
+            self.time_limit_exceeded = True
+            self.kill("time limit exceeded")
+            return
+
+        deadline = None
+
+        def on_deadline():
+            with self._deadline_lock:
+                if self._time_limit_deadline is not deadline:
+                    return  # disarmed or re-armed in the meantime
+                self._time_limit_deadline = None
+                if self.termination_info is None:
+                    self._check_time_limit()
+
+        deadline = watchdog().arm(max(remaining, TIME_LIMIT_CHECK_INTERVAL), on_deadline)
+        self._time_limit_deadline = deadline
+
     def get_connection(self):
         return
 
@@ -82,12 +161,25 @@ class PopenProcessManager(ProcessManager):
         else:
             logging.debug(f"ProcessManager did not reach interruptible state in {timeout} s")
 
-    def _read_stat_resource_usage(self):
-        fields = self._read_proc_stat()
-        # see man 5 proc
-        rss = int(fields[23]) * os.sysconf("SC_PAGE_SIZE")
+    def _read_memory_usage(self):
+        """
+        Returns peak (since the last reset) and current resident set size, in bytes.
+        """
+        usage = {}
+        with open(f"/proc/{self.os_process.pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmHWM", "VmRSS"):
+                    # see man 5 proc, values are in kB
+                    usage[key] = int(value.split()[0]) * 1024
+        if len(usage) < 2:
+            # no memory information, the process is terminating
+            raise ProcessLookupError
+        return usage["VmHWM"], usage["VmRSS"]
 
-        return rss
+    def _read_user_time(self):
+        # utime, in clock ticks (see man 5 proc)
+        return int(self._read_proc_stat()[13]) / os.sysconf("SC_CLK_TCK")
 
     def _reset_maxrss(self):
         fd = os.open(f"/proc/{self.os_process.pid}/clear_refs", os.O_WRONLY)
@@ -96,54 +188,121 @@ class PopenProcessManager(ProcessManager):
         finally:
             os.close(fd)
 
-    def _do_get_status(self, kill_reason):
+    def _do_get_status(self, kill_reason, stop):
+        with self._lock:
+            return self._do_get_status_locked(kill_reason, stop)
+
+    def _do_get_status_locked(self, kill_reason, stop):
         # if the process is already terminated, return the cached info
         if self.termination_info is not None:
             return self.termination_info
 
+        if kill_reason is None and not stop:
+            info = self._get_running_status()
+            if info is not None:
+                return info
+
+        return self._get_stopped_status(kill_reason)
+
+    def _wait4(self, options):
+        """
+        As os.wait4(), but the process is reaped with the signal lock held,
+        while waiting for it (without WNOHANG) does not hold the lock, so that `kill()` never waits.
+        """
+        pid = self.os_process.pid
+        if not options & os.WNOHANG:
+            # wait without reaping
+            wait_options = os.WEXITED | os.WNOWAIT
+            if options & os.WUNTRACED:
+                wait_options |= os.WSTOPPED
+            os.waitid(os.P_PID, pid, wait_options)
+
+        with self._signal_lock:
+            result = os.wait4(pid, options | os.WNOHANG)
+            _, exit_status, _ = result
+            if result[0] != 0 and not os.WIFSTOPPED(exit_status):
+                self._reaped = True
+        return result
+
+    def _get_termination_info(self, exit_status, rusage):
+        error = self._get_process_termination_message(exit_status)
+        if self._kill_reason is not None and os.WIFSIGNALED(exit_status) and os.WTERMSIG(exit_status) == signal.SIGKILL:
+            error = f"killed because: {self._kill_reason}"
+        info = SandboxProcessInfo(
+            peak_memory_usage=rusage.ru_maxrss * 1024,
+            current_memory_usage=0,
+            time_usage=rusage.ru_utime,
+            error=error,
+        )
+        self._set_terminated(info)
+        return info
+
+    def _set_terminated(self, info):
+        self.termination_info = info
+        with self._deadline_lock:
+            self._cancel_time_limit_deadline()
+
+    def _get_running_status(self):
+        """
+        Reads the status without interrupting the process.
+        Returns None if the process terminated while reading it.
+        """
+        pid, exit_status, rusage = self._wait4(os.WNOHANG)
+        if pid != 0:
+            return self._get_termination_info(exit_status, rusage)
+
+        try:
+            time_usage = self._read_user_time()
+            peak_memory_usage, current_memory_usage = self._read_memory_usage()
+            self._reset_maxrss()
+        except OSError:
+            return None
+
+        return SandboxProcessInfo(
+            peak_memory_usage=peak_memory_usage,
+            current_memory_usage=current_memory_usage,
+            time_usage=time_usage,
+            error="running normally",
+        )
+
+    def _get_stopped_status(self, kill_reason):
         self._wait_for_interruptible()
 
         # first send SIGSTOP to stop the process
         self.os_process.send_signal(signal.SIGSTOP)
 
         # then, use wait to get rusage struct (see man getrusage(2))
-        _, exit_status, rusage = os.wait4(self.os_process.pid, os.WUNTRACED)
-
-        maxrss = rusage.ru_maxrss * 1024
+        _, exit_status, rusage = self._wait4(os.WUNTRACED)
 
         termination_message = self._get_process_termination_message(exit_status)
-        running = termination_message is None
+        if termination_message is not None:
+            return self._get_termination_info(exit_status, rusage)
 
-        if running:
-            error = f"running normally"
-            if kill_reason is not None:
-                error += f", killed because: {kill_reason}"
-        else:
-            error = termination_message
+        error = f"running normally"
+        if kill_reason is not None:
+            error += f", killed because: {kill_reason}"
 
-        if running:
+        try:
+            peak_memory_usage, current_memory_usage = self._read_memory_usage()
             self._reset_maxrss()
-            rss = self._read_stat_resource_usage()
-        else:
-            rss = 0
+        except OSError:
+            # killed in the meantime (see `kill()`)
+            _, exit_status, rusage = self._wait4(0)
+            return self._get_termination_info(exit_status, rusage)
 
         info = SandboxProcessInfo(
-            peak_memory_usage=maxrss,
-            current_memory_usage=rss,
+            peak_memory_usage=peak_memory_usage,
+            current_memory_usage=current_memory_usage,
             time_usage=rusage.ru_utime,
             error=error,
         )
 
-        if running:
-            if kill_reason is not None:
-                logging.debug(f"killing process because {kill_reason}")
-                self.os_process.send_signal(signal.SIGKILL)
-                os.wait4(self.os_process.pid, 0)
-                self.termination_info = info
-            else:
-                # if process is not terminated, restart it with a SIGCONT
-                self.os_process.send_signal(signal.SIGCONT)
+        if kill_reason is not None:
+            self.kill(kill_reason)
+            self._wait4(0)
+            self._set_terminated(info)
         else:
-            self.termination_info = info
+            # if process is not terminated, restart it with a SIGCONT
+            self.os_process.send_signal(signal.SIGCONT)
 
         return info
@@ -1,18 +1,79 @@
+import io
+import threading
 from abc import abstractmethod
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from typing import ContextManager
 
+from turingarena.driver.cache import cache_key
 from turingarena.driver.sandbox.connection import SandboxProcessConnection
 
+# skeletons kept in memory, the least recently used are evicted first
+SKELETON_MEMO_SIZE = 64
+
+_skeleton_sources = OrderedDict()
+_skeleton_sources_lock = threading.Lock()
+
+
+def generate_skeleton(language, interface):
+    """
+    Returns the skeleton source of the given interface in the given language.
+    Sources are memoized (the SKELETON_MEMO_SIZE most recently used), since the skeleton depends only on the interface.
+    """
+    key = cache_key(language.name, repr(interface))
+    with _skeleton_sources_lock:
+        source = _skeleton_sources.get(key)
+        if source is not None:
+            _skeleton_sources.move_to_end(key)
+            return source
+
+    with io.StringIO() as f:
+        language.Generator().generate_to_file(interface, f)
+        source = f.getvalue()
+    with _skeleton_sources_lock:
+        _skeleton_sources[key] = source
+        _skeleton_sources.move_to_end(key)
+        while len(_skeleton_sources) > SKELETON_MEMO_SIZE:
+            _skeleton_sources.popitem(last=False)
+    return source
+
 
 class ProgramRunner(namedtuple("ProgramRunner", [
     "program",
     "language",
     "interface",
     "temp_dir",
+    "cache",
 ])):
     __slots__ = []
 
     @abstractmethod
     def run_in_process(self) -> ContextManager[SandboxProcessConnection]:
         pass
+
+    def build(self):
+        """
+        Builds the program, if it needs to (raises CalledProcessError if the compilation fails).
+        Called by `run_in_process()`, exposed to time builds alone.
+        """
+        pass
+
+    def _write_skeleton(self, path):
+        source = generate_skeleton(self.language, self.interface)
+        with open(path, "w") as f:
+            f.write(source)
+        return source
+
+    def _executable_cache_key(self, *toolchain):
+        """
+        Key of the build artifacts of this program,
+        given a description of the toolchain (compiler version, flags, etc.).
+        """
+        with open(self.program.source_path, "rb") as f:
+            source = f.read()
+        return cache_key(
+            "executable",
+            self.language.name,
+            source,
+            repr(self.interface),
+            *toolchain,
+        )
@@ -0,0 +1,114 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+
+class Deadline:
+    """
+    A callback scheduled by a watchdog, see `Watchdog.arm()`.
+    """
+
+    __slots__ = ["time", "callback", "cancelled"]
+
+    def __init__(self, time, callback):
+        self.time = time
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancels the deadline, if the callback did not start yet.
+        """
+        self.cancelled = True
+
+
+class Watchdog:
+    """
+    Runs callbacks when their deadlines expire, using a single thread for all the deadlines.
+
+    Deadlines are kept in a heap, so arming a deadline costs O(log n).
+    Cancelled deadlines are just marked, and discarded when they reach the top of the heap.
+    Callbacks run in the watchdog thread, one at a time, so they should not block for long.
+    A callback may still run shortly after its deadline is cancelled, if it was already started,
+    so callbacks must synchronize with the code cancelling them.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def arm(self, delay, callback):
+        """
+        Schedules `callback()` to run after `delay` seconds, and returns the `Deadline`.
+        """
+        deadline = Deadline(time.monotonic() + delay, callback)
+        with self._condition:
+            # deadlines are usually cancelled in the order they are armed, so this keeps the heap small
+            self._discard_cancelled()
+            heapq.heappush(self._heap, (deadline.time, next(self._counter), deadline))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is deadline:
+                # the thread may be sleeping until a later deadline
+                self._condition.notify()
+        return deadline
+
+    def _run(self):
+        with self._condition:
+            while True:
+                self._discard_cancelled()
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                deadline_time, _, deadline = self._heap[0]
+                remaining = deadline_time - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+
+                heapq.heappop(self._heap)
+                self._condition.release()
+                try:
+                    deadline.callback()
+                except:
+                    logging.exception(f"exception in watchdog callback")
+                finally:
+                    self._condition.acquire()
+
+    def _discard_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+
+_watchdog = None
+_watchdog_pid = None
+_watchdog_lock = threading.Lock()
+
+
+def watchdog():
+    """
+    Returns the watchdog shared by all the drivers running in this process.
+    """
+    global _watchdog, _watchdog_pid
+    with _watchdog_lock:
+        # threads do not survive fork, so a forked child gets its own watchdog
+        if _watchdog is None or _watchdog_pid != os.getpid():
+            _watchdog = Watchdog()
+            _watchdog_pid = os.getpid()
+        return _watchdog
+
+
+def is_watchdog_thread(thread):
+    """
+    Whether the given thread is the thread of the watchdog of this process.
+    That thread holds only the locks of its watchdog and of the drivers of this process,
+    which a forked child never uses (it gets its own watchdog, see `watchdog()`), so it is safe to fork while it runs.
+    """
+    return _watchdog is not None and _watchdog._thread is thread
@@ -4,6 +4,8 @@ from contextlib import ExitStack
 from tempfile import TemporaryDirectory
 
 from turingarena.logging_helper import init_logger
+from turingarena.driver.cache import build_cache
+from turingarena.driver.client.channel import create_channel, is_binary_protocol
 from turingarena.driver.client.commands import DriverState
 from turingarena.driver.client.connection import DriverProcessConnection
 from turingarena.driver.client.program import Program
@@ -16,20 +18,29 @@ logger = logging.getLogger(__name__)
 
 
 def main():
-    _, source_path, interface_path, downward_tee, upward_tee = sys.argv
+    _, source_path, interface_path, downward_tee, upward_tee, *options = sys.argv
+    protocol, = options or ["text"]
 
     init_logger()
 
+    if is_binary_protocol(protocol):
+        downward, upward = sys.stdin.buffer, sys.stdout.buffer
+    else:
+        downward, upward = sys.stdin, sys.stdout
+
     run_server(DriverProcessConnection(
-        downward=sys.stdin,
-        upward=sys.stdout,
-    ), source_path, interface_path, downward_tee, upward_tee)
+        downward=downward,
+        upward=upward,
+    ), source_path, interface_path, downward_tee, upward_tee, protocol=protocol)
 
 
-def run_server(driver_connection, source_path, interface_path, downward_tee, upward_tee):
+def run_server(driver_connection, source_path, interface_path, downward_tee, upward_tee, protocol="text",
+               cache_dir=None):
+    driver_channel = create_channel(protocol, input=driver_connection.downward, output=driver_connection.upward)
     program = Program(source_path=source_path, interface_path=interface_path)
     language = Language.from_source_path(program.source_path)
-    interface = load_interface(program.interface_path)
+    cache = build_cache(cache_dir)
+    interface = load_interface(program.interface_path, cache)
 
     with ExitStack() as stack:
         temp_dir = stack.enter_context(TemporaryDirectory())
@@ -39,6 +50,7 @@ def run_server(driver_connection, source_path, interface_path, downward_tee, upw
             language=language,
             interface=interface,
             temp_dir=temp_dir,
+            cache=cache,
         )
 
         connection = stack.enter_context(runner.run_in_process())
@@ -57,7 +69,7 @@ def run_server(driver_connection, source_path, interface_path, downward_tee, upw
             phase=None,
             process=connection.manager,
             request_lookahead=None,
-            driver_connection=driver_connection,
+            driver_channel=driver_channel,
             sandbox_connection=connection,
             sandbox_tee=sandbox_tee,
         )
@@ -72,10 +84,14 @@ def run_server(driver_connection, source_path, interface_path, downward_tee, upw
             assert False, f"driver was not explicitly stopped, got {request}"
         except CommunicationError as e:
             logging.debug(f"communication error", exc_info=True)
-            context.send_driver_state(DriverState.ERROR)  # error
             info = connection.manager.get_status(kill_reason="communication error")
-            message, = e.args
-            context.send_driver_upward(f"{message} (process {info.error})")
+            if connection.manager.time_limit_exceeded:
+                context.send_driver_state(DriverState.TIME_LIMIT_EXCEEDED)
+                context.send_driver_upward(f"time limit exceeded (process {info.error})")
+            else:
+                context.send_driver_state(DriverState.ERROR)  # error
+                message, = e.args
+                context.send_driver_upward(f"{message} (process {info.error})")
         except DriverStop:
             context.send_driver_state(DriverState.READY)  # ok, no errors
 
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from pytest import raises
+
+from turingarena import AlgorithmRuntimeError, TimeLimitExceeded
+from turingarena.driver.tests.test_utils import define_algorithm
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def doubling_algorithm():
+    return define_algorithm(
+        interface_text="""
+            function f(x);
+            main {
+                read n;
+                call a = f(n);
+                write a;
+                for i to n {
+                    read x;
+                    call b = f(x);
+                    write b;
+                }
+            }
+        """,
+        language_name="C++",
+        source_text="""
+            int f(int x) { return 2 * x; }
+        """,
+    )
+
+
+@pytest.mark.parametrize("driver", ["process", "thread"])
+def test_concurrent_processes(driver):
+    async def drive(algo, k):
+        async with algo.run_async(driver=driver) as p:
+            assert await p.functions.f(9) == 18
+            return [await p.functions.f(k * 100 + i) for i in range(9)]
+
+    with doubling_algorithm() as algo:
+        all_results = run(asyncio.gather(*[drive(algo, k) for k in range(5)]))
+
+    assert all_results == [[2 * (k * 100 + i) for i in range(9)] for k in range(5)]
+
+
+@pytest.mark.parametrize("driver", ["process", "thread"])
+def test_binary_protocol(driver):
+    async def drive(algo):
+        async with algo.run_async(protocol="binary", driver=driver) as p:
+            assert await p.functions.f(3) == 6
+            return [await p.functions.f(i) for i in range(3)]
+
+    with doubling_algorithm() as algo:
+        assert run(drive(algo)) == [0, 2, 4]
+
+
+@pytest.mark.parametrize("driver", ["process", "thread"])
+def test_async_batch(driver):
+    async def drive(algo):
+        async with algo.run_async(driver=driver) as p:
+            assert await p.functions.f(100) == 200
+            async with p.batch(max_pending=7) as batch:
+                futures = [await batch.functions.f(i) for i in range(100)]
+            return [await future.result() for future in futures]
+
+    with doubling_algorithm() as algo:
+        assert run(drive(algo)) == [2 * i for i in range(100)]
+
+
+def test_async_callback():
+    async def c(y):
+        await asyncio.sleep(0)
+        return y * 10
+
+    async def drive(algo):
+        async with algo.run_async() as p:
+            assert await p.functions.g(4, callbacks=[c]) == 41
+
+    with define_algorithm(
+            interface_text="""
+                function g(x) callbacks {
+                    function c(y);
+                }
+                main {
+                    read x;
+                    call z = g(x);
+                    write z;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                int g(int x, int c(int y)) { return c(x) + 1; }
+            """,
+    ) as algo:
+        run(drive(algo))
+
+
+def test_async_time_limit():
+    async def drive(algo):
+        async with algo.run_async() as p:
+            async with p.section(time_limit=0.05):
+                await p.procedures.loop(0)
+                await p.checkpoint()
+
+    with define_algorithm(
+            interface_text="""
+                procedure loop(x);
+                main {
+                    read x;
+                    call loop(x);
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                void loop(int x) { for (volatile int i = x; ; i++); }
+            """,
+    ) as algo:
+        with raises(TimeLimitExceeded):
+            run(drive(algo))
+
+
+def test_async_runtime_error():
+    async def drive(algo):
+        async with algo.run_async() as p:
+            await p.procedures.crash()
+            await p.checkpoint()
+
+    with define_algorithm(
+            interface_text="""
+                procedure crash();
+                main {
+                    call crash();
+                    checkpoint;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                #include <cstdlib>
+                void crash() { abort(); }
+            """,
+    ) as algo:
+        with raises(AlgorithmRuntimeError):
+            run(drive(algo))
+
+
+def test_unknown_driver_mode():
+    with doubling_algorithm() as algo:
+        with raises(ValueError):
+            algo.run_async(driver="fiber")
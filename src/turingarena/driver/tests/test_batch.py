@@ -0,0 +1,90 @@
+import pytest
+
+from turingarena.driver.tests.test_utils import define_algorithm
+
+interface_text = """
+    procedure init(n);
+    function f(i);
+
+    main {
+        read n;
+        call init(n);
+        for i to n {
+            call x = f(i);
+            write x;
+        }
+    }
+"""
+
+source_text = """
+    int N;
+    void init(int n) { N = n; }
+    int f(int i) { return i * N; }
+"""
+
+
+@pytest.mark.parametrize("protocol", ["text", "binary"])
+def test_batch(protocol):
+    n = 1000
+    with define_algorithm(
+            interface_text=interface_text,
+            language_name="C++",
+            source_text=source_text,
+    ) as algo:
+        with algo.run(protocol=protocol) as p:
+            with p.batch(max_pending=100) as batch:
+                batch.procedures.init(n)
+                futures = [batch.functions.f(i) for i in range(n)]
+            assert [f.result() for f in futures] == [i * n for i in range(n)]
+
+
+def test_batch_result_flushes():
+    with define_algorithm(
+            interface_text=interface_text,
+            language_name="C++",
+            source_text=source_text,
+    ) as algo:
+        with algo.run() as p:
+            with p.batch() as batch:
+                batch.procedures.init(2)
+                first = batch.functions.f(0)
+                assert not first.done()
+                assert first.result() == 0
+                second = batch.functions.f(1)
+            assert second.result() == 2
+
+
+def test_batch_rejects_callbacks():
+    with define_algorithm(
+            interface_text=interface_text,
+            language_name="C++",
+            source_text=source_text,
+    ) as algo:
+        with algo.run() as p:
+            with p.batch() as batch:
+                with pytest.raises(ValueError):
+                    batch.procedures.init(1, callbacks=[lambda: None])
+                batch.procedures.init(1)
+            assert p.functions.f(0) == 0
+
+
+def test_batch_body_raises():
+    with define_algorithm(
+            interface_text=interface_text,
+            language_name="C++",
+            source_text=source_text,
+    ) as algo:
+        with algo.run() as p:
+            with pytest.raises(KeyError):
+                with p.batch() as batch:
+                    batch.procedures.init(2)
+                    future = batch.functions.f(0)
+                    raise KeyError("stop")
+            # the queued calls are not sent, and do not stay pending
+            with pytest.raises(KeyError):
+                future.result()
+            assert future.done()
+
+            p.procedures.init(2)
+            assert p.functions.f(0) == 0
+            assert p.functions.f(1) == 2
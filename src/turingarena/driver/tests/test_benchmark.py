@@ -1,4 +1,23 @@
+import functools
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from turingarena.driver.benchmark import BenchmarkConfig, benchmark_language, benchmark_languages, compare, \
+    format_results, percentiles
+from turingarena.driver.common.nodes import IntLiteral, Variable
+from turingarena.driver.drive.context import ExecutionContext
+from turingarena.driver.drive.execution import Executor
 from turingarena.driver.tests.test_utils import define_algorithm
+from turingarena.util import visitor as visitor_module
+from turingarena.util.visitor import Visitor, _resolve_handlers
+
+
+def _time_per_op(f, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        f()
+    return (time.perf_counter() - start) / n
 
 
 def test_single_call():
@@ -46,3 +65,239 @@ def test_multiple_calls():
             p.procedures.p(N)
             for i in range(N):
                 p.procedures.p(0)
+
+
+def test_visitor_dispatch(monkeypatch):
+    resolved = []
+
+    def resolve_handlers(*args):
+        resolved.append(args)
+        return _resolve_handlers(*args)
+
+    monkeypatch.setattr(visitor_module, "_resolve_handlers", resolve_handlers)
+
+    class FreshExecutor(Executor):
+        __slots__ = []
+
+    executor = FreshExecutor._make([None] * len(Executor._fields))
+    # handled by the `transform_object` fallback, after walking the whole MRO
+    literal = IntLiteral(1)
+    for i in range(1000):
+        assert executor.transform(literal) is literal
+
+    # handlers are resolved once per visitor class and node class, then taken from the dispatch table
+    assert len(resolved) == 1
+
+
+def _mro_walk_dispatch(self, node):
+    # per-call dispatch, as done before handlers were cached, for comparison
+    for cls in node.__class__.__mro__:
+        try:
+            method = getattr(self, f"transform_{cls.__name__}")
+        except AttributeError:
+            continue
+        ans = method(node)
+        if ans is not NotImplemented:
+            return ans
+
+
+def test_visitor_dispatch_overhead():
+    executor = Executor._make([None] * len(Executor._fields))
+    # handled by the `transform_object` fallback, after walking the whole MRO
+    literal = IntLiteral(1)
+    N = 100000
+
+    mro_walk_time = _time_per_op(lambda: _mro_walk_dispatch(executor, literal), N)
+    dispatch_table_time = _time_per_op(lambda: executor.transform(literal), N)
+    assert _mro_walk_dispatch(executor, literal) is executor.transform(literal) is literal
+
+    print(f"Dispatch overhead per node: {mro_walk_time * 1e9:.0f} ns (MRO walk), "
+          f"{dispatch_table_time * 1e9:.0f} ns (dispatch table)")
+
+
+def test_decorated_handler():
+    def decorated(f):
+        @functools.lru_cache()
+        def handler(self, node):
+            return f(self, node)
+        return handler
+
+    class Counter(Visitor):
+        def __init__(self):
+            self.name = "counter"
+
+        @decorated
+        def visit_IntLiteral(self, node):
+            return (self.name, node.value)
+
+    assert Counter().visit(IntLiteral(1)) == ("counter", 1)
+
+
+def test_matrix():
+    with define_algorithm(
+            interface_text="""
+                function p(n, m, a[][]);
+
+                main {
+                    read n, m;
+                    for i to n {
+                        for j to m {
+                            read a[i][j];
+                        }
+                    }
+                    call s = p(n, m, a);
+                    write s;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                int p(int n, int m, int **a) {
+                    int s = 0;
+                    for (int i = 0; i < n; i++) for (int j = 0; j < m; j++) s += (i + 1) * a[i][j];
+                    return s;
+                }
+            """,
+    ) as algo:
+        N = 300
+        M = 300
+        matrix = [[j % 7 for j in range(M)] for _ in range(N)]
+        print(f"Sending a {N}x{M} matrix...")
+        with algo.run() as p:
+            start = time.perf_counter()
+            # each element is bound, and received, at its own position
+            assert p.functions.p(N, M, matrix) == sum((i + 1) * v for i, row in enumerate(matrix) for v in row)
+            print(f"Sent in {time.perf_counter() - start:.2f} s")
+
+
+class ChainedScope:
+    # the alternative to copying: extensions add a scope without copying, lookups walk the scopes
+    __slots__ = ["local", "parent"]
+
+    def __init__(self, local, parent=None):
+        self.local = local
+        self.parent = parent
+
+    def extend(self, assignments):
+        return ChainedScope(dict(assignments), self)
+
+    def __getitem__(self, key):
+        scope = self
+        while scope is not None:
+            if key in scope.local:
+                return scope.local[key]
+            scope = scope.parent
+        raise KeyError(key)
+
+
+def test_bindings_extend():
+    # sizes of the bindings seen by the executor in a loop of calls (see `test_bindings_size`),
+    # and larger ones, for comparison
+    N = 20000
+    for size, depth in [(4, 2), (8, 4), (64, 4), (1024, 4)]:
+        flat = {Variable(f"v{i}"): i for i in range(size)}
+        scope = ChainedScope(dict(flat))
+        for d in range(depth):
+            scope = scope.extend([(Variable(f"d{d}"), d)])
+            flat = {**flat, **dict([(Variable(f"d{d}"), d)])}
+        key = Variable("v0")
+        assignment = [(Variable("x"), 1)]
+
+        copy_extend = _time_per_op(lambda: {**flat, **dict(assignment)}, N)
+        scope_extend = _time_per_op(lambda: scope.extend(assignment), N)
+        copy_lookup = _time_per_op(lambda: flat[key], N)
+        scope_lookup = _time_per_op(lambda: scope[key], N)
+        assert flat[key] == scope[key] == 0
+
+        print(
+            f"{size} bindings: extend {copy_extend * 1e9:.0f} ns (dict copy), {scope_extend * 1e9:.0f} ns (scope), "
+            f"lookup {copy_lookup * 1e9:.0f} ns (dict), {scope_lookup * 1e9:.0f} ns (scope)"
+        )
+
+
+def test_bindings_size(monkeypatch):
+    sizes = []
+    with_assigments = ExecutionContext.with_assigments
+
+    def recording_with_assigments(self, assignments):
+        context = with_assigments(self, assignments)
+        sizes.append(len(context.bindings))
+        return context
+
+    monkeypatch.setattr(ExecutionContext, "with_assigments", recording_with_assigments)
+    with define_algorithm(
+            interface_text="""
+                function f(x);
+                main {
+                    read n;
+                    call a = f(n);
+                    write a;
+                    for i to n {
+                        read x;
+                        call b = f(x);
+                        write b;
+                    }
+                }
+            """,
+            language_name="C++",
+            source_text="int f(int x) { return x; }",
+    ) as algo:
+        N = 1000
+        with algo.run() as p:
+            assert p.functions.f(N) == N
+            for i in range(N):
+                assert p.functions.f(i) == i
+
+    # the bindings do not grow with the number of iterations
+    assert len(sizes) > N
+    assert max(sizes) <= 8
+
+
+def test_percentiles():
+    stats = percentiles(list(range(100, 0, -1)))
+    assert stats["count"] == 100
+    assert stats["p50"] == 50
+    assert stats["p90"] == 90
+    assert stats["p99"] == 99
+    assert stats["mean"] == 50.5
+
+    stats = percentiles([3.0])
+    assert stats["p50"] == stats["p99"] == 3.0
+
+
+def test_compare_with_baseline():
+    baseline = {"C++": {"call": {"p50": 1.0}, "startup": {"p50": 1.0}}}
+    results = {
+        "C++": {"call": {"p50": 1.5}, "startup": {"p50": 1.1}, "callback": {"p50": 9.0}},
+        "Python": {"error": "failed"},
+    }
+    [regression] = compare(results, baseline, threshold=0.2)
+    assert regression.language == "C++"
+    assert regression.metric == "call"
+    assert regression.ratio == 1.5
+
+
+def test_benchmark_language(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+
+        config = BenchmarkConfig(calls=10, arrays=2, array_size=100, callbacks=10, runs=2)
+        results = benchmark_language("C++", config)
+        assert results["call"]["count"] == 20
+        assert results["array"]["count"] == 4
+        assert results["callback"]["count"] == 20
+        assert results["startup"]["count"] == 2
+        assert results["compile"]["count"] == 2
+        print("\n".join(format_results({"C++": results})))
+
+        # builds are isolated from the cache of the user
+        assert os.listdir(cache_dir) == []
+
+
+def test_not_benchmarked():
+    results = benchmark_languages(["Go", "Bash", "javascript"])
+    assert results == {
+        "Go": {"not_benchmarked": "language not supported"},
+        "Bash": {"not_benchmarked": "language not supported"},
+        "javascript": {"not_benchmarked": "language not supported"},
+    }
+    assert format_results(results)[:2] == ["Go:", "    not benchmarked: language not supported"]
@@ -0,0 +1,299 @@
+import os
+import shutil
+import subprocess
+import time
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from turingarena.driver.cache import BuildCache, cache_key, tool_cache
+from turingarena.driver.languages.go.runner import GoProgramRunner
+from turingarena.driver.tests.test_utils import define_algorithm
+
+
+def write_file(path, content):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_cache_key():
+    assert cache_key("a", "b") == cache_key("a", "b")
+    assert cache_key("a", "b") != cache_key("ab")
+    assert cache_key("a", b"b") == cache_key("a", "b")
+
+
+def test_store_fetch():
+    with TemporaryDirectory() as cache_dir, TemporaryDirectory() as work_dir:
+        cache = BuildCache(cache_dir)
+
+        artifact_path = os.path.join(work_dir, "artifact")
+        fetched_path = os.path.join(work_dir, "fetched")
+        write_file(artifact_path, "content")
+
+        assert not cache.fetch("key", {"artifact": fetched_path})
+        assert not os.path.exists(fetched_path)
+
+        cache.store("key", {"artifact": artifact_path})
+        # storing twice is harmless
+        cache.store("key", {"artifact": artifact_path})
+
+        assert cache.fetch("key", {"artifact": fetched_path})
+        assert read_file(fetched_path) == "content"
+
+
+def test_store_fetch_directory():
+    with TemporaryDirectory() as cache_dir, TemporaryDirectory() as work_dir:
+        cache = BuildCache(cache_dir)
+
+        classes_path = os.path.join(work_dir, "classes")
+        os.mkdir(classes_path)
+        write_file(os.path.join(classes_path, "A.class"), "A")
+        write_file(os.path.join(classes_path, "B.class"), "B")
+
+        cache.store("key", {"classes": classes_path})
+
+        fetched_path = os.path.join(work_dir, "fetched")
+        assert cache.fetch("key", {"classes": fetched_path})
+        assert sorted(os.listdir(fetched_path)) == ["A.class", "B.class"]
+
+
+def test_data():
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir)
+        assert cache.load_data("key", "data") is None
+        cache.store_data("key", "data", b"\x00\x01")
+        assert cache.load_data("key", "data") == b"\x00\x01"
+
+
+def test_eviction():
+    with TemporaryDirectory() as cache_dir, TemporaryDirectory() as work_dir:
+        cache = BuildCache(cache_dir, max_size=250)
+
+        for key in ["a", "b", "c"]:
+            cache.store_data(key, "data", b"x" * 100)
+            # make sure modification times are distinct
+            time.sleep(0.01)
+            os.utime(cache._entry_path(key), (time.time(), time.time()))
+
+        assert cache.load_data("a", "data") is None
+        assert cache.load_data("b", "data") is not None
+        assert cache.load_data("c", "data") is not None
+
+
+def test_disabled():
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir, max_size=0)
+        cache.store_data("key", "data", b"data")
+        assert cache.load_data("key", "data") is None
+
+
+def test_staging_entry_error():
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir)
+
+        with pytest.raises(FileNotFoundError):
+            with cache.staging_entry("key") as entry_path:
+                write_file(os.path.join(entry_path, "missing", "data"), "data")
+        # not published, and nothing left behind
+        assert cache.entry_path("key") is None
+        assert os.listdir(os.path.join(cache_dir, "entries")) == []
+
+        # an entry already present is kept
+        cache.store_data("key", "data", b"first")
+        with cache.staging_entry("key") as entry_path:
+            write_file(os.path.join(entry_path, "data"), "second")
+        assert cache.load_data("key", "data") == b"first"
+
+
+def cache_entries(cache_dir, artifact):
+    entries_dir = os.path.join(cache_dir, "build", "entries")
+    return [
+        e
+        for e in os.listdir(entries_dir)
+        if not e.startswith(".") and os.path.exists(os.path.join(entries_dir, e, artifact))
+    ]
+
+
+def run_incrementer(source_text, language_name="C++"):
+    with define_algorithm(
+            interface_text="""
+                function f(x);
+                main {
+                    read x;
+                    call y = f(x);
+                    write y;
+                }
+            """,
+            language_name=language_name,
+            source_text=source_text,
+    ) as algo:
+        with algo.run() as p:
+            assert p.functions.f(41) == 42
+
+
+def test_cached_executable(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+
+        run_incrementer("int f(int x) { return x + 1; }")
+        run_incrementer("int f(int x) { return x + 1; }")
+
+        assert len(cache_entries(cache_dir, "algorithm")) == 1
+        assert len(cache_entries(cache_dir, "skeleton.o")) == 1
+
+
+def test_cached_skeleton_object(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+
+        run_incrementer("int f(int x) { return x + 1; }")
+        run_incrementer("int f(int x) { return 1 + x; }")
+
+        # two executables, sharing the skeleton object
+        assert len(cache_entries(cache_dir, "algorithm")) == 2
+        assert len(cache_entries(cache_dir, "skeleton.o")) == 1
+
+
+def test_entry_path():
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir)
+        assert cache.entry_path("key") is None
+        cache.store_data("key", "data", b"data")
+        assert read_file(os.path.join(cache.entry_path("key"), "data")) == "data"
+
+
+def test_tool_cache(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+        with tool_cache("go") as directory:
+            assert directory == os.path.join(cache_dir, "build", "tools", "go")
+            assert os.path.isdir(directory)
+
+        monkeypatch.setenv("TURINGARENA_CACHE_SIZE", "0")
+        with tool_cache("go") as directory:
+            assert directory is None
+
+
+def test_tool_directory_eviction():
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir, max_size=250)
+
+        with cache.tool_directory("tool") as directory:
+            write_file(os.path.join(directory, "data"), "x" * 100)
+            # not evicted while in use, even if the cache is full
+            for key in ["a", "b"]:
+                cache.store_data(key, "data", b"x" * 100)
+                time.sleep(0.01)
+            assert os.path.exists(os.path.join(directory, "data"))
+
+        # accounted on exit, the least recently used entry goes first
+        # (checked without loading the entries, which would make them recently used)
+        assert not os.path.exists(cache._entry_path("a"))
+        assert os.path.exists(cache._entry_path("b"))
+        assert os.path.exists(os.path.join(directory, "data"))
+
+        # the tool directory was used more recently than "b"
+        time.sleep(0.01)
+        cache.store_data("c", "data", b"x" * 100)
+        assert not os.path.exists(cache._entry_path("b"))
+        assert os.path.exists(os.path.join(directory, "data"))
+
+        time.sleep(0.01)
+        cache.store_data("d", "data", b"x" * 100)
+        assert not os.path.exists(directory)
+        assert os.path.exists(cache._entry_path("c"))
+
+
+def test_recorded_sizes():
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir, max_size=250)
+
+        cache.store_data("a", "data", b"x" * 100)
+        size_path = os.path.join(cache._entry_path("a"), BuildCache.ENTRY_SIZE_NAME)
+        assert int(read_file(size_path)) == 100
+
+        with cache.tool_directory("tool") as directory:
+            write_file(os.path.join(directory, "data"), "x" * 100)
+        assert int(read_file(cache._tool_size_path("tool"))) == 100
+
+        # eviction uses the recorded sizes, without measuring again
+        write_file(os.path.join(directory, "more"), "x" * 1000)
+        time.sleep(0.01)
+        cache.store_data("b", "data", b"x" * 10)
+        assert os.path.exists(cache._entry_path("a"))
+        assert os.path.exists(directory)
+
+        # re-measured when released, then evicted with the entries
+        with cache.tool_directory("tool"):
+            pass
+        assert not os.path.exists(cache._entry_path("a"))
+        assert not os.path.exists(directory)
+        assert not os.path.exists(cache._tool_size_path("tool"))
+
+
+def tool_dirs(cache_dir):
+    tools_dir = os.path.join(cache_dir, "build", "tools")
+    if not os.path.exists(tools_dir):
+        return []
+    return [t for t in os.listdir(tools_dir) if not t.startswith(".")]
+
+
+RUST_INCREMENTER = "pub fn f(x: i64) -> i64 { x + 1 }"
+
+
+@pytest.mark.skipif(shutil.which("rustc") is None, reason="rustc not available")
+def test_rust_incremental(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+        monkeypatch.setenv("TURINGARENA_RUSTC_OPT_LEVEL", "0")
+
+        run_incrementer(RUST_INCREMENTER, language_name="Rust")
+        run_incrementer(RUST_INCREMENTER.replace("x + 1", "1 + x"), language_name="Rust")
+
+        # shared by the submissions of the same interface
+        [tool_dir] = tool_dirs(cache_dir)
+        assert tool_dir.startswith("rust-incremental-")
+        assert len(cache_entries(cache_dir, "algorithm")) == 2
+
+        cache = BuildCache(os.path.join(cache_dir, "build"), max_size=1)
+        cache.evict()
+        assert tool_dirs(cache_dir) == []
+
+
+@pytest.mark.skipif(shutil.which("rustc") is None, reason="rustc not available")
+def test_rust_optimized_not_incremental(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+        monkeypatch.delenv("TURINGARENA_RUSTC_OPT_LEVEL", raising=False)
+
+        run_incrementer(RUST_INCREMENTER, language_name="Rust")
+        assert tool_dirs(cache_dir) == []
+
+
+@pytest.mark.skipif(shutil.which("go") is None, reason="go not available")
+def test_go_build_cache(monkeypatch):
+    with TemporaryDirectory() as cache_dir, TemporaryDirectory() as work_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+        source_path = os.path.join(work_dir, "main.go")
+        write_file(source_path, 'package main\n\nimport "fmt"\n\nfunc main() { fmt.Println(42) }\n')
+
+        for _ in range(2):
+            with tool_cache("go") as gocache:
+                subprocess.run(
+                    ["go", "build", "-o", os.path.join(work_dir, "main"), source_path],
+                    check=True,
+                    env=GoProgramRunner._go_env(gocache),
+                )
+        assert subprocess.check_output([os.path.join(work_dir, "main")]) == b"42\n"
+
+        assert tool_dirs(cache_dir) == ["go"]
+        assert os.listdir(os.path.join(cache_dir, "build", "tools", "go"))
+
+        cache = BuildCache(os.path.join(cache_dir, "build"), max_size=1)
+        cache.evict()
+        assert tool_dirs(cache_dir) == []
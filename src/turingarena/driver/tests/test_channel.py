@@ -0,0 +1,142 @@
+import io
+from array import array
+
+import pytest
+
+from turingarena.driver.client.channel import BinaryChannel, TextChannel
+from turingarena.driver.tests.test_utils import define_algorithm
+
+
+def as_lists(value):
+    if isinstance(value, (list, array)):
+        return [as_lists(item) for item in value]
+    return value
+
+
+def matrix_view(rows, columns):
+    return memoryview(array("q", range(rows * columns))).cast("B").cast("q", [rows, columns])
+
+
+def loopback(channel_class, buffer_class):
+    buffer = buffer_class()
+    return buffer, channel_class(input=buffer, output=buffer)
+
+
+@pytest.mark.parametrize("channel_class, buffer_class", [
+    (TextChannel, io.StringIO),
+    (BinaryChannel, io.BytesIO),
+])
+def test_channel_roundtrip(channel_class, buffer_class):
+    buffer, channel = loopback(channel_class, buffer_class)
+
+    values = [
+        0, -1, 2 ** 70, [], [1, 2, 3], [[1, 2], [], [3]], [[[1], [2, 2 ** 64]]],
+    ]
+
+    channel.send("call")
+    channel.send(42)
+    channel.send(True)
+    channel.send(1.5)
+    for v in values:
+        channel.send_data(v)
+
+    buffer.seek(0)
+
+    assert channel.receive_str() == "call"
+    assert channel.receive_int() == 42
+    assert channel.receive_int() == 1
+    assert channel.receive_float() == 1.5
+    for v in values:
+        assert as_lists(channel.receive_data()) == v
+
+    with pytest.raises(EOFError):
+        channel.receive_int()
+
+
+def test_binary_channel_packed_array():
+    buffer, channel = loopback(BinaryChannel, io.BytesIO)
+    channel.send_data(list(range(1000)))
+    # tag, length, then 8 bytes per item
+    assert len(buffer.getvalue()) == 1 + 8 + 8 * 1000
+
+
+@pytest.mark.parametrize("channel_class, buffer_class", [
+    (TextChannel, io.StringIO),
+    (BinaryChannel, io.BytesIO),
+])
+def test_channel_buffers(channel_class, buffer_class):
+    buffer, channel = loopback(channel_class, buffer_class)
+
+    values = [
+        array("q", [1, -2, 3]),
+        array("b", [1, -2, 3]),
+        array("Q", [2 ** 64 - 1]),
+        matrix_view(3, 2),
+        matrix_view(1, 3),
+    ]
+
+    for v in values:
+        channel.send_data(v)
+
+    buffer.seek(0)
+
+    for v in values:
+        assert as_lists(channel.receive_data()) == memoryview(v).tolist()
+
+
+def test_binary_channel_numpy():
+    numpy = pytest.importorskip("numpy")
+
+    buffer, channel = loopback(BinaryChannel, io.BytesIO)
+    a = numpy.arange(12, dtype=numpy.int32).reshape(3, 4)
+    channel.send_data(a)
+    channel.send_data(a.T)
+
+    buffer.seek(0)
+
+    assert as_lists(channel.receive_data()) == a.tolist()
+    assert as_lists(channel.receive_data()) == a.T.tolist()
+
+
+def test_binary_protocol():
+    with define_algorithm(
+            interface_text="""
+                function f(n, a[], b[][]);
+                function g(x) callbacks {
+                    function c(x);
+                }
+
+                main {
+                    read n;
+                    for i to n {
+                        read a[i];
+                        for j to n {
+                            read b[i][j];
+                        }
+                    }
+                    call r = f(n, a, b);
+                    write r;
+                    call s = g(r) callbacks {
+                        function c(x) {
+                            write x;
+                            read y;
+                            return y;
+                        }
+                    }
+                    write s;
+                }
+            """,
+            language_name="C++",
+            source_text="""
+                int f(int n, int a[], int **b) {
+                    int r = 0;
+                    for (int i = 0; i < n; i++) for (int j = 0; j < n; j++) r += a[i] * b[i][j];
+                    return r;
+                }
+                int g(int x, int c(int)) { return -c(x); }
+            """,
+    ) as algo:
+        with algo.run(protocol="binary") as p:
+            r = p.functions.f(2, array("q", [1, 2]), matrix_view(2, 2))
+            assert r == 1 * (0 + 1) + 2 * (2 + 3)
+            assert p.functions.g(r, callbacks=[lambda x: x + 1]) == -(r + 1)
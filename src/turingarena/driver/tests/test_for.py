@@ -74,4 +74,70 @@ def test_double_for():
             assert p.functions.f(n, m, a) == 42
             for i in range(n):
                 for j in range(m):
-                    assert p.functions.g(i, j) == i * j
\ No newline at end of file
+                    assert p.functions.g(i, j) == i * j
+
+def test_for_multiple_reads():
+    with define_algorithm(
+            interface_text="""
+            function f(n, a[], b[]);
+
+            main {
+                read n;
+                for i to n {
+                    read a[i], b[i];
+                }
+
+                call r = f(n, a, b);
+                write r;
+            }
+        """,
+            language_name="C++",
+            source_text="""
+            int f(int n, int a[], int b[]) {
+                int r = 0;
+                for (int i = 0; i < n; i++) r += a[i] * (i + 1) - b[i];
+                return r;
+            }
+        """,
+    ) as algorithm:
+        with algorithm.run() as p:
+            a = [1, 2, 3, 4]
+            b = [5, 1, 0, 2]
+            assert p.functions.f(len(a), a, b) == sum(x * (i + 1) - y for i, (x, y) in enumerate(zip(a, b)))
+
+
+def test_for_mixed_reads():
+    with define_algorithm(
+            interface_text="""
+            function f(n, m, a[], b[][]);
+
+            main {
+                read n, m;
+                for i to n {
+                    read a[i];
+                    for j to m {
+                        read b[i][j];
+                    }
+                }
+
+                call r = f(n, m, a, b);
+                write r;
+            }
+        """,
+            language_name="C++",
+            source_text="""
+            int f(int n, int m, int a[], int **b) {
+                int r = 0;
+                for (int i = 0; i < n; i++) for (int j = 0; j < m; j++) r += a[i] * b[i][j] * (j + 1);
+                return r;
+            }
+        """,
+    ) as algorithm:
+        with algorithm.run() as p:
+            a = [1, 2, 3]
+            b = [[1, 2], [3, 4], [5, 6]]
+            assert p.functions.f(len(a), 2, a, b) == sum(
+                x * y * (j + 1)
+                for x, row in zip(a, b)
+                for j, y in enumerate(row)
+            )
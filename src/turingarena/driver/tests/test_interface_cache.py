@@ -0,0 +1,95 @@
+import os
+from collections import OrderedDict
+from tempfile import TemporaryDirectory
+
+from turingarena.driver.cache import BuildCache
+from turingarena.driver.common import analysis as common_analysis
+from turingarena.driver.common import nodes
+from turingarena.driver.compile import compile as compile_module
+from turingarena.driver.compile.compile import compile_interface
+from turingarena.driver.language import Language
+from turingarena.driver.sandbox import runner as runner_module
+from turingarena.util import visitor
+
+interface_text = """
+    function f(x);
+    main {
+        read x;
+        call y = f(x);
+        write y;
+    }
+"""
+
+
+def test_compile_interface_memoized():
+    assert compile_interface(interface_text) is compile_interface(interface_text)
+
+
+def test_compile_interface_disk_cache(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        monkeypatch.setenv("TURINGARENA_CACHE_DIR", cache_dir)
+        monkeypatch.setattr(compile_module, "_compiled_interfaces", OrderedDict())
+
+        interface = compile_interface(interface_text)
+
+        # simulate a new process, which finds the interface in the cache
+        monkeypatch.setattr(compile_module, "_compiled_interfaces", OrderedDict())
+        monkeypatch.setattr(compile_module.Compiler, "create", None)
+
+        cached_interface = compile_interface(interface_text)
+        assert cached_interface is not interface
+        assert repr(cached_interface) == repr(interface)
+
+
+def test_compile_interface_memo_bounded(monkeypatch):
+    monkeypatch.setattr(compile_module, "INTERFACE_MEMO_SIZE", 2)
+    monkeypatch.setattr(compile_module, "_compiled_interfaces", OrderedDict())
+
+    texts = [interface_text.replace("f(x)", f"f{i}(x)") for i in range(3)]
+    interfaces = [compile_interface(text) for text in texts]
+    assert len(compile_module._compiled_interfaces) == 2
+    assert compile_interface(texts[2]) is interfaces[2]
+    assert compile_interface(texts[0]) is not interfaces[0]
+
+
+def test_compile_interface_cache_disabled(monkeypatch):
+    with TemporaryDirectory() as cache_dir:
+        cache = BuildCache(cache_dir, max_size=0)
+        # not memoized, even if compiled before
+        interface = compile_interface(interface_text)
+        assert compile_interface(interface_text, cache) is not interface
+        assert compile_interface(interface_text, cache) is not compile_interface(interface_text, cache)
+
+
+def test_compiler_sources():
+    sources = compile_module.compiler_sources()
+    for module in [compile_module, common_analysis, nodes, visitor]:
+        assert module.__file__ in sources
+
+
+def test_compiler_fingerprint_changes_with_sources(monkeypatch):
+    with TemporaryDirectory() as source_dir:
+        source_path = os.path.join(source_dir, "module.py")
+        with open(source_path, "w") as f:
+            f.write("x = 1\n")
+        monkeypatch.setattr(compile_module, "compiler_sources", lambda: [source_path])
+        fingerprint = compile_module.compiler_fingerprint.__wrapped__()
+
+        with open(source_path, "w") as f:
+            f.write("x = 2\n")
+        assert compile_module.compiler_fingerprint.__wrapped__() != fingerprint
+
+
+def test_skeleton_memo_bounded(monkeypatch):
+    monkeypatch.setattr(runner_module, "SKELETON_MEMO_SIZE", 2)
+    monkeypatch.setattr(runner_module, "_skeleton_sources", OrderedDict())
+    language = Language.from_name("C++")
+    interfaces = [compile_interface(interface_text.replace("f(x)", f"f{i}(x)")) for i in range(3)]
+
+    sources = [runner_module.generate_skeleton(language, interface) for interface in interfaces]
+    assert "f2" in sources[2]
+    assert len(runner_module._skeleton_sources) == 2
+
+    # the least recently used is generated again
+    assert runner_module.generate_skeleton(language, interfaces[0]) == sources[0]
+    assert len(runner_module._skeleton_sources) == 2
@@ -0,0 +1,70 @@
+import os
+
+import turingarena.driver.sandbox.pool as pool_module
+from turingarena.driver.sandbox.pool import WarmProcessPool, warm_process_pool
+from turingarena.driver.tests.test_utils import define_algorithm
+
+ECHO = ["python3", "-c", "import sys; print(sys.stdin.readline().strip())"]
+
+
+def echo(connection, line):
+    print(line, file=connection.downward)
+    connection.downward.flush()
+    return connection.upward.readline().strip()
+
+
+def test_acquire():
+    pool = WarmProcessPool(ECHO, size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+
+    assert first.manager.os_process.pid != second.manager.os_process.pid
+    assert len(pool._connections) == 2
+    assert echo(first, "a") == "a"
+    assert echo(second, "b") == "b"
+    pool._close()
+
+
+def test_disabled():
+    pool = WarmProcessPool(ECHO, size=0)
+    assert echo(pool.acquire(), "a") == "a"
+    assert not pool._connections
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("TURINGARENA_WARM_SANDBOXES", raising=False)
+    assert pool_module.warm_pool_size() == 0
+
+
+def test_shared_pool():
+    assert warm_process_pool(ECHO) is warm_process_pool(ECHO)
+
+
+def test_python_runs(monkeypatch):
+    monkeypatch.setenv("TURINGARENA_WARM_SANDBOXES", "1")
+    with define_algorithm(
+            interface_text="""
+                function f(x);
+                main {
+                    read x;
+                    call y = f(x);
+                    write y;
+                }
+            """,
+            language_name="Python",
+            source_text="""if True:
+                def f(x):
+                    return 2 * x
+            """,
+    ) as algo:
+        for i in range(3):
+            with algo.run() as p:
+                assert p.functions.f(i) == 2 * i
+
+    # a started interpreter is waiting for the next run
+    [pool] = [
+        pool
+        for (args, kwargs), pool in pool_module._pools.items()
+        if args[-1].endswith(os.path.join("python", "sandbox.py"))
+    ]
+    assert len(pool._connections) == 1
@@ -0,0 +1,53 @@
+from turingarena.driver.common.nodes import Block
+from turingarena.driver.compile.compile import compile_interface
+from turingarena.driver.drive.execution import Executor
+from turingarena.util import memo
+
+
+def create_executor():
+    return Executor._make([None] * len(Executor._fields))
+
+
+def test_transformed_main_reused():
+    interface = compile_interface("""
+        function f(a[]);
+        main {
+            read n;
+            for i to n {
+                read a[i];
+            }
+            call f(a);
+            checkpoint;
+        }
+    """)
+
+    main = create_executor().transformed_main(interface)
+    assert create_executor().transformed_main(interface) is main
+
+    # analyses are computed once per node
+    executor = create_executor()
+    assert executor.first_requests(main) is executor.first_requests(main)
+    assert executor.reference_actions(main) is executor.reference_actions(main)
+
+
+def test_node_memo_bounded(monkeypatch):
+    monkeypatch.setattr(memo, "NODE_MEMO_SIZE", 4)
+    computed = []
+
+    class Analyzer:
+        @memo.node_memoized
+        def analyze(self, n):
+            computed.append(n)
+            return len(n.children)
+
+    analyzer = Analyzer()
+    blocks = [Block(children=[]) for _ in range(10)]
+    for block in blocks:
+        analyzer.analyze(block)
+    assert len(Analyzer.analyze.memo) == 4
+
+    # the most recent are still cached, the others are computed again
+    analyzer.analyze(blocks[-1])
+    assert len(computed) == 10
+    analyzer.analyze(blocks[0])
+    assert len(computed) == 11
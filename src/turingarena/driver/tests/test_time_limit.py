@@ -1,3 +1,8 @@
+import os
+import subprocess
+import sys
+import time
+
 from pytest import raises, approx
 
 from turingarena import TimeLimitExceeded
@@ -76,3 +81,95 @@ def test_time_limit_process_exceeded():
                 p.checkpoint()
                 p.procedures.slow(0)
                 p.checkpoint()
+
+
+def test_resource_usage_only_on_request(monkeypatch):
+    from turingarena.driver.sandbox.popen import PopenProcessManager
+
+    stops = []
+    reads = []
+    get_status = PopenProcessManager.get_status
+
+    def counting_get_status(self, kill_reason=None, stop=False):
+        if kill_reason is None:
+            (stops if stop else reads).append(1)
+        return get_status(self, kill_reason=kill_reason, stop=stop)
+
+    monkeypatch.setattr(PopenProcessManager, "get_status", counting_get_status)
+
+    with my_algo() as algo:
+        with algo.run() as p:
+            p.procedures.fast(0)
+            p.checkpoint()
+            # read without stopping the process
+            assert p.current_memory_usage > 0
+            with p.section():
+                p.procedures.slow(0)
+                p.checkpoint()
+
+    # main section entry, inner section entry and exit (the main section exit reuses the last one)
+    assert len(stops) == 3
+    assert len(reads) == 1
+
+
+def test_time_limit_enforced_while_running():
+    with define_algorithm(
+            interface_text="""
+                procedure loop();
+                main {
+                    call loop();
+                    checkpoint;
+                }
+            """,
+            language_name="Python",
+            source_text="""if True:
+                def loop():
+                    while True:
+                        pass
+            """,
+    ) as algo:
+        with algo.run() as p:
+            start = time.perf_counter()
+            with raises(TimeLimitExceeded):
+                with p.section(time_limit=0.1):
+                    p.procedures.loop()
+                    p.checkpoint()
+            # the process is killed by the driver, instead of running until the global timeout
+            assert time.perf_counter() - start < 2.0
+
+
+def test_time_limit_does_not_wait_for_status():
+    from turingarena.driver.sandbox.popen import PopenProcessManager
+
+    os_process = subprocess.Popen([sys.executable, "-c", "while True: pass"])
+    manager = PopenProcessManager(os_process)
+    # as if the driver was taking a snapshot of the process
+    with manager._lock:
+        manager.set_time_limit(0.1)
+        start = time.perf_counter()
+        while manager._read_proc_stat()[2] != "Z":
+            assert time.perf_counter() - start < 2.0
+            time.sleep(0.01)
+
+    info = manager.get_status()
+    assert manager.time_limit_exceeded
+    assert info.error == "killed because: time limit exceeded"
+
+
+def test_time_usage_is_user_time():
+    from turingarena.driver.sandbox.popen import PopenProcessManager
+
+    # a process spending most of its time in system calls
+    os_process = subprocess.Popen([sys.executable, "-c", "import os\nwhile True: os.stat('/')"])
+    manager = PopenProcessManager(os_process)
+    time.sleep(0.5)
+
+    clock_ticks = os.sysconf("SC_CLK_TCK")
+    for stop in (False, True):
+        info = manager.get_status(stop=stop)
+        user_time, system_time = (int(value) / clock_ticks for value in manager._read_proc_stat()[13:15])
+        assert system_time > 0.1
+        # both with and without stopping the process, system time is not counted
+        assert info.time_usage == approx(user_time, abs=0.05)
+
+    manager.get_status(kill_reason="test done")
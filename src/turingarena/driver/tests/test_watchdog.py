@@ -0,0 +1,53 @@
+import threading
+
+from turingarena.driver.sandbox.watchdog import Watchdog
+
+
+def test_deadlines_in_order():
+    watchdog = Watchdog()
+    fired = []
+    done = threading.Event()
+
+    watchdog.arm(0.03, lambda: fired.append(3) or done.set())
+    watchdog.arm(0.02, lambda: fired.append(2))
+    watchdog.arm(0.01, lambda: fired.append(1))
+
+    assert done.wait(1.0)
+    assert fired == [1, 2, 3]
+
+
+def test_cancel():
+    watchdog = Watchdog()
+    fired = []
+    done = threading.Event()
+
+    deadline = watchdog.arm(0.01, lambda: fired.append("cancelled"))
+    watchdog.arm(0.02, done.set)
+    deadline.cancel()
+
+    assert done.wait(1.0)
+    assert fired == []
+
+
+def test_no_thread_churn():
+    watchdog = Watchdog()
+    threads_before = threading.active_count()
+
+    for _ in range(10000):
+        watchdog.arm(60.0, lambda: None).cancel()
+
+    # a single thread, and cancelled deadlines do not pile up
+    assert threading.active_count() == threads_before + 1
+    assert len(watchdog._heap) <= 1
+
+
+def test_callback_exception():
+    watchdog = Watchdog()
+    done = threading.Event()
+
+    def fail():
+        raise RuntimeError
+
+    watchdog.arm(0.0, fail)
+    watchdog.arm(0.01, done.set)
+    assert done.wait(1.0)
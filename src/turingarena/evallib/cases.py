@@ -0,0 +1,155 @@
+import logging
+import multiprocessing
+import os
+import random
+import threading
+from collections import namedtuple
+
+from turingarena.driver.client.exceptions import AlgorithmError
+from turingarena.driver.sandbox.watchdog import is_watchdog_thread
+
+
+class CaseResult(namedtuple("CaseResult", ["case", "value", "error"])):
+    """
+    Outcome of a test case: either the value returned by the case function,
+    or the error it raised (then `value` is None).
+    """
+
+    __slots__ = []
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+# function and cases of the pool of this worker, inherited through fork
+_worker_function = None
+_worker_cases = None
+
+
+def _init_worker(function, cases):
+    global _worker_function, _worker_cases
+    _worker_function = function
+    _worker_cases = cases
+    # otherwise, all the workers would generate the same random instances
+    random.seed()
+
+
+def _run_case(function, case):
+    try:
+        return CaseResult(case, function(case), None)
+    except AlgorithmError as e:
+        return CaseResult(case, None, e)
+
+
+def _run_worker_case(index):
+    case, value, error = _run_case(_worker_function, _worker_cases[index])
+    if error is not None:
+        # algorithm errors cannot be pickled (they refer to their process), send only type and message
+        error = (type(error), error.message)
+    # the case is known to the parent, no need to send it back
+    return value, error
+
+
+def _get_worker_result(case, async_result):
+    value, error = async_result.get()
+    if error is not None:
+        error_type, message = error
+        error = error_type(message, process=None)
+    return CaseResult(case, value, error)
+
+
+def _can_fork():
+    # other threads may hold locks, which would stay locked in the forked workers
+    return all(
+        thread is threading.current_thread() or is_watchdog_thread(thread)
+        for thread in threading.enumerate()
+    )
+
+
+def _start_pool(function, cases, workers):
+    # workers are forked, so that the function and the cases do not need to be pickled
+    # (the pool starts its own threads only after forking them)
+    context = multiprocessing.get_context("fork")
+    return context.Pool(workers, initializer=_init_worker, initargs=(function, cases))
+
+
+def _stop_pool(pool):
+    pool.terminate()
+    pool.join()
+
+
+def run_cases(function, cases, workers=None, skip=None):
+    """
+    Runs `function(case)` for each test case, in a pool of `workers` processes
+    (by default, one for each CPU), and yields a `CaseResult` for each case, in order.
+
+    Time and memory usage are measured on the sandboxed process of each algorithm (as CPU time),
+    so they are not affected by the cases running concurrently.
+    Algorithm errors raised by `function` are reported in the result, other exceptions are raised by `run_cases`.
+    Cases and the function are inherited by the workers, while returned values must be picklable.
+
+    Workers are forked, which is safe only if the evaluator has no other threads (except the driver watchdog):
+    if it has, the cases are run one at a time in the evaluator, and it must not start threads while iterating.
+
+    Cases are started only when a worker is free. Before starting a case,
+    `skip(case)` is called in the evaluator: if it returns True, the case is not run, and not yielded.
+    Since results are yielded while the other cases are still running,
+    `skip` can see the goals assigned while processing the previous results, e.g.:
+
+        for result in ta.run_cases(run, cases, skip=lambda case: not ta.goals.get(case.goal, True)):
+            if not is_correct(result):
+                ta.goals[result.case.goal] = False
+
+    `skip` is called again on the cases already started, and those it skips are cancelled.
+
+    Goals must be assigned in the evaluator, not in `function`, which runs in a worker.
+    """
+    cases = list(cases)
+    if skip is None:
+        skip = lambda case: False
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers > 1 and not _can_fork():
+        logging.warning("evaluator has running threads, cannot fork workers: running test cases sequentially")
+        workers = 1
+
+    if workers <= 1:
+        for case in cases:
+            if not skip(case):
+                yield _run_case(function, case)
+        return
+
+    pool = _start_pool(function, cases, workers)
+    try:
+        pending = []
+        next_index = 0
+        while pending or next_index < len(cases):
+            while len(pending) < workers and next_index < len(cases):
+                case = cases[next_index]
+                if not skip(case):
+                    pending.append((next_index, case, pool.apply_async(_run_worker_case, (next_index,))))
+                next_index += 1
+
+            if any(skip(case) for _, case, _ in pending):
+                # a pool cannot cancel a single case: stop all the workers, and start again the cases not skipped
+                logging.debug("cancelling skipped test cases")
+                _stop_pool(pool)
+                pool = _start_pool(function, cases, workers)
+                pending = [
+                    (index, case, async_result if async_result.ready() else pool.apply_async(_run_worker_case, (index,)))
+                    for index, case, async_result in pending
+                    if not skip(case)
+                ]
+                continue
+
+            if pending:
+                _, case, async_result = pending.pop(0)
+                yield _get_worker_result(case, async_result)
+        pool.close()
+    finally:
+        # stops the cases still running, if the evaluator stopped iterating
+        _stop_pool(pool)
+        logging.debug("test case workers terminated")
@@ -2,6 +2,8 @@ import json
 import os
 import sys
 
+from turingarena.evaluation.events import DATA_FRAME_HEADER
+
 
 class Submission:
     __slots__ = []
@@ -10,7 +12,30 @@ class Submission:
         return os.environ["SUBMISSION_FILE_" + item.upper()]
 
 
+_data_channel = None
+
+
+def _get_data_channel():
+    global _data_channel
+    if _data_channel is None and "EVALUATION_DATA_FD" in os.environ:
+        fd = int(os.environ["EVALUATION_DATA_FD"])
+        # not for the processes started by the evaluator
+        os.set_inheritable(fd, False)
+        _data_channel = open(fd, "wb")
+    return _data_channel
+
+
 def send_data(*data):
+    channel = _get_data_channel()
+    if channel is not None:
+        # the text printed so far comes before the data
+        sys.stdout.flush()
+        for d in data:
+            payload = json.dumps(d).encode()
+            channel.write(DATA_FRAME_HEADER.pack(len(payload)) + payload)
+        channel.flush()
+        return
+
     print()
     print(os.environ["EVALUATION_DATA_BEGIN"])
     for d in data:
@@ -0,0 +1,136 @@
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from tempfile import TemporaryDirectory
+
+from pytest import raises
+
+from turingarena import AlgorithmRuntimeError
+from turingarena.driver.tests.test_utils import define_algorithm
+from turingarena.evallib.cases import run_cases
+
+
+def _run_test(name):
+    globals()[name].__wrapped__()
+
+
+def in_new_interpreter(test):
+    """
+    Runs the test in a new interpreter, as an evaluator:
+    workers are forked only without other threads, and those of other tests may be still running in this one.
+    """
+
+    @functools.wraps(test)
+    def wrapper():
+        process = multiprocessing.get_context("spawn").Process(target=_run_test, args=(test.__name__,))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+
+    return wrapper
+
+
+def double_algorithm():
+    return define_algorithm(
+        interface_text="""
+            function f(x);
+            main {
+                read x;
+                call y = f(x);
+                write y;
+            }
+        """,
+        language_name="C++",
+        source_text="""
+            #include <cstdlib>
+            int f(int x) {
+                if (x < 0) abort();
+                return 2 * x;
+            }
+        """,
+    )
+
+
+@in_new_interpreter
+def test_results_in_order():
+    with double_algorithm() as algo:
+        def run(x):
+            with algo.run() as p:
+                return p.functions.f(x), os.getpid()
+
+        results = list(run_cases(run, range(10), workers=4))
+
+    assert [r.case for r in results] == list(range(10))
+    assert [r.get()[0] for r in results] == [2 * x for x in range(10)]
+    assert all(r.get()[1] != os.getpid() for r in results)
+
+
+@in_new_interpreter
+def test_algorithm_error():
+    with double_algorithm() as algo:
+        def run(x):
+            with algo.run() as p:
+                return p.functions.f(x)
+
+        results = list(run_cases(run, [1, -1, 2], workers=2))
+
+    assert results[0].get() == 2
+    assert isinstance(results[1].error, AlgorithmRuntimeError)
+    with raises(AlgorithmRuntimeError):
+        results[1].get()
+    assert results[2].get() == 4
+
+
+@in_new_interpreter
+def test_skip():
+    failed = set()
+    results = []
+    for result in run_cases(lambda x: x % 4 != 1, range(16), workers=2, skip=lambda x: x // 4 in failed):
+        results.append(result.case)
+        if not result.value:
+            failed.add(result.case // 4)
+
+    # when case 4g+1 fails, case 4g+2 is already running (and cancelled), and case 4g+3 is skipped
+    assert results == [x for x in range(16) if x % 4 < 2]
+
+
+@in_new_interpreter
+def test_skip_cancels_running():
+    with TemporaryDirectory() as temp_dir:
+        def run(x):
+            if x == 1:
+                # runs until cancelled
+                time.sleep(60)
+            with open(os.path.join(temp_dir, str(x)), "w"):
+                pass
+            return x
+
+        skipped = set()
+        start = time.monotonic()
+        results = []
+        for result in run_cases(run, range(4), workers=2, skip=lambda x: x in skipped):
+            results.append(result.case)
+            skipped.add(1)
+
+        assert results == [0, 2, 3]
+        assert time.monotonic() - start < 30
+        assert sorted(os.listdir(temp_dir)) == ["0", "2", "3"]
+
+
+def test_threads_run_sequentially():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        results = list(run_cases(lambda x: os.getpid(), range(3), workers=2))
+    finally:
+        stop.set()
+        thread.join()
+    assert [r.value for r in results] == [os.getpid()] * 3
+
+
+def test_single_worker():
+    results = list(run_cases(lambda x: os.getpid(), range(3), workers=1))
+    assert [r.value for r in results] == [os.getpid()] * 3
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import re
+from tempfile import NamedTemporaryFile
+
+CHUNK_SIZE = 2 ** 16
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    Content-addressed store of files (blobs), identified by the SHA-256 digest of their content.
+
+    Blobs are copied and served in chunks, so they are never held in memory as a whole.
+    A blob is written to a temporary file and then renamed, so readers never see partial blobs,
+    and storing the same content twice just replaces the blob with an identical one.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, digest):
+        if not DIGEST_RE.match(digest):
+            raise ValueError(f"invalid blob digest: {digest!r}")
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, f):
+        """
+        Stores the content read from the given binary file, and returns its digest and size.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        with NamedTemporaryFile(dir=self.directory, prefix=".tmp-", delete=False) as tmp:
+            try:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            except:
+                os.unlink(tmp.name)
+                raise
+
+        digest = sha256.hexdigest()
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+        return digest, size
+
+    def put_path(self, path):
+        with open(path, "rb") as f:
+            return self.put(f)
+
+    def open(self, digest):
+        """
+        Opens the blob with the given digest for reading (in binary mode).
+        """
+        return open(self.path(digest), "rb")
+
+    def read_chunks(self, digest, chunk_size=CHUNK_SIZE):
+        """
+        Generates the content of the blob with the given digest, in chunks.
+        """
+        with self.open(digest) as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+
+
+def default_blob_dir():
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "turingarena", "blobs")
+
+
+def blob_store():
+    """
+    Returns the blob store configured by the environment.
+
+    TURINGARENA_BLOB_DIR sets the directory (default: $XDG_DATA_HOME/turingarena/blobs).
+    Blobs are referenced by stored evaluation events, so they are data, not cache:
+    they are never removed automatically, and are kept as long as the events referring to them.
+    Removing them (e.g., when old submissions are deleted) is up to the administrator,
+    and files whose blob was removed are no longer served.
+    """
+    directory = os.environ.get("TURINGARENA_BLOB_DIR") or default_blob_dir()
+    return BlobStore(directory)
@@ -1,15 +1,17 @@
+import functools
 import logging
 import os
 import random
 import subprocess
-from contextlib import ExitStack
+from contextlib import ExitStack, contextmanager
 from functools import lru_cache
 from tempfile import TemporaryDirectory
 
 from turingarena.evallib.metadata import load_metadata
 from turingarena.evaluation.runner import EvaluatorParameters
 from turingarena.evaluation.runners import evaluator_runner_by_extension
-from turingarena.evaluation.segi import segi_subprocess
+from turingarena.evaluation.segi import DEFAULT_TEXT_FLUSH_POLICY, segi_evaluation, segi_subprocess
+from turingarena.evaluation.worker import EvaluatorWorker
 
 
 class Evaluator:
@@ -61,7 +63,15 @@ class Evaluator:
             **self.parameter_overrides,
         })
 
-    def evaluate(self, files, seed=None, redirect_stderr=False, log_level=None):
+    def evaluate(self, files, seed=None, redirect_stderr=False, log_level=None,
+                 text_flush_policy=DEFAULT_TEXT_FLUSH_POLICY, worker=None, inline_files=False):
+        """
+        Runs the evaluator on the given submission files, and generates the evaluation events.
+        Adjacent text is coalesced in TEXT events according to `text_flush_policy` (see `TextFlushPolicy`).
+        If `worker` is given (see `worker()`), the evaluator runs in it, instead of in a new process.
+        The content of FILE events is stored in the blob store (see `blob_store()`),
+        or included in the events if `inline_files` is set.
+        """
         with ExitStack() as stack:
             if seed is None:
                 seed = random.randrange(2 ** 31)
@@ -75,6 +85,16 @@ class Evaluator:
                 "TURINGARENA_LOG_LEVEL": log_level,
             }
 
+            if worker is not None:
+                yield from segi_evaluation(
+                    files,
+                    functools.partial(worker.run, redirect_stderr=redirect_stderr),
+                    env=env,
+                    text_flush_policy=text_flush_policy,
+                    inline_files=inline_files,
+                )
+                return
+
             command = stack.enter_context(self.runner.perform_run())
 
             popen_args = {}
@@ -86,8 +106,28 @@ class Evaluator:
                 files,
                 command,
                 env=env,
+                text_flush_policy=text_flush_policy,
+                inline_files=inline_files,
                 cwd=self.evaluator_dir,
                 **popen_args,
             )
 
             yield from evaluation
+
+    @contextmanager
+    def worker(self):
+        """
+        Starts a worker which loads the evaluator once, to evaluate many submissions
+        (pass it to `evaluate()`). Each evaluation still runs in its own process, forked from the worker.
+        Gives None if the evaluator cannot run in a worker, so that submissions are evaluated as usual.
+        """
+        with self.runner.perform_worker_run() as command:
+            if command is None:
+                yield None
+                return
+
+            worker = EvaluatorWorker(command, cwd=self.evaluator_dir)
+            try:
+                yield worker
+            finally:
+                worker.close()
@@ -1,7 +1,11 @@
 import json
+import struct
 from collections import namedtuple
 from enum import Enum
 
+# header of the frames sent on the data channel of an evaluator: the length of the frame payload
+DATA_FRAME_HEADER = struct.Struct(">I")
+
 
 class EvaluationEventType(Enum):
     TEXT = "text"
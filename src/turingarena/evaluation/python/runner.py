@@ -1,7 +1,7 @@
 from contextlib import contextmanager
 
 from turingarena.evaluation.runner import EvaluatorRunner
-from . import wrapper
+from . import worker, wrapper
 
 
 class PythonEvaluatorRunner(EvaluatorRunner):
@@ -14,3 +14,18 @@ class PythonEvaluatorRunner(EvaluatorRunner):
             wrapper.__name__,
             "evaluator.py",
         ]
+
+    @contextmanager
+    def perform_worker_run(self):
+        """
+        The worker imports the modules listed in the `preload` parameter (from the evaluator directory)
+        before receiving submissions.
+        """
+        yield [
+            self.params.python_executable or "python3",
+            "-u",
+            "-m",
+            worker.__name__,
+            "evaluator.py",
+            *(self.params.preload or []),
+        ]
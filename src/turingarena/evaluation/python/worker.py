@@ -0,0 +1,113 @@
+import importlib
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import traceback
+
+from turingarena.evaluation.worker import receive_request
+from turingarena.logging_helper import init_logger
+
+
+def run_evaluation(code, evaluator_path, request, output_fd, data_fd):
+    """
+    Runs the evaluator in a process forked from the worker, as `wrapper` would.
+    """
+    os.environ.clear()
+    os.environ.update(request["env"])
+    os.environ["EVALUATION_DATA_FD"] = str(data_fd)
+
+    devnull_fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull_fd, 0)
+    os.close(devnull_fd)
+    os.dup2(output_fd, 1)
+    if request["redirect_stderr"]:
+        os.dup2(output_fd, 2)
+    os.close(output_fd)
+
+    random.seed(os.environ.get("TURINGARENA_SEED", None))
+    init_logger()
+
+    sys.argv = [evaluator_path]
+    exec(code, {"__name__": "__main__", "__file__": evaluator_path, "__builtins__": __builtins__})
+
+
+def _exit_code(result):
+    if result.si_code == os.CLD_EXITED:
+        return result.si_status
+    return -result.si_status
+
+
+def main():
+    """
+    Evaluates submissions one after another, with the evaluator loaded once.
+
+    Requests are received on the control socket (the standard input),
+    and each evaluation runs in a process forked from the worker,
+    so evaluations start with the evaluator already loaded, and do not see each other's state.
+    The pid of the evaluation process is sent back on the control socket,
+    and then its exit code, when it terminates (see `EvaluatorWorker`).
+    """
+    evaluator_path = sys.argv[1]
+    preload_modules = sys.argv[2:]
+
+    control = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET, fileno=0)
+
+    # preloaded, so that evaluations do not pay for these imports
+    import turingarena
+    import turingarena.evallib.metadata
+
+    with open(evaluator_path) as f:
+        code = compile(f.read(), evaluator_path, "exec")
+
+    # modules of the evaluator doing expensive setup (e.g., generating test data) at import time
+    sys.path.insert(0, os.getcwd())
+    for name in preload_modules:
+        importlib.import_module(name)
+    turingarena.evallib.metadata.load_metadata()
+
+    terminated_pid = None
+    while True:
+        request, fds = receive_request(control)
+        if terminated_pid is not None:
+            os.waitpid(terminated_pid, 0)
+            terminated_pid = None
+        if request is None:
+            break
+        output_fd, data_fd = fds
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                control.close()
+                run_evaluation(code, evaluator_path, request, output_fd, data_fd)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (e.code is not None)
+            except:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+
+        os.close(output_fd)
+        os.close(data_fd)
+        try:
+            control.send(json.dumps(dict(pid=pid)).encode())
+            # not reaped yet, so that the client can still kill it by pid
+            result = os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+            terminated_pid = pid
+            control.send(json.dumps(dict(exit_code=_exit_code(result))).encode())
+        except BrokenPipeError:
+            # the client is gone
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            break
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from abc import abstractmethod
 from collections import namedtuple
+from contextlib import contextmanager
 
 
 class EvaluatorParameters:
@@ -16,3 +17,11 @@ class EvaluatorRunner(namedtuple("EvaluatorRunner", ["cwd", "path", "params"])):
         """
         Returns a contextmanager which prepares the execution and gives the command to run.
         """
+
+    @contextmanager
+    def perform_worker_run(self):
+        """
+        Returns a contextmanager which gives the command to start an `EvaluatorWorker`,
+        or None if this evaluator cannot run in a worker.
+        """
+        yield None
@@ -3,6 +3,7 @@ import subprocess
 from contextlib import contextmanager
 from tempfile import TemporaryDirectory
 
+from turingarena.driver.cache import build_cache, cache_key, tool_version
 from turingarena.evaluation.python.runner import PythonEvaluatorRunner
 from turingarena.evaluation.runner import EvaluatorRunner
 
@@ -12,18 +13,20 @@ class CppEvaluatorRunner(EvaluatorRunner):
     def perform_run(self):
         with TemporaryDirectory() as compilation_dir:
             executable_path = os.path.join(compilation_dir, "evaluator")
-            cli = [
-                "g++",
-                *(self.params.cpp_flags.split() or [
-                    f"-std={self.params.cpp_std or 'c++14'}",
-                    "-Wall",
-                ]),
-                "-o",
-                executable_path,
-                "evaluator.cpp",
+            flags = (self.params.cpp_flags or "").split() or [
+                f"-std={self.params.cpp_std or 'c++14'}",
+                "-Wall",
             ]
-            subprocess.run(cli, check=True)
-            return [executable_path]
+
+            # the same evaluator is compiled once for all the submissions
+            cache = build_cache()
+            with open(os.path.join(self.cwd, self.path), "rb") as f:
+                key = cache_key("evaluator", f.read(), tool_version("g++", "--version"), *flags)
+            if not cache.fetch(key, {"evaluator": executable_path}):
+                subprocess.run(["g++", *flags, "-o", executable_path, self.path], check=True, cwd=self.cwd)
+                cache.store(key, {"evaluator": executable_path})
+
+            yield [executable_path]
 
 
 class BashEvaluatorRunner(EvaluatorRunner):
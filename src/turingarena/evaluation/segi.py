@@ -1,14 +1,35 @@
+import base64
+import codecs
 import json
+import logging
 import os
 import cgi
 import secrets
 import selectors
 import subprocess
-import base64
 import time
+from collections import namedtuple
 from contextlib import ExitStack, contextmanager
+from tempfile import SpooledTemporaryFile
+
+from turingarena.evaluation.blobs import blob_store as default_blob_store
+from turingarena.evaluation.events import DATA_FRAME_HEADER, EvaluationEvent, EvaluationEventType
+
+
+class TextFlushPolicy(namedtuple("TextFlushPolicy", ["max_size", "max_delay"])):
+    """
+    Adjacent text is generated as a single TEXT event when it reaches `max_size` characters,
+    `max_delay` seconds after its first character was received, or before any other event.
+    With `max_size=0`, the text of each line is generated as soon as the line is complete.
+    """
 
-from turingarena.evaluation.events import EvaluationEvent, EvaluationEventType
+    __slots__ = []
+
+
+DEFAULT_TEXT_FLUSH_POLICY = TextFlushPolicy(max_size=2 ** 16, max_delay=0.05)
+
+# size of the body of a FILE section kept in memory, before spilling it to disk
+FILE_BODY_SPOOL_SIZE = 2 ** 20
 
 
 def submission_environ(submission_fields):
@@ -41,7 +62,37 @@ def process_stdout_pipe(cmd, **popen_kwargs):
         yield read_pipe_fd
 
 
-def segi_subprocess(submission, cmd, env=None, **popen_kwargs):
+def segi_subprocess(submission, cmd, env=None, text_flush_policy=DEFAULT_TEXT_FLUSH_POLICY, inline_files=False,
+                    **popen_kwargs):
+    def start_evaluator(env, output_fd, data_fd):
+        return subprocess.Popen(
+            cmd,
+            **popen_kwargs,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=output_fd,
+            pass_fds=(data_fd,),
+        )
+
+    yield from segi_evaluation(
+        submission,
+        start_evaluator,
+        env=env,
+        text_flush_policy=text_flush_policy,
+        inline_files=inline_files,
+    )
+
+
+def segi_evaluation(submission, start_evaluator, env=None, text_flush_policy=DEFAULT_TEXT_FLUSH_POLICY,
+                    inline_files=False):
+    """
+    Runs an evaluator, and generates the evaluation events.
+    The content of FILE events is included in the events if `inline_files` is set (see `SegiParser`).
+
+    `start_evaluator(env, output_fd, data_fd)` must return a context manager which starts the evaluator
+    with the given environment (a dict of strings), writing its output to `output_fd`,
+    and inheriting `data_fd`. Its exit must wait for the evaluator to terminate.
+    """
     if env is None:
         env = {}
 
@@ -53,82 +104,340 @@ def segi_subprocess(submission, cmd, env=None, **popen_kwargs):
 
     )
 
-    env = {
-        **os.environ,
-        **env,
-        "EVALUATION_DATA_BEGIN": data_begin,
-        "EVALUATION_DATA_END": data_end,
-        "EVALUATION_FILE_BEGIN": file_begin,
-        "EVALUATION_FILE_END": file_end,
-        **submission_environ(submission),
-    }
-
-    with process_stdout_pipe(cmd, **popen_kwargs, env=env) as fd:
-        yield from process_segi_output(fd, data_begin, data_end, file_begin, file_end)
-
+    with ExitStack() as stack:
+        output_fd, output_write_fd = os.pipe()
+        # DATA events can also be sent on this pipe, without scanning the output for markers
+        data_fd, data_write_fd = os.pipe()
+        for fd in (output_fd, data_fd):
+            stack.callback(os.close, fd)
+            os.set_blocking(fd, False)
+
+        env = {
+            **os.environ,
+            **env,
+            "EVALUATION_DATA_BEGIN": data_begin.decode(),
+            "EVALUATION_DATA_END": data_end.decode(),
+            "EVALUATION_FILE_BEGIN": file_begin.decode(),
+            "EVALUATION_FILE_END": file_end.decode(),
+            "EVALUATION_DATA_FD": str(data_write_fd),
+            **submission_environ(submission),
+        }
+
+        try:
+            stack.enter_context(start_evaluator(env, output_write_fd, data_write_fd))
+        finally:
+            os.close(output_write_fd)
+            os.close(data_write_fd)
+
+        yield from process_segi_output(
+            output_fd,
+            data_begin,
+            data_end,
+            file_begin,
+            file_end,
+            text_flush_policy,
+            data_fd=data_fd,
+            inline_files=inline_files,
+        )
+
+
+def _read_available(fd):
+    """
+    Reads from a non-blocking file descriptor. Returns None if no data is available, b"" at EOF.
+    """
+    try:
+        return os.read(fd, 2 ** 16)
+    except BlockingIOError:
+        return None
 
-def process_segi_output(fd, data_begin, data_end, file_begin, file_end):
-    parts = generate_chunks(fd)
-    parts = split_line_terminators(parts)
-    parts = join_text_parts(parts)
-    yield from generate_events(parts, data_begin, data_end, file_begin, file_end)
 
+def process_segi_output(fd, data_begin, data_end, file_begin, file_end, text_flush_policy=DEFAULT_TEXT_FLUSH_POLICY,
+                        data_fd=None, inline_files=False):
+    """
+    Reads the output of an evaluator from the given (non-blocking) file descriptor,
+    and generates the evaluation events.
+    Text is coalesced according to the given `TextFlushPolicy`, also the text of a partial line.
+    No timeout is set while no text is pending.
 
-def generate_events(parts, data_begin, data_end, file_begin, file_end):
-    newline_event = EvaluationEvent(EvaluationEventType.TEXT, "\n")
-    pending_newline = False
-    for part in parts:
-        if pending_newline and part == data_begin:
-            assert next(parts) == b"\n"
-            yield from parse_data_events(parts, data_end)
-            pending_newline = False
-        elif pending_newline and part == file_begin:
-            assert next(parts) == b"\n"
-            yield from parse_file_events(parts, file_end)
-            pending_newline = False
-        else:
-            if pending_newline:
-                yield newline_event
-            pending_newline = False
-            if part == b"\n":
-                pending_newline = True
-            else:
-                yield EvaluationEvent(EvaluationEventType.TEXT, part.decode())
-    if pending_newline:
-        yield newline_event
+    If `data_fd` is given, DATA events are also read from it, as frames (see `DataFrameParser`).
+    Text written before a frame is generated before its events (text written just after it may be as well).
+    """
+    parser = SegiParser(data_begin, data_end, file_begin, file_end, inline_files=inline_files)
+    coalescer = TextCoalescer(text_flush_policy)
+    frame_parser = DataFrameParser()
+    selector = selectors.DefaultSelector()
+    selector.register(fd, selectors.EVENT_READ, "output")
+    output_open = True
+    data_open = data_fd is not None
+    if data_open:
+        selector.register(data_fd, selectors.EVENT_READ, "data")
+    deadline = None
+    with selector:
+        while output_open or data_open:
+            timeout = None if deadline is None else max(0., deadline - time.monotonic())
+            ready = [key.data for key, mask in selector.select(timeout)]
+            if not ready:
+                yield from coalescer.add(parser.flush_partial_line())
+                yield from coalescer.flush()
+                deadline = None
+                continue
+
+            data_events = []
+            if "data" in ready:
+                data = _read_available(data_fd)
+                if data == b"":
+                    selector.unregister(data_fd)
+                    data_open = False
+                elif data:
+                    data_events = frame_parser.feed(data)
+
+            # the output written before the frames just read is in the pipe already, so read it first
+            while output_open and ("output" in ready or data_events):
+                data = _read_available(fd)
+                if data is None:
+                    break
+                if not data:
+                    selector.unregister(fd)
+                    output_open = False
+                    break
+                yield from coalescer.add(parser.feed(data))
+                if not data_events:
+                    break
+
+            if data_events:
+                yield from coalescer.add(parser.flush_partial_line())
+                yield from coalescer.add(data_events)
+
+            if not coalescer.has_pending_text and not parser.has_partial_line:
+                deadline = None
+            elif deadline is None:
+                deadline = time.monotonic() + text_flush_policy.max_delay
+    if frame_parser.has_partial_frame:
+        logging.warning(f"evaluator data channel terminated within a frame")
+    yield from coalescer.add(parser.close())
+    yield from coalescer.flush()
+
+
+class DataFrameParser:
+    """
+    Incremental parser of the data channel of an evaluator.
 
+    Each frame is the JSON encoding (in UTF-8) of the payload of a DATA event,
+    preceded by its length in bytes (see `DATA_FRAME_HEADER`).
+    """
 
-def collect_joinable_parts(parts):
-    for part in parts:
-        yield part
-        if not part or part == b"\n":
-            break
+    def __init__(self):
+        self._buffer = bytearray()
+
+    @property
+    def has_partial_frame(self):
+        return bool(self._buffer)
+
+    def feed(self, data):
+        """
+        Parses the given chunk of the data channel, and returns the events of the frames it completes.
+        """
+        events = []
+        buffer = self._buffer
+        buffer += data
+        start = 0
+        while len(buffer) - start >= DATA_FRAME_HEADER.size:
+            length, = DATA_FRAME_HEADER.unpack_from(buffer, start)
+            end = start + DATA_FRAME_HEADER.size + length
+            if end > len(buffer):
+                break
+            payload = buffer[start + DATA_FRAME_HEADER.size:end].decode()
+            events.append(EvaluationEvent(EvaluationEventType.DATA, json.loads(payload)))
+            start = end
+        del buffer[:start]
+        return events
+
+
+class TextCoalescer:
+    """
+    Joins adjacent TEXT events, see `TextFlushPolicy`.
+    """
 
+    def __init__(self, policy):
+        self._policy = policy
+        self._parts = []
+        self._size = 0
+
+    @property
+    def has_pending_text(self):
+        return bool(self._parts)
+
+    def add(self, events):
+        """
+        Returns the events to generate, given the next events (in order).
+        """
+        result = []
+        for event in events:
+            if event.type is EvaluationEventType.TEXT:
+                self._parts.append(event.payload)
+                self._size += len(event.payload)
+                if self._size >= self._policy.max_size:
+                    result += self.flush()
+            else:
+                result += self.flush()
+                result.append(event)
+        return result
+
+    def flush(self):
+        """
+        Returns the event for the pending text, if any.
+        """
+        if not self._parts:
+            return []
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        return [EvaluationEvent(EvaluationEventType.TEXT, text)]
+
+
+class SegiParser:
+    """
+    Incremental parser of the output of an evaluator.
+
+    Text is generated as a TEXT event for each line, and one for each line terminator.
+    A line terminator is held back until the next line is seen, since the terminator preceding
+    a begin marker (either $EVALUATION_DATA_BEGIN or $EVALUATION_FILE_BEGIN) is not part of the text.
+    Lines until the matching end marker are parsed as DATA events (one per line) or as a FILE event,
+    whose content is copied to the given `BlobStore` (by default, the one configured by the environment).
+    If `inline_files` is set, the content is included in the event instead (encoded in base64),
+    for consumers which do not share the blob store (e.g., events stored on another host).
+    """
 
-def join_text_parts(parts):
-    while True:
-        joinable_parts = list(collect_joinable_parts(parts))
-        if not joinable_parts:
-            break
-        line = b"".join(joinable_parts[:-1])
-        if line:
-            yield line
-        if joinable_parts[-1]:
-            yield joinable_parts[-1]
+    TEXT, DATA, FILE_HEADERS, FILE_BODY = range(4)
 
+    newline_event = EvaluationEvent(EvaluationEventType.TEXT, "\n")
 
-def parse_data_events(parts, data_end):
-    """
-    ProcessManager a stream of parts,
-    *after* '\n' $EVALUATION_DATA_BEGIN '\n',
-    and until $EVALUATION_DATA_END '\n' is encountered.
-    Generates the data event payloads parsed.
-    """
-    while True:
-        line = b"".join(iter(lambda: next(parts), b"\n"))
-        if line == data_end:
-            break
-        yield EvaluationEvent(EvaluationEventType.DATA, json.loads(line))
+    def __init__(self, data_begin, data_end, file_begin, file_end, blob_store=None, inline_files=False):
+        self._data_begin = data_begin
+        self._data_end = data_end
+        self._file_begin = file_begin
+        self._file_end = file_end
+        if blob_store is None and not inline_files:
+            blob_store = default_blob_store()
+        self._blob_store = blob_store
+
+        self._buffer = bytearray()
+        self._state = self.TEXT
+        self._pending_newline = False
+        # whether the text of the current line was partially generated already
+        self._partial_line_sent = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+        self._file_headers = None
+        self._file_body = None
+        self._file_body_started = False
+
+    @property
+    def has_partial_line(self):
+        """
+        Whether some text is waiting for the end of its line (see `flush_partial_line()`).
+        """
+        return self._state == self.TEXT and bool(self._buffer)
+
+    def feed(self, data):
+        """
+        Parses the given chunk of output, and returns the list of events of the lines it completes.
+        """
+        events = []
+        buffer = self._buffer
+        buffer += data
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            self._on_line(bytes(buffer[start:end]), events)
+            start = end + 1
+        del buffer[:start]
+        return events
+
+    def flush_partial_line(self):
+        """
+        Returns the events for the text received so far in the current line.
+        The rest of the line will be generated as text, even if it looks like a marker.
+        """
+        events = []
+        if not self.has_partial_line:
+            return events
+        self._on_text(bytes(self._buffer), events)
+        self._buffer.clear()
+        self._partial_line_sent = True
+        return events
+
+    def close(self):
+        """
+        Returns the events for the output remaining at the end of the stream.
+        """
+        events = self.flush_partial_line()
+        if self._state != self.TEXT:
+            logging.warning(f"evaluator output terminated within a DATA or FILE section")
+        if self._file_body is not None:
+            self._file_body.close()
+            self._file_body = None
+        if self._pending_newline:
+            events.append(self.newline_event)
+            self._pending_newline = False
+        text = self._decoder.decode(b"", final=True)
+        if text:
+            events.append(EvaluationEvent(EvaluationEventType.TEXT, text))
+        return events
+
+    def _on_text(self, text, events):
+        if self._pending_newline:
+            events.append(self.newline_event)
+            self._pending_newline = False
+        text = self._decoder.decode(text)
+        if text:
+            events.append(EvaluationEvent(EvaluationEventType.TEXT, text))
+
+    def _on_line(self, line, events):
+        state = self._state
+        if state == self.TEXT:
+            if self._partial_line_sent:
+                self._partial_line_sent = False
+            elif self._pending_newline and line == self._data_begin:
+                self._pending_newline = False
+                self._state = self.DATA
+                return
+            elif self._pending_newline and line == self._file_begin:
+                self._pending_newline = False
+                self._state = self.FILE_HEADERS
+                self._file_headers = {}
+                return
+            self._on_text(line, events)
+            self._pending_newline = True
+        elif state == self.DATA:
+            if line == self._data_end:
+                self._state = self.TEXT
+            else:
+                events.append(EvaluationEvent(EvaluationEventType.DATA, json.loads(line)))
+        elif state == self.FILE_HEADERS:
+            if line:
+                name, value, params = parse_header(line)
+                self._file_headers[name] = value, params
+            else:
+                self._state = self.FILE_BODY
+                # the body may contain the whole file, so it is not kept in memory
+                self._file_body = SpooledTemporaryFile(max_size=FILE_BODY_SPOOL_SIZE)
+                self._file_body_started = False
+        elif state == self.FILE_BODY:
+            if line == self._file_end:
+                with self._file_body as body:
+                    body.seek(0)
+                    payload = process_headers(self._file_headers, body, self._blob_store)
+                events.append(EvaluationEvent(EvaluationEventType.FILE, payload))
+                self._state = self.TEXT
+                self._file_headers = self._file_body = None
+            else:
+                if self._file_body_started:
+                    self._file_body.write(b"\n")
+                self._file_body.write(line)
+                self._file_body_started = True
 
 
 def parse_header(line):
@@ -137,7 +446,12 @@ def parse_header(line):
     return name.lower(), value, params
 
 
-def process_headers(headers, body):
+def process_headers(headers, body, blob_store):
+    """
+    Returns the payload of a FILE event, given the headers and the body (a binary file).
+    The content of the file is stored in the given `BlobStore`, and the payload refers to it.
+    If `blob_store` is None, the content is included in the payload, encoded in base64.
+    """
     payload = {}
     if "content-type" in headers:
         value, params = headers["content-type"]
@@ -162,95 +476,18 @@ def process_headers(headers, body):
         payload["filename"] = "file.txt"
 
     if segi_as == "content":
-        with open(body, "rb") as f:
-            content = f.read()
+        # the body is the path of the file
+        with open(body.read().decode(), "rb") as f:
+            payload.update(_file_content_payload(f, blob_store))
     else:
-        content = body
-
-    payload["content_base64"] = base64.encodebytes(content).decode().replace("\n", "")
+        payload.update(_file_content_payload(body, blob_store))
     return payload
 
 
-def parse_file_events(parts, file_end):
-    line = b"".join(iter(lambda: next(parts), b"\n"))
-    headers = {}
-    while line != b"":
-        name, value, params = parse_header(line)
-        headers[name] = value, params
-        line = b"".join(iter(lambda: next(parts), b"\n"))
-    line = b"".join(iter(lambda: next(parts), b"\n"))
-    body = []
-    while line != file_end:
-        body.append(line)
-        line = b"".join(iter(lambda: next(parts), b"\n"))
-    body = b"\n".join(body)
-
-    yield EvaluationEvent(EvaluationEventType.FILE, process_headers(headers, body))
+def _file_content_payload(f, blob_store):
+    if blob_store is None:
+        content = f.read()
+        return dict(content_base64=base64.b64encode(content).decode(), size=len(content))
 
-
-def split_line_terminators(parts):
-    """
-    Splits the parts so that '\n' occur in their own parts.
-    """
-    for part in parts:
-        lines = part.splitlines(keepends=True)
-        if not lines:
-            yield b""
-            continue
-        if lines[-1].endswith(b"\n"):
-            lines.append(None)
-
-        for line in lines[:-1]:
-            assert line.endswith(b"\n")
-            yield line[:-1]
-            yield b"\n"
-        if lines[-1] is not None:
-            yield lines[-1]
-
-
-def generate_chunks(fd, line_timeout=0.02):
-    """
-    Reads from the given file descriptor and generates data chunks.
-    If some data is read and '\n' is not encountered within `line_timeout` seconds,
-    then an empty chunk is generated as a sentinel.
-    """
-    # FIXME: currently it generate sentinels also when no data is pending after '\n'
-    selector = selectors.DefaultSelector()
-    selector.register(fd, selectors.EVENT_READ)
-    timeout = 0
-    while True:
-        before = time.monotonic()
-        events = selector.select(timeout)
-        after = time.monotonic()
-        timeout -= (after - before)
-        if not events:
-            yield b""
-            selector.select()
-            timeout = line_timeout
-        data = os.read(fd, 2 ** 16)
-        if not data:
-            break
-        if b"\n" in data:
-            timeout = line_timeout
-        yield data
-
-
-def test_get_lines():
-    with process_stdout_pipe(["bash", "-c", """
-        for i in `seq 9`; do
-            for j in `seq 9`; do
-                echo -n $j
-                sleep 0.005
-            done
-            echo ' line end'
-            echo
-            echo B
-            echo -n '{"a":'
-            sleep 0.1
-            echo $i '}'
-            echo E
-        done
-        echo last text
-    """], {}) as fd:
-        for event in process_segi_output(fd, b"B", b"E"):
-            print(event)
+    digest, size = blob_store.put(f)
+    return dict(blob=digest, size=size)
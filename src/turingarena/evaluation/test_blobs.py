@@ -0,0 +1,33 @@
+import hashlib
+import io
+
+import pytest
+
+from turingarena.evaluation.blobs import BlobStore, blob_store
+
+
+def test_put_and_read(tmp_path):
+    store = BlobStore(str(tmp_path))
+    content = bytes(range(256)) * 1000
+    digest, size = store.put(io.BytesIO(content))
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert size == len(content)
+    chunks = list(store.read_chunks(digest, chunk_size=1000))
+    assert len(chunks) == 256
+    assert b"".join(chunks) == content
+
+    # same content, same blob
+    assert store.put(io.BytesIO(content)) == (digest, size)
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".tmp-")]
+
+
+def test_invalid_digest(tmp_path):
+    store = BlobStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.open("../../etc/passwd")
+
+
+def test_default_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv("TURINGARENA_BLOB_DIR", raising=False)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    assert blob_store().directory == str(tmp_path / "turingarena" / "blobs")
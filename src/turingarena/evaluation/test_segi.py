@@ -0,0 +1,221 @@
+import base64
+import json
+import os
+import sys
+import time
+
+from turingarena.evaluation.blobs import BlobStore
+from turingarena.evaluation.events import DATA_FRAME_HEADER, EvaluationEventType
+from turingarena.evaluation.segi import DataFrameParser, SegiParser, TextFlushPolicy, process_segi_output, \
+    process_stdout_pipe, segi_subprocess
+
+MARKERS = dict(
+    data_begin=b"@DATA_BEGIN",
+    data_end=b"@DATA_END",
+    file_begin=b"@FILE_BEGIN",
+    file_end=b"@FILE_END",
+)
+
+
+def parse(*chunks, blob_store=None, inline_files=False):
+    parser = SegiParser(**MARKERS, blob_store=blob_store, inline_files=inline_files)
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    events += parser.close()
+    return events
+
+
+def text_of(events):
+    return "".join(e.payload for e in events if e.type is EvaluationEventType.TEXT)
+
+
+def test_text_lines():
+    events = parse(b"first line\n\nsecond ", b"line\nlast")
+    assert text_of(events) == "first line\n\nsecond line\nlast"
+    assert all(e.type is EvaluationEventType.TEXT for e in events)
+
+
+def test_data_events():
+    output = b"before\n\n@DATA_BEGIN\n" + json.dumps({"a": 1}).encode() + b"\n[2]\n@DATA_END\nafter\n"
+    # markers are recognized wherever chunks are split
+    for split in range(len(output)):
+        events = parse(output[:split], output[split:])
+        assert [e.payload for e in events if e.type is EvaluationEventType.DATA] == [{"a": 1}, [2]]
+        assert text_of(events) == "before\nafter\n"
+
+
+def test_marker_not_at_line_start():
+    events = parse(b"text @DATA_BEGIN\n@DATA_BEGIN not a marker\n")
+    assert text_of(events) == "text @DATA_BEGIN\n@DATA_BEGIN not a marker\n"
+
+
+def test_file_event(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    path = tmp_path / "attachment.txt"
+    path.write_bytes(b"attached")
+    events = parse(
+        b"\n@FILE_BEGIN\n",
+        b"Content-Type: text/plain\n",
+        b'Content-disposition: attachment; filename="out.txt"\n',
+        b"\n",
+        str(path).encode() + b"\n@FILE_END\n",
+        blob_store=blob_store,
+    )
+    [event] = [e for e in events if e.type is EvaluationEventType.FILE]
+    assert event.payload["filename"] == "out.txt"
+    assert event.payload["content_type"] == "text/plain"
+    assert event.payload["size"] == len(b"attached")
+    assert b"".join(blob_store.read_chunks(event.payload["blob"])) == b"attached"
+
+
+def test_file_event_with_inline_content(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    content = b"".join(b"line %d\n" % i for i in range(100000))
+    events = parse(
+        b"\n@FILE_BEGIN\nX-SEGI-As: path\n\n",
+        content,
+        b"@FILE_END\n",
+        blob_store=blob_store,
+    )
+    [event] = [e for e in events if e.type is EvaluationEventType.FILE]
+    # the terminator of the last line is part of the end marker
+    assert event.payload["size"] == len(content) - 1
+    with blob_store.open(event.payload["blob"]) as f:
+        assert f.read() == content[:-1]
+
+
+def test_file_event_inline(tmp_path):
+    path = tmp_path / "attachment.txt"
+    path.write_bytes(b"attached")
+    events = parse(b"\n@FILE_BEGIN\n\n" + str(path).encode() + b"\n@FILE_END\n", inline_files=True)
+    [event] = [e for e in events if e.type is EvaluationEventType.FILE]
+    assert "blob" not in event.payload
+    assert base64.b64decode(event.payload["content_base64"]) == b"attached"
+    assert event.payload["size"] == len(b"attached")
+
+
+def test_partial_line():
+    parser = SegiParser(**MARKERS)
+    assert parser.feed("più ".encode()[:3]) == []
+    assert parser.has_partial_line
+    [event] = parser.flush_partial_line()
+    # incomplete characters are kept until the rest is received
+    assert event.payload == "pi"
+    assert not parser.has_partial_line
+    events = parser.feed("più ".encode()[3:] + b"@DATA_BEGIN\n")
+    assert text_of(events) == "ù @DATA_BEGIN"
+
+
+def test_process_output():
+    with process_stdout_pipe(["bash", "-c", """
+        echo -n partial
+        sleep 0.3
+        echo ' line'
+        echo
+        echo @DATA_BEGIN
+        echo '{"a": 1}'
+        echo @DATA_END
+        sleep 0.3
+        echo last
+    """]) as fd:
+        start = time.monotonic()
+        events = []
+        times = []
+        for event in process_segi_output(fd, **MARKERS):
+            events.append(event)
+            times.append(time.monotonic() - start)
+
+    assert events[0].payload == "partial"
+    # partial lines are generated without waiting for the rest of the line
+    assert times[0] < 0.2
+    assert text_of(events) == "partial line\nlast\n"
+    assert [e.payload for e in events if e.type is EvaluationEventType.DATA] == [{"a": 1}]
+
+
+def test_idle_evaluator_does_not_busy_loop():
+    with process_stdout_pipe(["bash", "-c", "echo start; sleep 0.5; echo end"]) as fd:
+        cpu_before = time.process_time()
+        events = list(process_segi_output(fd, **MARKERS))
+        cpu_time = time.process_time() - cpu_before
+    assert text_of(events) == "start\nend\n"
+    assert cpu_time < 0.1
+
+
+def test_text_coalesced():
+    with process_stdout_pipe(["bash", "-c", """
+        for i in `seq 1000`; do echo line $i; done
+        echo
+        echo @DATA_BEGIN
+        echo 1
+        echo @DATA_END
+        echo after
+    """]) as fd:
+        events = list(process_segi_output(fd, **MARKERS, text_flush_policy=TextFlushPolicy(
+            max_size=1000,
+            max_delay=10,
+        )))
+
+    expected_text = "".join(f"line {i}\n" for i in range(1, 1001)) + "after\n"
+    assert text_of(events) == expected_text
+    text_events = [e for e in events if e.type is EvaluationEventType.TEXT]
+    assert len(text_events) < 20
+    # text is flushed before other events
+    assert [e.type for e in events[-3:]] == [
+        EvaluationEventType.TEXT,
+        EvaluationEventType.DATA,
+        EvaluationEventType.TEXT,
+    ]
+
+
+def test_text_flushed_after_max_delay():
+    with process_stdout_pipe(["bash", "-c", "echo first; echo second; sleep 0.5; echo third"]) as fd:
+        start = time.monotonic()
+        events = []
+        for event in process_segi_output(fd, **MARKERS, text_flush_policy=TextFlushPolicy(
+                max_size=2 ** 16,
+                max_delay=0.05,
+        )):
+            events.append((time.monotonic() - start, event.payload))
+
+    # the terminator of the last line is held back, until the next line is seen
+    assert events[0][1] == "first\nsecond"
+    assert events[0][0] < 0.3
+    assert "".join(payload for t, payload in events) == "first\nsecond\nthird\n"
+
+
+def test_data_frames():
+    frames = b"".join(
+        DATA_FRAME_HEADER.pack(len(payload)) + payload
+        for payload in [json.dumps({"a": i}).encode() for i in range(100)]
+    )
+    parser = DataFrameParser()
+    events = []
+    for i in range(0, len(frames), 7):
+        events += parser.feed(frames[i:i + 7])
+    assert not parser.has_partial_frame
+    assert [e.payload for e in events] == [{"a": i} for i in range(100)]
+    assert all(e.type is EvaluationEventType.DATA for e in events)
+
+
+def test_data_channel():
+    events = list(segi_subprocess({}, [sys.executable, "-c", """if True:
+        from turingarena.evallib.evaluation import send_data
+        for i in range(1000):
+            print("case", i, end=" ")
+            send_data({"case": i})
+        print("done")
+    """]))
+
+    text_events = [e for e in events if e.type is EvaluationEventType.TEXT]
+    data_events = [e for e in events if e.type is EvaluationEventType.DATA]
+    assert text_of(text_events) == "".join(f"case {i} " for i in range(1000)) + "done\n"
+    assert [e.payload for e in data_events] == [{"case": i} for i in range(1000)]
+
+    # each data event follows the text printed before it
+    text = ""
+    for event in events:
+        if event.type is EvaluationEventType.TEXT:
+            text += event.payload
+        else:
+            assert f"case {event.payload['case']} " in text
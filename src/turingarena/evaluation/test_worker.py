@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+import turingarena
+from turingarena.evaluation.evaluator import Evaluator
+from turingarena.evaluation.util import evaluation_goals, evaluation_text
+
+EVALUATOR = """
+import os
+import sys
+import time
+
+import turingarena as ta
+
+import setup
+
+with open(ta.submission.source) as f:
+    source = f.read()
+
+setup.evaluations.append(source)
+print(f"evaluating {source} (evaluations in this process: {len(setup.evaluations)})")
+print("warning", file=sys.stderr)
+if source == "loop":
+    sys.stdout.flush()
+    time.sleep(1000)
+ta.goals["correct"] = source == "correct"
+"""
+
+SETUP = """
+import os
+
+# runs once per worker
+with open(os.path.join(os.path.dirname(__file__), "setup_count.txt"), "a") as f:
+    print("setup", file=f)
+
+evaluations = []
+"""
+
+
+@pytest.fixture(autouse=True)
+def turingarena_path(monkeypatch):
+    # evaluators run in their own directory
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(turingarena.__file__)))
+
+
+def write_evaluator(tmp_path):
+    (tmp_path / "evaluator.py").write_text(EVALUATOR)
+    (tmp_path / "setup.py").write_text(SETUP)
+    (tmp_path / "turingarena.toml").write_text('[evaluator]\npreload = ["setup"]\n[scoring]\ngoals = ["correct"]\n')
+    return Evaluator(str(tmp_path))
+
+
+def test_worker(tmp_path):
+    evaluator = write_evaluator(tmp_path)
+
+    with evaluator.worker() as worker:
+        assert worker is not None
+        for i, content in enumerate(["correct", "wrong", "correct"]):
+            source = tmp_path / f"source{i}.txt"
+            source.write_text(content)
+            events = list(evaluator.evaluate(dict(source=str(source)), worker=worker, redirect_stderr=True))
+
+            # each evaluation starts from the state of the worker
+            assert evaluation_text(events) == f"evaluating {content} (evaluations in this process: 1)\nwarning\n"
+            assert evaluation_goals(events) == {"correct": content == "correct"}
+
+    assert (tmp_path / "setup_count.txt").read_text() == "setup\n"
+
+
+def test_worker_evaluation_abandoned(tmp_path):
+    evaluator = write_evaluator(tmp_path)
+    loop_source = tmp_path / "loop.txt"
+    loop_source.write_text("loop")
+    correct_source = tmp_path / "correct.txt"
+    correct_source.write_text("correct")
+
+    with evaluator.worker() as worker:
+        events = evaluator.evaluate(dict(source=str(loop_source)), worker=worker)
+        next(events)
+        # the evaluation is killed, and its exit code is not taken as the one of the next evaluation
+        events.close()
+
+        events = list(evaluator.evaluate(dict(source=str(correct_source)), worker=worker))
+        assert evaluation_goals(events) == {"correct": True}
+        assert not worker.broken
+
+
+def test_worker_kill_evaluation(tmp_path):
+    evaluator = write_evaluator(tmp_path)
+    loop_source = tmp_path / "loop.txt"
+    loop_source.write_text("loop")
+
+    with evaluator.worker() as worker:
+        events = evaluator.evaluate(dict(source=str(loop_source)), worker=worker)
+        assert next(events).payload.startswith("evaluating loop")
+        worker.kill_evaluation()
+        assert evaluation_goals(list(events)) == {}
+
+
+def test_evaluator_without_worker(tmp_path):
+    evaluator = write_evaluator(tmp_path)
+    source = tmp_path / "source.txt"
+    source.write_text("correct")
+    events = list(evaluator.evaluate(dict(source=str(source))))
+    assert evaluation_text(events) == "evaluating correct (evaluations in this process: 1)\n"
+    assert evaluation_goals(events) == {"correct": True}
+
+
+def test_cpp_evaluator(tmp_path):
+    (tmp_path / "evaluator.cpp").write_text("""
+        #include <iostream>
+        int main() { std::cout << "evaluated" << std::endl; }
+    """)
+    evaluator = Evaluator(str(tmp_path))
+    # not supported, submissions are evaluated as usual
+    with evaluator.worker() as worker:
+        assert worker is None
+    for _ in range(2):
+        assert evaluation_text(list(evaluator.evaluate({}))) == "evaluated\n"
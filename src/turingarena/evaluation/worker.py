@@ -0,0 +1,112 @@
+import array
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import threading
+from contextlib import contextmanager
+
+MAX_REQUEST_SIZE = 2 ** 20
+
+# file descriptors sent with each request: evaluator output, data channel
+REQUEST_FDS = 2
+
+
+def receive_request(control):
+    """
+    Receives a request and its file descriptors from the control socket.
+    Returns (None, []) if the control socket was closed.
+    """
+    fd_size = array.array("i").itemsize
+    message, ancdata, flags, address = control.recvmsg(MAX_REQUEST_SIZE, socket.CMSG_LEN(REQUEST_FDS * fd_size))
+    fds = array.array("i")
+    for level, type, data in ancdata:
+        if level == socket.SOL_SOCKET and type == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - len(data) % fd_size])
+    if not message:
+        return None, list(fds)
+    return json.loads(message.decode()), list(fds)
+
+
+def send_request(control, request, fds):
+    control.sendmsg(
+        [json.dumps(request).encode()],
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))],
+    )
+
+
+class EvaluatorWorker:
+    """
+    Long-lived process which loads an evaluator once, and then runs the evaluations sent to it
+    (see `turingarena.evaluation.python.worker`). Evaluations run one at a time.
+
+    For each request, the worker replies with the pid of the evaluation process,
+    and then with its exit code, when it terminates.
+    The evaluation process is reaped only when the next request is received,
+    so its pid is not reused while it can still be killed (see `kill_evaluation()`).
+    """
+
+    def __init__(self, cmd, cwd):
+        self._control, worker_control = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        with worker_control:
+            self._os_process = subprocess.Popen(cmd, cwd=cwd, stdin=worker_control)
+        self._lock = threading.Lock()
+        self._pid_lock = threading.Lock()
+        self._evaluation_pid = None
+        self.broken = False
+
+    def _receive_reply(self):
+        reply = self._control.recv(1024)
+        if not reply:
+            self.broken = True
+            raise RuntimeError(f"evaluator worker terminated with exit code {self._os_process.wait()}")
+        return json.loads(reply.decode())
+
+    @contextmanager
+    def run(self, env, output_fd, data_fd, redirect_stderr=False):
+        """
+        Starts an evaluation with the given environment, output and data channel,
+        and waits for it to terminate on exit (see `segi_evaluation()`).
+        If the body raises (e.g., the generator of the events is closed), the evaluation is killed.
+        """
+        with self._lock:
+            if self.broken:
+                raise RuntimeError("evaluator worker terminated")
+
+            try:
+                send_request(self._control, dict(env=env, redirect_stderr=redirect_stderr), [output_fd, data_fd])
+            except OSError:
+                self.broken = True
+                raise
+            self._evaluation_pid = self._receive_reply()["pid"]
+
+            try:
+                yield
+            except BaseException:
+                self.kill_evaluation()
+                raise
+            finally:
+                # the reply is read in any case, otherwise it would be taken as the reply to the next request
+                try:
+                    exit_code = self._receive_reply()["exit_code"]
+                finally:
+                    with self._pid_lock:
+                        self._evaluation_pid = None
+                logging.debug(f"evaluation terminated with exit code {exit_code}")
+
+    def kill_evaluation(self):
+        """
+        Kills the running evaluation, if any (e.g., if it takes too long).
+        Can be called from any thread.
+        """
+        with self._pid_lock:
+            if self._evaluation_pid is not None:
+                os.kill(self._evaluation_pid, signal.SIGKILL)
+
+    def close(self):
+        with self._lock:
+            # the worker terminates when the control socket is closed
+            self._control.close()
+            self._os_process.wait()
@@ -0,0 +1,40 @@
+import functools
+import threading
+from collections import OrderedDict
+
+# entries kept by each memoized method, the least recently used are evicted first
+NODE_MEMO_SIZE = 4096
+
+
+def node_memoized(f):
+    """
+    Memoizes a method whose result depends only on the given (immutable) node,
+    using the identity of the node and the class of `self` as key.
+
+    The node is kept alive by its entry, so its id is never reused while cached.
+    Nodes (namedtuples) cannot be referenced weakly, so the memo is bounded instead:
+    it keeps the NODE_MEMO_SIZE most recently used entries, and nodes of evicted entries can be freed.
+    """
+    memo = OrderedDict()
+    lock = threading.Lock()
+
+    @functools.wraps(f)
+    def memoized_method(self, n):
+        key = (type(self), id(n))
+        with lock:
+            entry = memo.get(key)
+            if entry is not None and entry[0] is n:
+                memo.move_to_end(key)
+                return entry[1]
+
+        # computed without the lock, as it may recur on sub-nodes
+        result = f(self, n)
+        with lock:
+            memo[key] = (n, result)
+            memo.move_to_end(key)
+            while len(memo) > NODE_MEMO_SIZE:
+                memo.popitem(last=False)
+        return result
+
+    memoized_method.memo = memo
+    return memoized_method
@@ -1,31 +1,70 @@
 import functools
+import inspect
 from functools import partial
 
 
+def _resolve_handlers(visitor_class, name, mro, static):
+    """
+    Returns the handlers of the visitor method `name` for a node with the given MRO, in dispatch order.
+    Each handler is called as `handler(visitor, node, *args, **kwargs)`.
+    """
+    handlers = []
+    for cls in mro:
+        attr_name = f"{name}_{cls.__name__}"
+        try:
+            attr = inspect.getattr_static(visitor_class, attr_name)
+        except AttributeError:
+            continue
+
+        if inspect.isfunction(attr):
+            method = attr
+        elif hasattr(attr, "__get__"):
+            # staticmethod, classmethod or other descriptor (e.g., a decorated handler)
+            method = _bind(attr)
+        else:
+            method = _drop_self(attr)
+
+        if static:
+            method = _drop_node(method)
+        handlers.append(method)
+    return tuple(handlers)
+
+
+def _bind(descriptor):
+    # bound on each call, as the descriptor may bind the handler to the visitor
+    return lambda self, *args, **kwargs: descriptor.__get__(self, type(self))(*args, **kwargs)
+
+
+def _drop_self(f):
+    return lambda self, *args, **kwargs: f(*args, **kwargs)
+
+
+def _drop_node(f):
+    return lambda self, node, *args, **kwargs: f(self, *args, **kwargs)
+
+
 def visitormethod(f, *, meta=False, static=False):
+    # handlers are resolved once per visitor class and node class
+    dispatch_tables = {}
+    name = f.__name__
+
     @functools.wraps(f)
     def visitor_method(self, node, *args, **kwargs):
-        if meta:
-            mro = node.__mro__
-        else:
-            mro = node.__class__.__mro__
-
-        for cls in mro:
-            try:
-                method = getattr(self, f"{f.__name__}_{cls.__name__}")
-            except AttributeError:
-                continue
+        node_class = node if meta else node.__class__
 
-            if static:
-                ans = method(*args, **kwargs)
-            else:
-                ans = method(node, *args, **kwargs)
+        try:
+            handlers = dispatch_tables[self.__class__][node_class]
+        except KeyError:
+            handlers = _resolve_handlers(self.__class__, name, node_class.__mro__, static)
+            dispatch_tables.setdefault(self.__class__, {})[node_class] = handlers
 
+        for handler in handlers:
+            ans = handler(self, node, *args, **kwargs)
             if ans is not NotImplemented:
                 return ans
 
-        options = ", ".join(cls.__name__ for cls in mro)
-        raise NotImplementedError(f"{f.__name__} for [{options}]")
+        options = ", ".join(cls.__name__ for cls in node_class.__mro__)
+        raise NotImplementedError(f"{name} for [{options}]")
 
     return visitor_method
 
@@ -1,4 +1,7 @@
-from flask import Blueprint, request, jsonify
+import os
+
+from flask import Blueprint, Response, request, jsonify
+from turingarena.evaluation.blobs import blob_store
 from turingarena_web.model.submission import Submission, EvaluationEvent
 
 api_bp = Blueprint("api", __name__)
@@ -36,3 +39,35 @@ def evaluation_event():
     ]
 
     return jsonify(events=events)
+
+
+@api_bp.route("/evaluation_file")
+def evaluation_file():
+    submission_id = request.args.get("id", None)
+    blob = request.args.get("blob", None)
+
+    if submission_id is None or blob is None:
+        return error(400, "you must specify a submission id and a blob")
+
+    submission = Submission.from_id(submission_id)
+
+    if submission is None:
+        return error(400, "you provided an invalid submission id")
+
+    for event in submission.file_events:
+        if event.payload.get("blob") == blob:
+            file = event.payload
+            break
+    else:
+        return error(404, "no such file in this submission")
+
+    store = blob_store()
+    # checked before responding, since the content is streamed after the headers are sent
+    if not os.path.exists(store.path(blob)):
+        return error(404, "the file is no longer available")
+
+    # streamed in chunks, files can be large
+    response = Response(store.read_chunks(blob), mimetype=file["content_type"])
+    response.headers["Content-Length"] = str(file["size"])
+    response.headers["Content-Disposition"] = f"attachment; filename=\"{file['filename']}\""
+    return response
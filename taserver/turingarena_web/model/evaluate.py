@@ -1,5 +1,7 @@
 import os
 import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
 
 from flask import request, redirect, url_for
 from turingarena.driver.language import Language
@@ -9,6 +11,58 @@ from turingarena.evaluation.events import EvaluationEventType
 from turingarena_web.model.submission import Submission, SubmissionStatus
 
 
+# idle evaluator workers, by problem path: (version of the problem, worker, exit stack)
+_idle_workers = defaultdict(list)
+_idle_workers_lock = threading.Lock()
+
+
+def _problem_version(problem):
+    # problems are updated in place (see `Problem.update()`), so workers of older versions must not be used
+    # (the evaluator and the modules it preloads are in the problem directory)
+    return max(
+        (entry.stat().st_mtime for entry in os.scandir(problem.path) if entry.is_file()),
+        default=0,
+    )
+
+
+@contextmanager
+def evaluator_worker(problem, evaluator):
+    """
+    Gives an idle worker of the evaluator of the problem (see `Evaluator.worker()`), or starts a new one.
+    Workers are kept after the evaluation, so concurrent evaluations use different workers.
+    """
+    version = _problem_version(problem)
+    stale = []
+    entry = None
+    with _idle_workers_lock:
+        idle = _idle_workers[problem.path]
+        while idle:
+            candidate = idle.pop()
+            if candidate[0] == version and entry is None:
+                entry = candidate
+            else:
+                stale.append(candidate)
+    for _, _, stack in stale:
+        stack.close()
+
+    if entry is None:
+        stack = ExitStack()
+        entry = (version, stack.enter_context(evaluator.worker()), stack)
+
+    _, worker, stack = entry
+    try:
+        yield worker
+    except BaseException:
+        stack.close()
+        raise
+
+    if worker is not None and worker.broken:
+        stack.close()
+    else:
+        with _idle_workers_lock:
+            _idle_workers[problem.path].append(entry)
+
+
 def evaluate_thread(problem, submission):
     evaluator = Evaluator(problem.path)
     submission_files = dict(
@@ -16,15 +70,17 @@ def evaluate_thread(problem, submission):
     )
 
     submission.set_status(SubmissionStatus.EVALUATING)
-    for event in evaluator.evaluate(files=submission_files, redirect_stderr=True, log_level="WARNING"):
-        if event.type == EvaluationEventType.DATA:
-            data = event.payload
-            if data.get("type") == "goal_result":
-                goal = problem.goal(data["goal"])
-                result = data["result"]
-                goal.acquire(submission, result)
-
-        submission.event(event_type=event.type, payload=event.payload)
+    with evaluator_worker(problem, evaluator) as worker:
+        events = evaluator.evaluate(files=submission_files, redirect_stderr=True, log_level="WARNING", worker=worker)
+        for event in events:
+            if event.type == EvaluationEventType.DATA:
+                data = event.payload
+                if data.get("type") == "goal_result":
+                    goal = problem.goal(data["goal"])
+                    result = data["result"]
+                    goal.acquire(submission, result)
+
+            submission.event(event_type=event.type, payload=event.payload)
 
     submission.event(event_type=EvaluationEventType.DATA, payload=dict(type="end"))
     submission.set_status(SubmissionStatus.EVALUATED)